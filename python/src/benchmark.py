@@ -0,0 +1,271 @@
+import argparse
+import json
+import logging
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, TextIO
+
+from latency import get_latency_percentiles
+from logger import getLogger
+from ontology.domain.edge_type import EdgeType
+from ontology.domain.ontology import Ontology
+from ontology.inference_engine import ANCESTOR_EDGE_TYPES
+from ontology.loader import CsvLoader
+from ontology.reachability_index import REACHABILITY_INDEXES
+from question import QuestionType
+from question_processor import QuestionProcessor
+from scripts.generate_ontology import OntologyGenerator, OntologyShape
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+QUESTION_TEMPLATES = {
+    QuestionType.SUBCLASS_OF: "is {} a type of {}?",
+    QuestionType.INSTANCE_OF: "is {} a {}?",
+    QuestionType.HAS_ATTRIBUTE: "is {} considered to be {}?",
+}
+
+
+class OntologyBenchmark:
+    """
+    Measures, for a synthetic ontology of a given number of edges: how long the CSV takes to parse on its own, how
+    long each phase of loading takes (see `Ontology.load_profile`), peak memory, and the latency of single questions
+    of each `QuestionType`, first with an empty answer cache ("cold") and then asking the same questions again
+    ("warm").
+
+    Half of the questions are about an entity and one of its ancestors or inherited attributes, the rest about random
+    pairs of entities, so both the YES paths and the full walks are exercised.
+    """
+
+    DEFAULT_QUESTIONS_PER_TYPE = 1_000
+
+    logger = getLogger(__name__)
+    data_dir: Path
+    questions_per_type: int
+    reachability_index: Optional[str]
+    materialize_closure: bool
+    seed: int
+    load_workers: int
+
+    def __init__(
+        self,
+        data_dir: Path,
+        questions_per_type: int = DEFAULT_QUESTIONS_PER_TYPE,
+        reachability_index: Optional[str] = None,
+        materialize_closure: bool = False,
+        seed: int = 0,
+        load_workers: int = 1,
+    ):
+        self.data_dir = data_dir
+        self.questions_per_type = questions_per_type
+        self.reachability_index = reachability_index
+        self.materialize_closure = materialize_closure
+        self.seed = seed
+        self.load_workers = load_workers
+
+    def get_mode(self) -> str:
+        if self.materialize_closure:
+            return "closure"
+        if self.reachability_index is not None:
+            return self.reachability_index
+
+        return "traversal"
+
+    def run(self, num_edges: int) -> Dict[str, Any]:
+        """
+        Benchmark an ontology of `num_edges` edges, generating its file in `data_dir` unless it is already there.
+        Peak memory is that of the whole process, so sizes are best run in separate processes, as `main` does.
+        """
+        file_path = self.get_data_file(num_edges)
+
+        start = time.perf_counter()
+        CsvLoader(workers=self.load_workers).load(file_path)
+        parse_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        question_processor = QuestionProcessor(
+            file_path,
+            self.reachability_index,
+            self.materialize_closure,
+            load_workers=self.load_workers,
+        )
+        load_seconds = time.perf_counter() - start
+        ontology = question_processor.ontology_facade.ontology
+
+        questions = self._get_questions(ontology)
+        question_processor.ontology_facade.clear_answer_cache()
+        cold = self._measure_latencies(question_processor, questions)
+        warm = self._measure_latencies(question_processor, questions)
+
+        return {
+            "num_edges": num_edges,
+            "mode": self.get_mode(),
+            "load_workers": self.load_workers,
+            "entities": len(ontology.store),
+            "stored_edges": ontology.store.num_edges,
+            "parse_seconds": parse_seconds,
+            "load_seconds": load_seconds,
+            "load_phases": ontology.load_profile.to_dict(),
+            "store_mb": ontology.store.nbytes / 2**20,
+            "peak_rss_mb": get_peak_rss_mb(),
+            "latency": {"cold": cold, "warm": warm},
+        }
+
+    def get_data_file(self, num_edges: int) -> Path:
+        file_path = self.data_dir / f"benchmark-{num_edges}-{self.seed}.csv"
+        if not file_path.exists():
+            self.logger.info("Generating %d edges into %s", num_edges, file_path)
+            OntologyGenerator(OntologyShape.for_edges(num_edges, self.seed)).write(
+                file_path
+            )
+
+        return file_path
+
+    # ---------------------------------------------------------------------------- #
+    #                                    PRIVATE                                   #
+    # ---------------------------------------------------------------------------- #
+    def _get_questions(self, ontology: Ontology) -> Dict[QuestionType, List[str]]:
+        store = ontology.store
+        rng = random.Random(self.seed)
+        questions: Dict[QuestionType, List[str]] = {}
+
+        for question_type, template in QUESTION_TEMPLATES.items():
+            questions[question_type] = []
+            for _ in range(self.questions_per_type):
+                head_id = rng.randrange(len(store))
+                related_ids = sorted(
+                    self._get_related_ids(ontology, question_type, head_id)
+                )
+                if related_ids and rng.random() < 0.5:
+                    tail_id = rng.choice(related_ids)
+                else:
+                    tail_id = rng.randrange(len(store))
+
+                questions[question_type].append(
+                    template.format(store.get_name(head_id), store.get_name(tail_id))
+                )
+
+        return questions
+
+    def _get_related_ids(
+        self, ontology: Ontology, question_type: QuestionType, head_id: int
+    ) -> Set[int]:
+        store = ontology.store
+        if question_type == QuestionType.SUBCLASS_OF:
+            return store.get_reachable_ids(head_id, (EdgeType.SUBCLASS_OF,)) - {head_id}
+
+        ancestor_ids = store.get_reachable_ids(head_id, ANCESTOR_EDGE_TYPES)
+        if question_type == QuestionType.INSTANCE_OF:
+            return ancestor_ids - {head_id}
+
+        return {
+            attribute_id
+            for ancestor_id in ancestor_ids
+            for attribute_id in store.neighbours(ancestor_id, EdgeType.HAS_ATTRIBUTE)
+        }
+
+    def _measure_latencies(
+        self,
+        question_processor: QuestionProcessor,
+        questions: Dict[QuestionType, List[str]],
+    ) -> Dict[str, Dict[str, float]]:
+        latencies = {}
+        for question_type, type_questions in questions.items():
+            type_latencies = []
+            for question in type_questions:
+                start = time.perf_counter()
+                question_processor.process(question)
+                type_latencies.append(time.perf_counter() - start)
+
+            latencies[question_type.name] = get_latency_percentiles(type_latencies)
+
+        return latencies
+
+
+def get_peak_rss_mb() -> float:
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak_rss / 2**20 if sys.platform == "darwin" else peak_rss / 2**10
+
+
+def write_results(results: Sequence[Dict[str, Any]], output: TextIO) -> None:
+    for result in results:
+        output.write(json.dumps(result) + "\n")
+    output.flush()
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark loading, inference and question latency across ontology sizes"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="numbers of edges, e.g. 1000 10000 100000 1000000 10000000",
+    )
+    parser.add_argument("--data-dir", type=Path, default=Path("data/benchmark"))
+    parser.add_argument(
+        "--questions-per-type",
+        type=int,
+        default=OntologyBenchmark.DEFAULT_QUESTIONS_PER_TYPE,
+    )
+    parser.add_argument("--reachability-index", choices=sorted(REACHABILITY_INDEXES))
+    parser.add_argument("--materialize-closure", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--load-workers",
+        type=int,
+        default=1,
+        help="processes to parse each ontology CSV file with",
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="run every size in this process rather than each in a fresh one",
+    )
+    parser.add_argument(
+        "--output", type=Path, help="file to write JSON lines to (default: stdout)"
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    options = parser.parse_args(arguments)
+
+    logging.getLogger().setLevel(options.log_level)
+    options.data_dir.mkdir(parents=True, exist_ok=True)
+    benchmark = OntologyBenchmark(
+        options.data_dir,
+        options.questions_per_type,
+        options.reachability_index,
+        options.materialize_closure,
+        options.seed,
+        options.load_workers,
+    )
+
+    results = []
+    for num_edges in options.sizes:
+        if options.in_process:
+            results.append(benchmark.run(num_edges))
+            continue
+
+        # A fresh interpreter per size, so that peak memory and cold timings are not affected by earlier sizes
+        with ProcessPoolExecutor(
+            1,
+            mp_context=get_context("spawn"),
+            initializer=logging.getLogger().setLevel,
+            initargs=(options.log_level,),
+        ) as executor:
+            results.append(executor.submit(benchmark.run, num_edges).result())
+
+    if options.output is None:
+        write_results(results, sys.stdout)
+    else:
+        with open(options.output, "w") as output:
+            write_results(results, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+from typing import Dict, Sequence
+
+import numpy as np
+
+LATENCY_PERCENTILES = (50, 90, 99, 99.9)
+
+
+def get_latency_percentiles(
+    latencies: Sequence[float], prefix: str = ""
+) -> Dict[str, float]:
+    """
+    Percentiles of `latencies`, given in seconds, as milliseconds keyed "p50_ms", "p90_ms" and so on, after `prefix`.
+    """
+    if len(latencies) == 0:
+        return {}
+
+    percentiles = np.percentile(np.asarray(latencies), LATENCY_PERCENTILES)
+
+    return {
+        f"{prefix}p{percentile:g}_ms": latency * 1000
+        for percentile, latency in zip(LATENCY_PERCENTILES, percentiles.tolist())
+    }
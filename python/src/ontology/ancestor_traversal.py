@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from typing import FrozenSet, Iterable, Set, Tuple
+
+from ontology.domain.edge_type import EdgeType
+from ontology.domain.graph_store import GraphStore
+
+AncestorKey = Tuple[Tuple[EdgeType, ...], int]
+
+
+class AncestorTraversal:
+    """
+    Cycle-safe, memoised ancestor sets over a `GraphStore`.
+
+    Every walk keeps a visited set, so each entity reachable from the start is expanded once however many paths
+    lead to it, and cycles terminate. Finished ancestor sets are kept in a least-recently-used cache bounded by the
+    total number of ids held. A later walk that meets an entity whose set is cached takes that set whole instead
+    of expanding it again, so all of the query kinds share the work.
+    """
+
+    DEFAULT_MAX_CACHED_IDS = 10_000_000
+
+    store: GraphStore
+    max_cached_ids: int
+    _cache: "OrderedDict[AncestorKey, FrozenSet[int]]"
+    _cached_ids: int
+    _edge_types_seen: Set[Tuple[EdgeType, ...]]
+
+    def __init__(self, store: GraphStore, max_cached_ids: int = DEFAULT_MAX_CACHED_IDS):
+        self.store = store
+        self.max_cached_ids = max_cached_ids
+        self._cache = OrderedDict()
+        self._cached_ids = 0
+        self._edge_types_seen = set()
+
+    def get_ancestor_ids(
+        self, entity_id: int, edge_types: Tuple[EdgeType, ...]
+    ) -> FrozenSet[int]:
+        """
+        `entity_id` and every entity reachable from it along edges of `edge_types`.
+        """
+        key = (edge_types, entity_id)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        ancestor_ids = {entity_id}
+        stack = [entity_id]
+        while stack:
+            current_id = stack.pop()
+            for edge_type in edge_types:
+                for parent_id in self.store.neighbours(current_id, edge_type):
+                    if parent_id in ancestor_ids:
+                        continue
+
+                    parent_ancestor_ids = self._cache.get((edge_types, parent_id))
+                    if parent_ancestor_ids is not None:
+                        ancestor_ids.update(parent_ancestor_ids)
+                    else:
+                        ancestor_ids.add(parent_id)
+                        stack.append(parent_id)
+
+        result = frozenset(ancestor_ids)
+        self._put(key, result)
+
+        return result
+
+    def evict(self, entity_ids: Iterable[int]) -> None:
+        """
+        Drop the cached ancestor sets of `entity_ids`, e.g. because an edge above them changed.
+        """
+        for entity_id in entity_ids:
+            for edge_types in self._edge_types_seen:
+                evicted = self._cache.pop((edge_types, entity_id), None)
+                if evicted is not None:
+                    self._cached_ids -= len(evicted)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._cached_ids = 0
+
+    # ---------------------------------------------------------------------------- #
+    #                                    PRIVATE                                   #
+    # ---------------------------------------------------------------------------- #
+    def _put(self, key: AncestorKey, ancestor_ids: FrozenSet[int]) -> None:
+        if len(ancestor_ids) > self.max_cached_ids:
+            return
+
+        self._edge_types_seen.add(key[0])
+        self._cache[key] = ancestor_ids
+        self._cached_ids += len(ancestor_ids)
+
+        while self._cached_ids > self.max_cached_ids:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_ids -= len(evicted)
@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from logger import getLogger
+from ontology.domain.edge_type import EdgeType
+from ontology.exceptions.ontology_exceptions import UnknownEvictionPolicyException
+from question_result import QuestionResult
+
+AnswerKey = Tuple[EdgeType, str, str]
+
+
+@dataclass(frozen=True)
+class AnswerCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+
+        return self.hits / lookups if lookups else 0.0
+
+
+class EvictionPolicy(ABC):
+    """
+    Decides which cached answer goes when an `AnswerCache` is full, and whether an answer is still fresh.
+    """
+
+    @classmethod
+    def create(cls, name: str, ttl_seconds: Optional[float] = None) -> EvictionPolicy:
+        if name not in EVICTION_POLICIES:
+            raise UnknownEvictionPolicyException(
+                f"Unknown eviction policy {name}, expected one of {sorted(EVICTION_POLICIES)}"
+            )
+
+        if name == "ttl":
+            return TtlEvictionPolicy(ttl_seconds)
+
+        return EVICTION_POLICIES[name]()
+
+    @abstractmethod
+    def insert(self, key: AnswerKey) -> None:
+        pass
+
+    @abstractmethod
+    def touch(self, key: AnswerKey) -> None:
+        pass
+
+    @abstractmethod
+    def remove(self, key: AnswerKey) -> None:
+        pass
+
+    @abstractmethod
+    def victim(self) -> AnswerKey:
+        pass
+
+    def is_expired(self, key: AnswerKey) -> bool:
+        return False
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+
+class LruEvictionPolicy(EvictionPolicy):
+    """
+    Evicts the answer that was looked up least recently.
+    """
+
+    _order: "OrderedDict[AnswerKey, None]"
+
+    def __init__(self):
+        self._order = OrderedDict()
+
+    def insert(self, key: AnswerKey) -> None:
+        self._order[key] = None
+
+    def touch(self, key: AnswerKey) -> None:
+        self._order.move_to_end(key)
+
+    def remove(self, key: AnswerKey) -> None:
+        self._order.pop(key, None)
+
+    def victim(self) -> AnswerKey:
+        return next(iter(self._order))
+
+    def clear(self) -> None:
+        self._order.clear()
+
+
+class LfuEvictionPolicy(EvictionPolicy):
+    """
+    Evicts the answer that was looked up least often, the least recently used of those on ties. Answers are kept in
+    one bucket per lookup count so every operation is constant time.
+    """
+
+    _counts: Dict[AnswerKey, int]
+    _buckets: Dict[int, "OrderedDict[AnswerKey, None]"]
+    _min_count: int
+
+    def __init__(self):
+        self._counts = {}
+        self._buckets = {}
+        self._min_count = 0
+
+    def insert(self, key: AnswerKey) -> None:
+        self._counts[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_count = 1
+
+    def touch(self, key: AnswerKey) -> None:
+        count = self._counts[key]
+        self._remove_from_bucket(key, count)
+        if count == self._min_count and count not in self._buckets:
+            self._min_count = count + 1
+
+        self._counts[key] = count + 1
+        self._buckets.setdefault(count + 1, OrderedDict())[key] = None
+
+    def remove(self, key: AnswerKey) -> None:
+        count = self._counts.pop(key, None)
+        if count is not None:
+            self._remove_from_bucket(key, count)
+
+    def victim(self) -> AnswerKey:
+        if self._min_count not in self._buckets:
+            self._min_count = min(self._buckets)
+
+        return next(iter(self._buckets[self._min_count]))
+
+    def clear(self) -> None:
+        self._counts.clear()
+        self._buckets.clear()
+        self._min_count = 0
+
+    def _remove_from_bucket(self, key: AnswerKey, count: int) -> None:
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+
+
+class TtlEvictionPolicy(EvictionPolicy):
+    """
+    Answers expire `ttl_seconds` after they were computed. When the cache is full the oldest answer is evicted.
+    """
+
+    ttl_seconds: float
+    _inserted_at: "OrderedDict[AnswerKey, float]"
+
+    def __init__(self, ttl_seconds: Optional[float]):
+        if ttl_seconds is None or ttl_seconds <= 0:
+            raise ValueError("The ttl eviction policy needs a positive ttl_seconds")
+
+        self.ttl_seconds = ttl_seconds
+        self._inserted_at = OrderedDict()
+
+    def insert(self, key: AnswerKey) -> None:
+        self._inserted_at[key] = time.monotonic()
+
+    def touch(self, key: AnswerKey) -> None:
+        pass
+
+    def remove(self, key: AnswerKey) -> None:
+        self._inserted_at.pop(key, None)
+
+    def victim(self) -> AnswerKey:
+        return next(iter(self._inserted_at))
+
+    def is_expired(self, key: AnswerKey) -> bool:
+        return time.monotonic() - self._inserted_at[key] > self.ttl_seconds
+
+    def clear(self) -> None:
+        self._inserted_at.clear()
+
+
+EVICTION_POLICIES: Dict[str, Type[EvictionPolicy]] = {
+    "lru": LruEvictionPolicy,
+    "lfu": LfuEvictionPolicy,
+    "ttl": TtlEvictionPolicy,
+}
+
+
+class AnswerCache:
+    """
+    Answers to ontology queries, keyed by (edge type asked about, query entity name, target entity name).
+
+    Each `Ontology` owns its cache, so it is released along with the ontology. It holds at most `capacity` answers
+    (`None` for no limit) and makes room according to `policy`, one of `EVICTION_POLICIES`. Keys are also indexed
+    by the entity names they mention, so that answers touching a set of entities can be evicted without scanning
+    the whole cache.
+    """
+
+    DEFAULT_CAPACITY = 1_000_000
+
+    logger = getLogger(__name__)
+    capacity: Optional[int]
+    policy_name: str
+    ttl_seconds: Optional[float]
+    policy: EvictionPolicy
+    _answers: Dict[AnswerKey, QuestionResult]
+    _keys_by_entity: Dict[str, Set[AnswerKey]]
+    _hits: int
+    _misses: int
+    _evictions: int
+    _expirations: int
+    _bytes: int
+
+    def __init__(
+        self,
+        capacity: Optional[int] = DEFAULT_CAPACITY,
+        policy: str = "lru",
+        ttl_seconds: Optional[float] = None,
+    ):
+        if capacity is not None and capacity <= 0:
+            raise ValueError("The answer cache capacity must be positive")
+
+        self.capacity = capacity
+        self.policy_name = policy
+        self.ttl_seconds = ttl_seconds
+        self.policy = EvictionPolicy.create(policy, ttl_seconds)
+        self._answers = {}
+        self._keys_by_entity = {}
+        self._bytes = 0
+        self.reset_stats()
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def get(self, key: AnswerKey) -> Optional[QuestionResult]:
+        result = self._answers.get(key)
+
+        if result is not None and self.policy.is_expired(key):
+            self._remove(key)
+            self._expirations += 1
+            result = None
+
+        if result is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self.policy.touch(key)
+
+        return result
+
+    def put(self, key: AnswerKey, result: QuestionResult) -> None:
+        if key in self._answers:
+            self._answers[key] = result
+            self.policy.remove(key)
+            self.policy.insert(key)
+            return
+
+        if self.capacity is not None and len(self._answers) >= self.capacity:
+            self._remove(self.policy.victim())
+            self._evictions += 1
+
+        self._answers[key] = result
+        self.policy.insert(key)
+        self._bytes += self._entry_nbytes(key)
+
+        _, query_entity_name, target_entity_name = key
+        self._keys_by_entity.setdefault(query_entity_name, set()).add(key)
+        self._keys_by_entity.setdefault(target_entity_name, set()).add(key)
+
+    def create_empty(self) -> AnswerCache:
+        """
+        An empty cache configured like this one.
+        """
+        return AnswerCache(self.capacity, self.policy_name, self.ttl_seconds)
+
+    def get_recent_keys(self, limit: int) -> List[AnswerKey]:
+        """
+        The keys of the at most `limit` answers first cached most recently, oldest first.
+        """
+        if limit <= 0:
+            return []
+
+        # Copied in one step, so that answers cached meanwhile by another thread can not change the keys under us
+        return list(self._answers)[-limit:]
+
+    def evict_entities(self, entity_names: Iterable[str]) -> int:
+        """
+        Evict every answer whose query or target is one of `entity_names`. Returns the number of answers evicted.
+        """
+        evicted = 0
+        for entity_name in entity_names:
+            for key in list(self._keys_by_entity.get(entity_name, ())):
+                self._remove(key)
+                evicted += 1
+
+        return evicted
+
+    def evict_targets(self, edge_type: EdgeType, target_entity_name: str) -> int:
+        """
+        Evict every answer about `edge_type` whose target is `target_entity_name`. Returns the number of answers
+        evicted.
+        """
+        keys = [
+            key
+            for key in self._keys_by_entity.get(target_entity_name, ())
+            if key[0] == edge_type and key[2] == target_entity_name
+        ]
+        for key in keys:
+            self._remove(key)
+
+        return len(keys)
+
+    def clear(self) -> None:
+        """
+        Drop every cached answer, e.g. because the ontology changed underneath it. The statistics are kept.
+        """
+        self.logger.debug("Clearing %d cached answers", len(self._answers))
+        self._answers.clear()
+        self._keys_by_entity.clear()
+        self.policy.clear()
+        self._bytes = 0
+
+    def get_stats(self) -> AnswerCacheStats:
+        return AnswerCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            expirations=self._expirations,
+            entries=len(self._answers),
+            bytes=self._bytes,
+        )
+
+    def reset_stats(self) -> None:
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    # ---------------------------------------------------------------------------- #
+    #                                    PRIVATE                                   #
+    # ---------------------------------------------------------------------------- #
+    def _remove(self, key: AnswerKey) -> None:
+        del self._answers[key]
+        self.policy.remove(key)
+        self._bytes -= self._entry_nbytes(key)
+
+        for entity_name in key[1:]:
+            keys = self._keys_by_entity.get(entity_name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_entity[entity_name]
+
+    def _entry_nbytes(self, key: AnswerKey) -> int:
+        """
+        Approximate memory held for one answer: the key tuple and its names. Edge types and results are shared
+        singletons and the names may be shared with the ontology, so this is an upper bound on what eviction frees.
+        """
+        _, query_entity_name, target_entity_name = key
+
+        return (
+            sys.getsizeof(key)
+            + sys.getsizeof(query_entity_name)
+            + sys.getsizeof(target_entity_name)
+        )
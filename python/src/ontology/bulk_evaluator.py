@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import time
+from typing import Dict
+
+import numpy as np
+
+from logger import getLogger
+from ontology.disjointness_index import DisjointnessIndex
+from ontology.domain.edge_type import EdgeType
+from ontology.domain.graph_store import CsrAdjacency
+from ontology.exceptions.ontology_exceptions import InvalidEdgeTypeException
+from ontology.loader import EDGE_TYPES
+from question_result import QuestionResult
+
+INSTANCE_OF_CODE = EDGE_TYPES.index(EdgeType.INSTANCE_OF)
+SUBCLASS_OF_CODE = EDGE_TYPES.index(EdgeType.SUBCLASS_OF)
+HAS_ATTRIBUTE_CODE = EDGE_TYPES.index(EdgeType.HAS_ATTRIBUTE)
+
+
+class BulkEvaluator:
+    """
+    Answers arrays of (edge type, query id, target id) questions with array operations, for offline scoring.
+
+    Every transitive closure is flattened into one sorted array of `head * num_nodes + tail` keys, so a batch of
+    YES checks is a single `searchsorted`. The NO check for InstanceOf gathers each query's disjoint classes from a
+    CSR copy of the `DisjointnessIndex` and looks every (target, disjoint class) pair up in the SubclassOf keys.
+
+    Edge types are given as their codes in `loader.EDGE_TYPES` and results as `QuestionResult` values. Ids of -1,
+    e.g. from names `GraphStore.get_ids` does not know, are answered DONT_KNOW. The evaluator is a snapshot of the
+    closure it was built from.
+    """
+
+    logger = getLogger(__name__)
+    num_nodes: int
+    ancestor_keys: np.ndarray
+    superclass_keys: np.ndarray
+    attribute_keys: np.ndarray
+    disjoint: CsrAdjacency
+
+    def __init__(
+        self,
+        num_nodes: int,
+        ancestor_keys: np.ndarray,
+        superclass_keys: np.ndarray,
+        attribute_keys: np.ndarray,
+        disjoint: CsrAdjacency,
+    ):
+        self.num_nodes = num_nodes
+        self.ancestor_keys = ancestor_keys
+        self.superclass_keys = superclass_keys
+        self.attribute_keys = attribute_keys
+        self.disjoint = disjoint
+
+    @classmethod
+    def build(
+        cls,
+        num_nodes: int,
+        closure: Dict[EdgeType, CsrAdjacency],
+        disjointness: DisjointnessIndex,
+    ) -> BulkEvaluator:
+        start = time.perf_counter()
+
+        evaluator = cls(
+            num_nodes,
+            cls._get_keys(closure[EdgeType.INSTANCE_OF], num_nodes),
+            cls._get_keys(closure[EdgeType.SUBCLASS_OF], num_nodes),
+            cls._get_keys(closure[EdgeType.HAS_ATTRIBUTE], num_nodes),
+            disjointness.to_adjacency(num_nodes),
+        )
+
+        cls.logger.info(
+            "Built bulk evaluator over %d entities in %.3fs using %d bytes",
+            num_nodes,
+            time.perf_counter() - start,
+            evaluator.nbytes,
+        )
+
+        return evaluator
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> BulkEvaluator:
+        """
+        Rebuild an evaluator from the output of `to_arrays`, without copying the arrays.
+        """
+        return cls(
+            int(arrays["num_nodes"][0]),
+            arrays["ancestor_keys"],
+            arrays["superclass_keys"],
+            arrays["attribute_keys"],
+            CsrAdjacency(arrays["disjoint_offsets"], arrays["disjoint_targets"]),
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Everything the evaluator holds as plain arrays, e.g. to place them in shared memory.
+        """
+        return {
+            "num_nodes": np.array([self.num_nodes], dtype=np.int64),
+            "ancestor_keys": self.ancestor_keys,
+            "superclass_keys": self.superclass_keys,
+            "attribute_keys": self.attribute_keys,
+            "disjoint_offsets": self.disjoint.offsets,
+            "disjoint_targets": self.disjoint.targets,
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.ancestor_keys.nbytes
+            + self.superclass_keys.nbytes
+            + self.attribute_keys.nbytes
+            + self.disjoint.nbytes
+        )
+
+    def evaluate(
+        self, edge_type_codes: np.ndarray, query_ids: np.ndarray, target_ids: np.ndarray
+    ) -> np.ndarray:
+        """
+        The answers to each (edge type, query, target) triple of the parallel input arrays, as an int8 array of
+        `QuestionResult` values.
+        """
+        edge_type_codes = np.asarray(edge_type_codes)
+        query_ids = np.asarray(query_ids, dtype=np.int64)
+        target_ids = np.asarray(target_ids, dtype=np.int64)
+
+        unknown_codes = ~np.isin(
+            edge_type_codes, [INSTANCE_OF_CODE, SUBCLASS_OF_CODE, HAS_ATTRIBUTE_CODE]
+        )
+        if unknown_codes.any():
+            raise InvalidEdgeTypeException(
+                f"Can not answer questions about edge type codes {np.unique(edge_type_codes[unknown_codes])}"
+            )
+
+        results = np.full(len(query_ids), QuestionResult.DONT_KNOW.value, dtype=np.int8)
+        known = (
+            (query_ids >= 0)
+            & (query_ids < self.num_nodes)
+            & (target_ids >= 0)
+            & (target_ids < self.num_nodes)
+        )
+
+        for code, keys in (
+            (INSTANCE_OF_CODE, self.ancestor_keys),
+            (SUBCLASS_OF_CODE, self.superclass_keys),
+            (HAS_ATTRIBUTE_CODE, self.attribute_keys),
+        ):
+            positions = np.flatnonzero(known & (edge_type_codes == code))
+            selected_query_ids = query_ids[positions]
+            selected_target_ids = target_ids[positions]
+
+            yes = self._contains(
+                keys, selected_query_ids * self.num_nodes + selected_target_ids
+            )
+            if code != HAS_ATTRIBUTE_CODE:
+                yes |= selected_query_ids == selected_target_ids
+            results[positions[yes]] = QuestionResult.YES.value
+
+            if code == INSTANCE_OF_CODE:
+                no = self._is_disjoint(
+                    selected_query_ids[~yes], selected_target_ids[~yes]
+                )
+                results[positions[~yes][no]] = QuestionResult.NO.value
+
+        return results
+
+    # ---------------------------------------------------------------------------- #
+    #                                    PRIVATE                                   #
+    # ---------------------------------------------------------------------------- #
+    @classmethod
+    def _get_keys(cls, adjacency: CsrAdjacency, num_nodes: int) -> np.ndarray:
+        adjacency = adjacency.compacted(num_nodes)
+        keys = adjacency.head_ids() * num_nodes + adjacency.targets
+
+        return np.sort(keys, kind="stable")
+
+    def _contains(self, keys: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        if len(keys) == 0:
+            return np.zeros(len(candidates), dtype=bool)
+
+        positions = np.minimum(np.searchsorted(keys, candidates), len(keys) - 1)
+
+        return keys[positions] == candidates
+
+    def _is_disjoint(self, query_ids: np.ndarray, target_ids: np.ndarray) -> np.ndarray:
+        """
+        Whether each query is disjoint with a class that its target is, or is a subclass of.
+        """
+        pair_positions, excluded_ids = self.disjoint.gather(query_ids)
+        pair_target_ids = target_ids[pair_positions]
+        excluded = (pair_target_ids == excluded_ids) | self._contains(
+            self.superclass_keys, pair_target_ids * self.num_nodes + excluded_ids
+        )
+
+        return np.bincount(pair_positions[excluded], minlength=len(query_ids)) > 0
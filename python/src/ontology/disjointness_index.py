@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+from collections import ChainMap
+from typing import Dict, FrozenSet, Iterable, List, MutableMapping, Optional, Set, Tuple
+
+import numpy as np
+
+from logger import getLogger
+from ontology.domain.edge_type import EdgeType
+from ontology.domain.graph_store import CsrAdjacency, GraphStore, sorted_unique
+from ontology.inference_engine import ANCESTOR_EDGE_TYPES
+
+EMPTY: FrozenSet[int] = frozenset()
+
+
+class DisjointnessIndex:
+    """
+    For every entity, the classes it is known to be disjoint with: the `MutuallyExclusiveWith` targets of the entity
+    itself and of all of its InstanceOf/SubclassOf ancestors.
+
+    The sets are propagated down the hierarchy once, so "is `query` disjoint with `target`?" becomes an intersection
+    of the query's set with the target and its superclasses. Entities inheriting the same axioms share one set, and
+    entities below no axiom are not stored at all.
+    """
+
+    logger = getLogger(__name__)
+    store: GraphStore
+    disjoint_ids: MutableMapping[int, FrozenSet[int]]
+
+    def __init__(
+        self, store: GraphStore, disjoint_ids: MutableMapping[int, FrozenSet[int]]
+    ):
+        self.store = store
+        self.disjoint_ids = disjoint_ids
+
+    @classmethod
+    def build(cls, store: GraphStore) -> DisjointnessIndex:
+        """
+        Propagate the `MutuallyExclusiveWith` targets of every entity down to its descendants, see `_inherit`.
+        """
+        index = cls(store, {})
+        exclusions = store.adjacency[EdgeType.MUTUALLY_EXCLUSIVE_WITH].compacted(
+            len(store)
+        )
+        excluding_ids = np.flatnonzero(np.diff(exclusions.offsets))
+        offsets = exclusions.offsets.tolist()
+        targets = exclusions.targets.tolist()
+
+        entity_ids, set_ids, sets = index._inherit(
+            excluding_ids,
+            [
+                frozenset(targets[offsets[entity_id] : offsets[entity_id + 1]])
+                for entity_id in excluding_ids.tolist()
+            ],
+        )
+        index.disjoint_ids.update(
+            zip(entity_ids.tolist(), map(sets.__getitem__, set_ids.tolist()))
+        )
+
+        cls.logger.info(
+            "Built disjointness index, %d entities are below a MutuallyExclusiveWith axiom",
+            len(index.disjoint_ids),
+        )
+
+        return index
+
+    @classmethod
+    def from_adjacency(
+        cls, store: GraphStore, adjacency: CsrAdjacency
+    ) -> DisjointnessIndex:
+        """
+        Rebuild an index from the output of `to_adjacency`. Entities with the same disjoint classes share a set again.
+        """
+        shared: Dict[Tuple[int, ...], FrozenSet[int]] = {}
+        disjoint_ids = {}
+        offsets = adjacency.offsets.tolist()
+        targets = adjacency.targets.tolist()
+
+        for entity_id in np.flatnonzero(np.diff(adjacency.offsets)).tolist():
+            row = tuple(targets[offsets[entity_id] : offsets[entity_id + 1]])
+            disjoint_ids[entity_id] = shared.setdefault(row, frozenset(row))
+
+        return cls(store, disjoint_ids)
+
+    def to_adjacency(self, num_nodes: int) -> CsrAdjacency:
+        """
+        The sets as a CSR adjacency from each entity to the classes it is disjoint with.
+        """
+        return CsrAdjacency.from_edges(
+            np.repeat(
+                np.fromiter(
+                    self.disjoint_ids, dtype=np.int64, count=len(self.disjoint_ids)
+                ),
+                [len(excluded_ids) for excluded_ids in self.disjoint_ids.values()],
+            ),
+            np.array(
+                [
+                    excluded_id
+                    for excluded_ids in self.disjoint_ids.values()
+                    for excluded_id in excluded_ids
+                ],
+                dtype=np.int64,
+            ),
+            num_nodes,
+        )
+
+    def create_overlay(self, store: GraphStore) -> DisjointnessIndex:
+        """
+        An index over `store`, an overlay of this index's store, that reads this index's sets and keeps the sets it
+        recomputes to itself.
+        """
+        return DisjointnessIndex(store, ChainMap({}, self.disjoint_ids))
+
+    def get_disjoint_ids(self, entity_id: int) -> FrozenSet[int]:
+        return self.disjoint_ids.get(entity_id, EMPTY)
+
+    def is_disjoint(self, entity_id: int, target_superclass_ids: Iterable[int]) -> bool:
+        """
+        Whether `entity_id` is disjoint with a class whose superclasses (itself included) are `target_superclass_ids`.
+        """
+        disjoint_ids = self.disjoint_ids.get(entity_id)
+
+        return disjoint_ids is not None and not disjoint_ids.isdisjoint(
+            target_superclass_ids
+        )
+
+    def update(self, entity_ids: Iterable[int]) -> None:
+        """
+        Recompute the sets of `entity_ids` after an edge above them changed. `entity_ids` has to contain every
+        descendant of the changed edge's head.
+        """
+        self._propagate(entity_ids)
+
+    def find_inconsistent_ids(
+        self, entity_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, List[int]]:
+        """
+        Entities that are an instance or subclass of two disjoint classes, keyed by the excluded class they fall
+        under. With `entity_ids` only those entities are checked, each by a walk up from it.
+
+        Otherwise every entity is given the excluded classes it falls under by `_inherit`, and is inconsistent with
+        those of them it is disjoint with. Entities sharing both sets share the intersection.
+        """
+        if entity_ids is not None:
+            return self._find_inconsistent_ids_among(entity_ids)
+
+        excluded_ids = sorted_unique(
+            self.store.adjacency[EdgeType.MUTUALLY_EXCLUSIVE_WITH]
+            .compacted(len(self.store))
+            .targets
+        )
+        entity_ids, set_ids, sets = self._inherit(
+            excluded_ids,
+            [frozenset([excluded_id]) for excluded_id in excluded_ids.tolist()],
+        )
+
+        inconsistent_ids: Dict[int, List[int]] = {}
+        intersections: Dict[Tuple[int, int], FrozenSet[int]] = {}
+        for entity_id, set_id in zip(entity_ids.tolist(), set_ids.tolist()):
+            disjoint_ids = self.disjoint_ids.get(entity_id)
+            if not disjoint_ids:
+                continue
+
+            key = (set_id, id(disjoint_ids))
+            found_ids = intersections.get(key)
+            if found_ids is None:
+                found_ids = intersections[key] = sets[set_id] & disjoint_ids
+
+            for excluded_id in found_ids:
+                inconsistent_ids.setdefault(excluded_id, []).append(entity_id)
+
+        return {
+            excluded_id: sorted(inconsistent_ids[excluded_id])
+            for excluded_id in sorted(inconsistent_ids)
+        }
+
+    # ---------------------------------------------------------------------------- #
+    #                                    PRIVATE                                   #
+    # ---------------------------------------------------------------------------- #
+    def _inherit(
+        self, seed_ids: np.ndarray, seed_sets: List[FrozenSet[int]]
+    ) -> Tuple[np.ndarray, np.ndarray, List[FrozenSet[int]]]:
+        """
+        Give every entity below `seed_ids` (themselves included) the union of the `seed_sets` of its InstanceOf and
+        SubclassOf ancestors, returned as arrays of entity ids and of positions in a list of the distinct sets.
+
+        Every cycle is collapsed into one of its members first, whose set the others share. Entities are then
+        visited a whole generation at a time with array operations, each once all of its parents have been, so that
+        only an entity inheriting more than one distinct set has a union taken for it on its own.
+        """
+        if not seed_sets:
+            no_ids = np.empty(0, dtype=np.int64)
+            return no_ids, no_ids, []
+
+        parents = self.store.get_merged_adjacency(ANCESTOR_EDGE_TYPES)
+        num_nodes = len(parents.offsets) - 1
+        representative_ids = np.arange(num_nodes)
+        cycles = parents.find_cycles()
+        for cycle in cycles:
+            representative_ids[cycle] = cycle[0]
+        if cycles:
+            head_ids = representative_ids[parents.head_ids()]
+            tail_ids = representative_ids[parents.targets]
+            between = head_ids != tail_ids
+            parents = CsrAdjacency.from_edges(
+                head_ids[between], tail_ids[between], num_nodes
+            )
+        children = parents.transpose()
+
+        own_sets: Dict[int, FrozenSet[int]] = {}
+        for seed_id, seed_set in zip(representative_ids[seed_ids].tolist(), seed_sets):
+            own_set = own_sets.get(seed_id)
+            own_sets[seed_id] = seed_set if own_set is None else own_set | seed_set
+        own_ids = np.fromiter(own_sets, dtype=np.int64, count=len(own_sets))
+        own_set_ids = np.full(num_nodes, -1, dtype=np.int64)
+        own_set_ids[own_ids] = np.arange(len(own_ids))
+        sets = list(own_sets.values())
+        set_positions = {own_set: set_id for set_id, own_set in enumerate(sets)}
+        unions: Dict[Tuple[int, ...], int] = {}
+
+        # How many of its parents below a seed each entity is still waiting for
+        below = children.get_reachable_mask(own_ids)
+        below_ids = np.flatnonzero(below)
+        positions, parent_ids = parents.gather(below_ids)
+        waiting = np.bincount(
+            below_ids[positions[below[parent_ids]]], minlength=num_nodes
+        )
+
+        set_ids = np.full(num_nodes, -1, dtype=np.int64)
+        visited = []
+        generation = below_ids[waiting[below_ids] == 0]
+        while len(generation):
+            # Every (entity, set) pair of the generation, once, ordered by entity
+            positions, parent_ids = parents.gather(generation)
+            inherited = set_ids[parent_ids]
+            own = own_set_ids[generation]
+            own_positions = np.flatnonzero(own >= 0)
+            num_sets = len(sets)
+            keys = sorted_unique(
+                np.concatenate(
+                    [
+                        positions[inherited >= 0] * num_sets
+                        + inherited[inherited >= 0],
+                        own_positions * num_sets + own[own_positions],
+                    ]
+                )
+            )
+            positions, candidate_ids = np.divmod(keys, num_sets)
+            counts = np.bincount(positions, minlength=len(generation))
+            starts = np.cumsum(counts) - counts
+
+            single = counts == 1
+            set_ids[generation[single]] = candidate_ids[starts[single]]
+
+            candidate_ids = candidate_ids.tolist()
+            for position in np.flatnonzero(counts > 1).tolist():
+                start = starts[position]
+                key = tuple(candidate_ids[start : start + counts[position]])
+                set_id = unions.get(key)
+                if set_id is None:
+                    union = frozenset().union(*(sets[set_id] for set_id in key))
+                    set_id = set_positions.setdefault(union, len(sets))
+                    if set_id == len(sets):
+                        sets.append(union)
+                    unions[key] = set_id
+
+                set_ids[generation[position]] = set_id
+
+            visited.append(generation)
+            _, child_ids = children.gather(generation)
+            waiting -= np.bincount(child_ids, minlength=num_nodes)
+            generation = sorted_unique(child_ids[waiting[child_ids] == 0])
+
+        member_ids = np.flatnonzero(representative_ids != np.arange(num_nodes))
+        member_ids = member_ids[set_ids[representative_ids[member_ids]] >= 0]
+        set_ids[member_ids] = set_ids[representative_ids[member_ids]]
+        entity_ids = np.concatenate(visited + [member_ids])
+
+        return entity_ids, set_ids[entity_ids], sets
+
+    def _propagate(self, entity_ids: Iterable[int]) -> None:
+        """
+        Compute the sets of `entity_ids`, which have to be closed under descendants. Parents outside of it keep the
+        sets they already have. Cycles are collapsed into their strongly connected components, whose members all
+        share one set, and components are visited parents first.
+        """
+        entity_ids = list(entity_ids)
+        local_ids = {
+            entity_id: local_id for local_id, entity_id in enumerate(entity_ids)
+        }
+        for entity_id in entity_ids:
+            self.disjoint_ids.pop(entity_id, None)
+
+        head_ids, tail_ids = [], []
+        inherited: List[List[FrozenSet[int]]] = [[] for _ in entity_ids]
+        for local_id, entity_id in enumerate(entity_ids):
+            excluded_ids = self.store.neighbours(
+                entity_id, EdgeType.MUTUALLY_EXCLUSIVE_WITH
+            )
+            if excluded_ids:
+                inherited[local_id].append(frozenset(excluded_ids))
+
+            for edge_type in ANCESTOR_EDGE_TYPES:
+                for parent_id in self.store.neighbours(entity_id, edge_type):
+                    parent_local_id = local_ids.get(parent_id)
+                    if parent_local_id is not None:
+                        head_ids.append(local_id)
+                        tail_ids.append(parent_local_id)
+                    elif parent_id in self.disjoint_ids:
+                        inherited[local_id].append(self.disjoint_ids[parent_id])
+
+        component, num_components = CsrAdjacency.from_edges(
+            np.array(head_ids, dtype=np.int64),
+            np.array(tail_ids, dtype=np.int64),
+            len(entity_ids),
+        ).strongly_connected_components()
+        component = component.tolist()
+
+        members: List[List[int]] = [[] for _ in range(num_components)]
+        component_inherited: List[List[FrozenSet[int]]] = [
+            [] for _ in range(num_components)
+        ]
+        for local_id, sets in enumerate(inherited):
+            members[component[local_id]].append(local_id)
+            component_inherited[component[local_id]].extend(sets)
+
+        parent_components: List[Set[int]] = [set() for _ in range(num_components)]
+        for head_id, tail_id in zip(head_ids, tail_ids):
+            if component[head_id] != component[tail_id]:
+                parent_components[component[head_id]].add(component[tail_id])
+
+        # Edges between components point from higher to lower numbers, so parents are always done first
+        component_disjoint_ids: List[FrozenSet[int]] = []
+        for current in range(num_components):
+            disjoint_ids = self._union(
+                component_inherited[current]
+                + [
+                    component_disjoint_ids[parent]
+                    for parent in parent_components[current]
+                ]
+            )
+            component_disjoint_ids.append(disjoint_ids)
+
+            for local_id in members[current]:
+                entity_id = entity_ids[local_id]
+                # An empty set is only stored to hide the set an overlay's base has for the entity
+                if disjoint_ids or entity_id in self.disjoint_ids:
+                    self.disjoint_ids[entity_id] = disjoint_ids
+
+    def _find_inconsistent_ids_among(
+        self, entity_ids: Iterable[int]
+    ) -> Dict[int, List[int]]:
+        inconsistent_ids: Dict[int, List[int]] = {}
+        for entity_id in sorted(entity_ids):
+            disjoint_ids = self.get_disjoint_ids(entity_id)
+            if not disjoint_ids:
+                continue
+
+            ancestor_ids = self.store.get_reachable_ids(entity_id, ANCESTOR_EDGE_TYPES)
+            for excluded_id in disjoint_ids & ancestor_ids:
+                inconsistent_ids.setdefault(excluded_id, []).append(entity_id)
+
+        return inconsistent_ids
+
+    def _union(self, sets: List[FrozenSet[int]]) -> FrozenSet[int]:
+        distinct = list({id(s): s for s in sets if s}.values())
+
+        if not distinct:
+            return EMPTY
+        if len(distinct) == 1:
+            return distinct[0]
+
+        return frozenset().union(*distinct)
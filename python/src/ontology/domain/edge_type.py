@@ -17,3 +17,22 @@ class EdgeType(Enum):
 
     def __str__(self):
         return self.value
+
+    def get_inverse(self) -> Optional["EdgeType"]:
+        return _INVERSE_EDGE_TYPES.get(self)
+
+    def get_forward(self) -> Optional["EdgeType"]:
+        """
+        The edge type this inverse edge type inverts, e.g. InstanceOf for HasInstance.
+        """
+        return _FORWARD_EDGE_TYPES.get(self)
+
+
+_INVERSE_EDGE_TYPES = {
+    EdgeType.INSTANCE_OF: EdgeType.HAS_INSTANCE,
+    EdgeType.SUBCLASS_OF: EdgeType.SUPERCLASS_OF,
+    EdgeType.HAS_ATTRIBUTE: EdgeType.ATTRIBUTE_OF,
+}
+_FORWARD_EDGE_TYPES = {
+    inverse: edge_type for edge_type, inverse in _INVERSE_EDGE_TYPES.items()
+}
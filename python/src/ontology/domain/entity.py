@@ -1,43 +1,100 @@
-from typing import List
+from __future__ import annotations
 
-from logger import getLogger
+from typing import TYPE_CHECKING, Iterable, List, Optional
+
+from ontology.domain.edge_type import EdgeType
 from ontology.domain.relationship import Relationship
 
+if TYPE_CHECKING:
+    from ontology.domain.ontology import Ontology
+
+# The edge types of the relationships an entity is the head of, as opposed to the inverse edge types read from them
+FORWARD_EDGE_TYPES = [
+    edge_type for edge_type in EdgeType if edge_type.get_forward() is None
+]
+
 
 class Entity:
     """
     Class for representing an entity in the ontology and its relationships.
+
+    An entity is a view of its node in the ontology's `GraphStore`, so nothing is held per entity or per edge: its
+    relationships are read from the store when asked for, and changed through `Ontology.add_edge` and
+    `Ontology.remove_edge` so that what was inferred from them stays up to date. The inverse edges (HasInstance,
+    SuperclassOf, AttributeOf) are read from the store's inverse partitions by `get_related_entities`.
     """
 
-    logger = getLogger(__name__)
-    name: str
-    relationships: List[Relationship]
+    ontology: Ontology
+    node_id: int
 
-    def __init__(self, name):
-        self.name = name
-        self.relationships = []
+    def __init__(self, ontology: Ontology, node_id: int):
+        self.ontology = ontology
+        self.node_id = node_id
 
     def __str__(self):
         return self.name
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Entity):
+            return NotImplemented
+
+        return self.ontology is other.ontology and self.node_id == other.node_id
+
+    def __hash__(self) -> int:
+        return hash((id(self.ontology), self.node_id))
+
+    @property
+    def name(self) -> str:
+        return self.ontology.store.get_name(self.node_id)
+
     def add_relationship(self, relationship: Relationship) -> None:
-        self.logger.debug(f"Adding relationship {relationship} to entity {self.name}")
-        for rel in self.relationships:
-            if (
-                rel.head_entity == relationship.head_entity
-                and rel.tail_entity == relationship.tail_entity
-                and rel.edge_type == relationship.edge_type
-            ):
-                self.logger.debug(
-                    f"Relationship {relationship} already exists for entity {self.name}"
-                )
-                return
-
-        self.relationships.append(relationship)
-
-    def add_relationships(self, relationships: List[Relationship]) -> None:
-        for relationship in relationships:
+        # Repeated relationships are dropped by the store
+        self.ontology.add_edge(
+            relationship.edge_type, self.name, relationship.tail_entity.name
+        )
+
+    def add_relationships(self, relationships: Iterable[Relationship]) -> None:
+        """
+        Add a batch of relationships, skipping any already held by this entity or repeated within the batch.
+        """
+        for relationship in dict.fromkeys(relationships):
             self.add_relationship(relationship)
 
-    def get_relationships(self) -> List[Relationship]:
-        return self.relationships
+    def remove_relationship(self, relationship: Relationship) -> bool:
+        return self.ontology.remove_edge(
+            relationship.edge_type, self.name, relationship.tail_entity.name
+        )
+
+    def has_relationship(self, relationship: Relationship) -> bool:
+        store = self.ontology.store
+        tail_id = store.get_id(relationship.tail_entity.name)
+
+        return tail_id is not None and store.has_edge(
+            self.node_id, tail_id, relationship.edge_type
+        )
+
+    def get_relationships(
+        self, edge_type: Optional[EdgeType] = None
+    ) -> List[Relationship]:
+        """
+        The relationships this entity is the head of, optionally only those of `edge_type`. They are created on
+        every call, and none are created for the inverse edge types.
+        """
+        edge_types = FORWARD_EDGE_TYPES if edge_type is None else [edge_type]
+
+        return [
+            Relationship(self, Entity(self.ontology, tail_id), edge_type)
+            for edge_type in edge_types
+            if edge_type.get_forward() is None
+            for tail_id in self.ontology.store.neighbours(self.node_id, edge_type)
+        ]
+
+    def get_related_entities(self, edge_type: EdgeType) -> List[Entity]:
+        """
+        The entities at the other end of this entity's edges of `edge_type`, which may be an inverse edge type: the
+        HasInstance edges of a class lead to the heads of the InstanceOf relationships it is the tail of.
+        """
+        return [
+            Entity(self.ontology, related_id)
+            for related_id in self.ontology.store.neighbours(self.node_id, edge_type)
+        ]
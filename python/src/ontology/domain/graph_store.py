@@ -0,0 +1,713 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from logger import getLogger
+from ontology.domain.edge_type import EdgeType
+from ontology.loader import EDGE_TYPES, EdgeTable
+
+
+def sorted_unique(values: np.ndarray) -> np.ndarray:
+    """
+    The distinct values of `values`, in ascending order. Unlike `np.unique`, which hashes on recent NumPy versions
+    and is many times slower on the large integer keys of edges, this only sorts.
+    """
+    values = np.sort(values)
+    if not len(values):
+        return values
+
+    first = np.empty(len(values), dtype=bool)
+    first[0] = True
+    np.not_equal(values[1:], values[:-1], out=first[1:])
+
+    return values[first]
+
+
+class CsrAdjacency:
+    """
+    Compressed sparse row adjacency for a single edge type.
+
+    The targets of node `i` are `targets[offsets[i]:offsets[i + 1]]`, sorted ascending. Rows changed after
+    construction are held, sorted, in `patches` and take precedence over the arrays until `compacted()` folds them
+    back in. `offsets`, `targets` and `head_ids()` only describe the arrays.
+    """
+
+    offsets: np.ndarray
+    targets: np.ndarray
+    patches: Dict[int, List[int]]
+
+    def __init__(self, offsets: np.ndarray, targets: np.ndarray):
+        self.offsets = offsets
+        self.targets = targets
+        self.patches = {}
+
+    def __len__(self) -> int:
+        return len(self.targets) + sum(
+            len(row) - self._array_degree(node_id)
+            for node_id, row in self.patches.items()
+        )
+
+    @classmethod
+    def from_edges(
+        cls, head_ids: np.ndarray, tail_ids: np.ndarray, num_nodes: int
+    ) -> CsrAdjacency:
+        """
+        Build the adjacency from parallel arrays of edge heads and tails. Repeated edges are stored once.
+        """
+        keys = sorted_unique(
+            np.asarray(head_ids, dtype=np.int64) * num_nodes
+            + np.asarray(tail_ids, dtype=np.int64)
+        )
+        head_ids, tail_ids = np.divmod(keys, max(num_nodes, 1))
+
+        offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(head_ids, minlength=num_nodes), out=offsets[1:])
+
+        return cls(offsets, tail_ids.astype(np.int32))
+
+    @property
+    def num_nodes(self) -> int:
+        return max(len(self.offsets) - 1, max(self.patches, default=-1) + 1)
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.targets.nbytes
+
+    def neighbours(self, node_id: int) -> List[int]:
+        if self.patches:
+            row = self.patches.get(node_id)
+            if row is not None:
+                return list(row)
+
+        if node_id >= len(self.offsets) - 1:
+            return []
+
+        return self.targets[self.offsets[node_id] : self.offsets[node_id + 1]].tolist()
+
+    def degree(self, node_id: int) -> int:
+        if node_id in self.patches:
+            return len(self.patches[node_id])
+
+        return self._array_degree(node_id)
+
+    def has_edge(self, head_id: int, tail_id: int) -> bool:
+        if self.patches:
+            row = self.patches.get(head_id)
+            if row is not None:
+                position = bisect_left(row, tail_id)
+                return position < len(row) and row[position] == tail_id
+
+        if head_id >= len(self.offsets) - 1:
+            return False
+
+        start, end = self.offsets[head_id], self.offsets[head_id + 1]
+        if start == end:
+            return False
+
+        position = start + np.searchsorted(self.targets[start:end], tail_id)
+
+        return bool(position < end and self.targets[position] == tail_id)
+
+    def gather(self, node_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The neighbours of every node in `node_ids` at once, as parallel arrays of (position in `node_ids`,
+        neighbour). Patched rows are not included.
+        """
+        starts = self.offsets[node_ids]
+        counts = self.offsets[node_ids + 1] - starts
+        block_starts = np.cumsum(counts) - counts
+        positions = np.repeat(starts - block_starts, counts) + np.arange(counts.sum())
+
+        return np.repeat(np.arange(len(node_ids)), counts), self.targets[positions]
+
+    def get_reachable_mask(self, node_ids: np.ndarray) -> np.ndarray:
+        """
+        Whether each node is reachable from any of `node_ids` (themselves included), found a whole frontier at a
+        time. Patched rows are not followed.
+        """
+        reachable = np.zeros(len(self.offsets) - 1, dtype=bool)
+        frontier = sorted_unique(np.asarray(node_ids, dtype=np.int64))
+
+        while len(frontier):
+            reachable[frontier] = True
+            _, neighbour_ids = self.gather(frontier)
+            frontier = sorted_unique(neighbour_ids[~reachable[neighbour_ids]])
+
+        return reachable
+
+    def add_edge(self, head_id: int, tail_id: int) -> bool:
+        row = self._get_patch(head_id)
+        position = bisect_left(row, tail_id)
+        if position < len(row) and row[position] == tail_id:
+            return False
+
+        row.insert(position, tail_id)
+        return True
+
+    def remove_edge(self, head_id: int, tail_id: int) -> bool:
+        row = self._get_patch(head_id)
+        position = bisect_left(row, tail_id)
+        if position == len(row) or row[position] != tail_id:
+            return False
+
+        del row[position]
+        return True
+
+    def set_neighbours(self, node_id: int, neighbours: List[int]) -> None:
+        """
+        Replace the row of `node_id`. `neighbours` must be sorted and free of repeats.
+        """
+        self.patches[node_id] = neighbours
+
+    def create_overlay(self) -> CsrAdjacency:
+        """
+        An adjacency reading this one's arrays without copying them, with copies of its patched rows, so that
+        changes made to either afterwards are not seen by the other.
+        """
+        overlay = CsrAdjacency(self.offsets, self.targets)
+        overlay.patches = {node_id: list(row) for node_id, row in self.patches.items()}
+
+        return overlay
+
+    def head_ids(self) -> np.ndarray:
+        """
+        The head of every edge in `targets`, aligned with it.
+        """
+        return np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets))
+
+    def compacted(self, num_nodes: int = 0) -> CsrAdjacency:
+        """
+        This adjacency with every patched row folded back into the arrays, sized for at least `num_nodes` nodes.
+        """
+        num_nodes = max(num_nodes, self.num_nodes)
+        if not self.patches and num_nodes == len(self.offsets) - 1:
+            return self
+
+        head_ids = self.head_ids()
+        patched_ids = np.fromiter(self.patches, dtype=np.int64, count=len(self.patches))
+        unpatched = ~np.isin(head_ids, patched_ids)
+        patched_rows = list(self.patches.values())
+
+        return CsrAdjacency.from_edges(
+            np.concatenate(
+                [
+                    head_ids[unpatched],
+                    np.repeat(patched_ids, [len(row) for row in patched_rows]),
+                ]
+            ),
+            np.concatenate(
+                [
+                    self.targets[unpatched],
+                    np.array(
+                        [node_id for row in patched_rows for node_id in row],
+                        dtype=np.int64,
+                    ),
+                ]
+            ),
+            num_nodes,
+        )
+
+    def transpose(self) -> CsrAdjacency:
+        adjacency = self.compacted()
+
+        return CsrAdjacency.from_edges(
+            adjacency.targets, adjacency.head_ids(), adjacency.num_nodes
+        )
+
+    def strongly_connected_components(self) -> Tuple[np.ndarray, int]:
+        """
+        Label every node with its strongly connected component (iterative Tarjan).
+
+        Components are numbered in reverse topological order: every edge between two different components goes
+        from the higher numbered component to the lower numbered one.
+        """
+        adjacency = self.compacted()
+        offsets = adjacency.offsets.tolist()
+        targets = adjacency.targets.tolist()
+        num_nodes = adjacency.num_nodes
+        index = [-1] * num_nodes
+        lowlink = [0] * num_nodes
+        on_stack = [False] * num_nodes
+        component = [-1] * num_nodes
+        stack = []
+        counter = 0
+        num_components = 0
+
+        for root in range(num_nodes):
+            if index[root] != -1:
+                continue
+
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, offsets[root])]
+
+            while work:
+                node, edge = work[-1]
+                if edge < offsets[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    child = targets[edge]
+                    if index[child] == -1:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = True
+                        work.append((child, offsets[child]))
+                    elif on_stack[child]:
+                        lowlink[node] = min(lowlink[node], index[child])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component[member] = num_components
+                        if member == node:
+                            break
+                    num_components += 1
+
+        return np.array(component, dtype=np.int64), num_components
+
+    def find_cycles(self) -> List[List[int]]:
+        """
+        The nodes of every cycle, grouped by strongly connected component.
+
+        Nodes that cannot reach a cycle are peeled off first, a whole layer of sinks at a time, then nodes no cycle
+        reaches, a whole layer of sources at a time, so that the component search only has to run over the cycles
+        and what lies between them, which is usually nothing.
+        """
+        adjacency = self.compacted()
+        num_nodes = adjacency.num_nodes
+        reverse = adjacency.transpose()
+        out_degree = np.diff(adjacency.offsets)
+        alive = np.ones(num_nodes, dtype=bool)
+
+        sinks = np.flatnonzero(out_degree == 0)
+        while len(sinks):
+            alive[sinks] = False
+            _, predecessors = reverse.gather(sinks)
+            out_degree = out_degree - np.bincount(predecessors, minlength=num_nodes)
+            candidates = sorted_unique(predecessors)
+            sinks = candidates[(out_degree[candidates] == 0) & alive[candidates]]
+
+        head_ids = adjacency.head_ids()
+        inside = alive[head_ids] & alive[adjacency.targets]
+        in_degree = np.bincount(adjacency.targets[inside], minlength=num_nodes)
+        sources = np.flatnonzero(alive & (in_degree == 0))
+        while len(sources):
+            alive[sources] = False
+            _, successors = adjacency.gather(sources)
+            in_degree = in_degree - np.bincount(successors, minlength=num_nodes)
+            candidates = sorted_unique(successors)
+            sources = candidates[(in_degree[candidates] == 0) & alive[candidates]]
+
+        remaining = np.flatnonzero(alive)
+        if not len(remaining):
+            return []
+
+        relabel = np.full(num_nodes, -1, dtype=np.int64)
+        relabel[remaining] = np.arange(len(remaining))
+        head_ids = relabel[head_ids]
+        tail_ids = relabel[adjacency.targets]
+        inside = (head_ids >= 0) & (tail_ids >= 0)
+        remaining_adjacency = CsrAdjacency.from_edges(
+            head_ids[inside], tail_ids[inside], len(remaining)
+        )
+        component, num_components = remaining_adjacency.strongly_connected_components()
+
+        members: List[List[int]] = [[] for _ in range(num_components)]
+        for position, node_component in enumerate(component.tolist()):
+            members[node_component].append(int(remaining[position]))
+
+        return [
+            nodes
+            for nodes in members
+            if len(nodes) > 1 or adjacency.has_edge(nodes[0], nodes[0])
+        ]
+
+    # ---------------------------------------------------------------------------- #
+    #                                    PRIVATE                                   #
+    # ---------------------------------------------------------------------------- #
+    def _array_degree(self, node_id: int) -> int:
+        if node_id >= len(self.offsets) - 1:
+            return 0
+
+        return int(self.offsets[node_id + 1] - self.offsets[node_id])
+
+    def _get_patch(self, node_id: int) -> List[int]:
+        if node_id not in self.patches:
+            self.patches[node_id] = self.neighbours(node_id)
+
+        return self.patches[node_id]
+
+
+class GraphStore:
+    """
+    Compact storage for the edges of an ontology.
+
+    Every entity is given an integer id and the edges are partitioned by edge type, each partition held as a CSR
+    adjacency. Traversals only touch the partitions for the edge types they follow. The inverse edge types
+    (HasInstance, SuperclassOf, AttributeOf) are derived from the edges they invert.
+
+    `closure` optionally holds the materialised transitive closure of the InstanceOf, SubclassOf and HasAttribute
+    edges, see `InferenceEngine.infer_transitive_relationships`.
+
+    A store made by `create_overlay` is layered on a `base` store: the first `base_size` ids are the base's, and
+    `names` and `ids` only hold the entities the overlay added.
+    """
+
+    logger = getLogger(__name__)
+    names: List[str]
+    ids: Dict[str, int]
+    adjacency: Dict[EdgeType, CsrAdjacency]
+    closure: Dict[EdgeType, CsrAdjacency]
+    base: Optional[GraphStore] = None
+    base_size: int = 0
+
+    def __init__(
+        self,
+        names: List[str],
+        adjacency: Dict[EdgeType, CsrAdjacency],
+    ):
+        self.names = names
+        self.ids = dict(zip(names, range(len(names))))
+        self.adjacency = adjacency
+        self.closure = {}
+
+    def __len__(self) -> int:
+        return self.base_size + len(self.names)
+
+    @classmethod
+    def from_arrays(cls, names: List[str], arrays: Dict[str, np.ndarray]) -> GraphStore:
+        """
+        Rebuild a store from the output of `to_arrays`, without copying the arrays.
+        """
+        store = cls(
+            names,
+            {
+                edge_type: CsrAdjacency(
+                    arrays[f"adjacency/{edge_type.value}/offsets"],
+                    arrays[f"adjacency/{edge_type.value}/targets"],
+                )
+                for edge_type in EdgeType
+            },
+        )
+        for edge_type in EdgeType:
+            if f"closure/{edge_type.value}/offsets" in arrays:
+                store.closure[edge_type] = CsrAdjacency(
+                    arrays[f"closure/{edge_type.value}/offsets"],
+                    arrays[f"closure/{edge_type.value}/targets"],
+                )
+
+        return store
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Every partition and closure as plain arrays, once changes since loading have been compacted into them.
+        """
+        self.compact()
+        arrays = {}
+        for prefix, adjacencies in (
+            ("adjacency", self.adjacency),
+            ("closure", self.closure),
+        ):
+            for edge_type, adjacency in adjacencies.items():
+                arrays[f"{prefix}/{edge_type.value}/offsets"] = adjacency.offsets
+                arrays[f"{prefix}/{edge_type.value}/targets"] = adjacency.targets
+
+        return arrays
+
+    @classmethod
+    def from_edge_table(cls, edge_table: EdgeTable) -> GraphStore:
+        """
+        Build the store from the columns of a loaded file, taking over its names, without creating an object per
+        entity or per edge.
+        """
+        num_nodes = len(edge_table.names)
+        edges = {
+            edge_type: (
+                edge_table.head_ids[edge_table.edge_types == code],
+                edge_table.tail_ids[edge_table.edge_types == code],
+            )
+            for code, edge_type in enumerate(EDGE_TYPES)
+        }
+
+        # Each inverse partition is the transpose of the edges it inverts, plus any inverse edges asserted as such
+        adjacency = {}
+        for edge_type, (head_ids, tail_ids) in edges.items():
+            forward_edge_type = edge_type.get_forward()
+            if forward_edge_type is not None:
+                forward_head_ids, forward_tail_ids = edges[forward_edge_type]
+                head_ids = np.concatenate([head_ids, forward_tail_ids])
+                tail_ids = np.concatenate([tail_ids, forward_head_ids])
+
+            adjacency[edge_type] = CsrAdjacency.from_edges(
+                head_ids, tail_ids, num_nodes
+            )
+
+        store = cls(edge_table.names, adjacency)
+        store.logger.info(
+            "Built graph store with %d entities and %d edges in %d bytes",
+            len(store),
+            store.num_edges,
+            store.nbytes,
+        )
+
+        return store
+
+    @property
+    def num_edges(self) -> int:
+        return sum(len(adjacency) for adjacency in self.adjacency.values())
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            adjacency.nbytes
+            for adjacency in [*self.adjacency.values(), *self.closure.values()]
+        )
+
+    def create_overlay(self) -> GraphStore:
+        """
+        A store layered on this one, which reads its names and CSR arrays without copying them. Entities the overlay
+        adds and rows it changes (copied on their first change) are its own, so it takes memory in proportion to
+        what it changes rather than to the size of this store. Neither store sees the other's later changes.
+        Compacting the overlay gives it arrays of its own, as large as this store's.
+        """
+        overlay = GraphStore(
+            [],
+            {
+                edge_type: adjacency.create_overlay()
+                for edge_type, adjacency in self.adjacency.items()
+            },
+        )
+        overlay.closure = {
+            edge_type: adjacency.create_overlay()
+            for edge_type, adjacency in self.closure.items()
+        }
+        overlay.base = self
+        overlay.base_size = len(self)
+
+        return overlay
+
+    def get_id(self, name: str) -> Optional[int]:
+        node_id = self.ids.get(name)
+        if node_id is None and self.base is not None:
+            node_id = self.base.get_id(name)
+            # Entities the base added after the overlay was made are not the overlay's
+            if node_id is not None and node_id >= self.base_size:
+                return None
+
+        return node_id
+
+    def get_ids(self, names: Iterable[str]) -> np.ndarray:
+        """
+        The id of every name, with -1 for names that are not in the store.
+        """
+        if self.base is None:
+            return np.fromiter(
+                (self.ids.get(name, -1) for name in names), dtype=np.int64
+            )
+
+        node_ids = map(self.get_id, names)
+        return np.fromiter(
+            (-1 if node_id is None else node_id for node_id in node_ids),
+            dtype=np.int64,
+        )
+
+    def get_name(self, node_id: int) -> str:
+        if node_id < self.base_size:
+            return self.base.get_name(node_id)
+
+        return self.names[node_id - self.base_size]
+
+    def get_names(self) -> List[str]:
+        """
+        The name of every entity, by id.
+        """
+        if self.base is None:
+            return self.names
+
+        return self.base.get_names()[: self.base_size] + self.names
+
+    def neighbours(self, node_id: int, edge_type: EdgeType) -> List[int]:
+        return self.adjacency[edge_type].neighbours(node_id)
+
+    def has_edge(self, head_id: int, tail_id: int, edge_type: EdgeType) -> bool:
+        return self.adjacency[edge_type].has_edge(head_id, tail_id)
+
+    def observe_neighbours(self, observer: Optional[Callable[[int], None]]) -> None:
+        """
+        Call `observer` with the number of neighbours found by every `neighbours` lookup, which every walk over the
+        store makes, until this is called again with None. Without an observer lookups are not wrapped at all.
+        """
+        if observer is None:
+            self.__dict__.pop("neighbours", None)
+            return
+
+        neighbours = GraphStore.neighbours.__get__(self)
+
+        def observed_neighbours(node_id: int, edge_type: EdgeType) -> List[int]:
+            found = neighbours(node_id, edge_type)
+            observer(len(found))
+            return found
+
+        self.neighbours = observed_neighbours
+
+    def get_or_create_id(self, name: str) -> int:
+        node_id = self.get_id(name)
+        if node_id is None:
+            node_id = self.ids[name] = len(self)
+            self.names.append(name)
+
+        return node_id
+
+    def add_edge(self, head_id: int, tail_id: int, edge_type: EdgeType) -> bool:
+        """
+        Add an edge, along with its inverse. Returns whether the edge was new.
+        """
+        if not self.adjacency[edge_type].add_edge(head_id, tail_id):
+            return False
+
+        inverse_edge_type = edge_type.get_inverse()
+        if inverse_edge_type is not None:
+            self.adjacency[inverse_edge_type].add_edge(tail_id, head_id)
+
+        return True
+
+    def remove_edge(self, head_id: int, tail_id: int, edge_type: EdgeType) -> bool:
+        """
+        Remove an edge, along with its inverse. Returns whether the edge existed.
+        """
+        if not self.adjacency[edge_type].remove_edge(head_id, tail_id):
+            return False
+
+        inverse_edge_type = edge_type.get_inverse()
+        if inverse_edge_type is not None:
+            self.adjacency[inverse_edge_type].remove_edge(tail_id, head_id)
+
+        return True
+
+    def get_reachable_ids(
+        self, node_id: int, edge_types: Iterable[EdgeType]
+    ) -> Set[int]:
+        """
+        Every node reachable from `node_id` (itself included) by following edges of the given types.
+        """
+        return self.get_reachable_ids_from_all([node_id], edge_types)
+
+    def get_reachable_ids_from_all(
+        self, node_ids: Iterable[int], edge_types: Iterable[EdgeType]
+    ) -> Set[int]:
+        """
+        Every node reachable from any of `node_ids` (themselves included) by following edges of the given types.
+        """
+        edge_types = list(edge_types)
+        reachable = set(node_ids)
+        stack = list(reachable)
+
+        while stack:
+            current_id = stack.pop()
+            for edge_type in edge_types:
+                for neighbour_id in self.neighbours(current_id, edge_type):
+                    if neighbour_id not in reachable:
+                        reachable.add(neighbour_id)
+                        stack.append(neighbour_id)
+
+        return reachable
+
+    def iter_reachable_ids(
+        self, node_ids: Iterable[int], edge_types: Iterable[EdgeType]
+    ) -> Iterator[int]:
+        """
+        Lazily yield every node reachable from any of `node_ids` (themselves first) by following edges of the given
+        types, breadth first and each once. Only the nodes seen so far are held, never the whole result.
+        """
+        edge_types = list(edge_types)
+        queue = deque(dict.fromkeys(node_ids))
+        seen = set(queue)
+
+        while queue:
+            current_id = queue.popleft()
+            yield current_id
+
+            for edge_type in edge_types:
+                for neighbour_id in self.neighbours(current_id, edge_type):
+                    if neighbour_id not in seen:
+                        seen.add(neighbour_id)
+                        queue.append(neighbour_id)
+
+    def find_reachable_ids(
+        self,
+        node_ids: Iterable[int],
+        edge_types: Iterable[EdgeType],
+        candidate_ids: Iterable[int],
+        max_visited: Optional[int] = None,
+    ) -> Optional[Set[int]]:
+        """
+        The `candidate_ids` reachable from any of `node_ids` (themselves included) by following edges of the given
+        types. The walk stops as soon as every candidate has been found, or gives up and returns None once it has
+        visited more than `max_visited` nodes.
+        """
+        edge_types = list(edge_types)
+        remaining = set(candidate_ids)
+        found = set()
+        reachable = set(node_ids)
+        stack = list(reachable)
+
+        for node_id in stack:
+            if node_id in remaining:
+                remaining.discard(node_id)
+                found.add(node_id)
+
+        while stack and remaining:
+            if max_visited is not None and len(reachable) > max_visited:
+                return None
+
+            current_id = stack.pop()
+            for edge_type in edge_types:
+                for neighbour_id in self.neighbours(current_id, edge_type):
+                    if neighbour_id not in reachable:
+                        reachable.add(neighbour_id)
+                        stack.append(neighbour_id)
+                        if neighbour_id in remaining:
+                            remaining.discard(neighbour_id)
+                            found.add(neighbour_id)
+
+        return found
+
+    def compact(self) -> None:
+        """
+        Fold the edges added or removed since loading back into the CSR arrays.
+        """
+        self.adjacency = {
+            edge_type: adjacency.compacted(len(self))
+            for edge_type, adjacency in self.adjacency.items()
+        }
+        self.closure = {
+            edge_type: adjacency.compacted(len(self))
+            for edge_type, adjacency in self.closure.items()
+        }
+
+    def get_merged_adjacency(self, edge_types: Iterable[EdgeType]) -> CsrAdjacency:
+        """
+        A single adjacency holding the edges of all of the given edge types.
+        """
+        adjacencies = [
+            self.adjacency[edge_type].compacted(len(self)) for edge_type in edge_types
+        ]
+
+        return CsrAdjacency.from_edges(
+            np.concatenate([adjacency.head_ids() for adjacency in adjacencies]),
+            np.concatenate([adjacency.targets for adjacency in adjacencies]),
+            len(self),
+        )
@@ -1,175 +1,977 @@
-from functools import lru_cache
+import time
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
 
-import pandas as pd
+import numpy as np
 
 from logger import getLogger
+from ontology.ancestor_traversal import AncestorTraversal
+from ontology.answer_cache import AnswerCache
+from ontology.bulk_evaluator import BulkEvaluator
+from ontology.disjointness_index import DisjointnessIndex
+from ontology.domain.edge_type import EdgeType
 from ontology.domain.entity import Entity
+from ontology.domain.graph_store import CsrAdjacency, GraphStore
 from ontology.domain.relationship import Relationship
-from ontology.inference_engine import InferenceEngine
+from ontology.exceptions.ontology_exceptions import (
+    InvalidEdgeTypeException,
+    ReadOnlyOntologyException,
+)
+from ontology.inference_engine import (
+    ANCESTOR_EDGE_TYPES,
+    DESCENDANT_EDGE_TYPES,
+    InferenceEngine,
+)
+from ontology.load_profile import LoadProfile, LoadProfiler
+from ontology.loader import CsvLoader
+from ontology.query_metrics import (
+    ANSWER_CACHE_HITS,
+    ANSWER_CACHE_MISSES,
+    EDGE_CHANGE,
+    MUTUAL_EXCLUSION_CHECKS,
+    QueryMetrics,
+)
+from ontology.reachability_index import ReachabilityIndex
+from ontology.shared_arrays import decode_names, encode_names
+from ontology.snapshot import read_snapshot, write_snapshot
 from question_result import QuestionResult
 
+NAMES_ARRAY = "names"
+DISJOINT_OFFSETS_ARRAY = "disjoint/offsets"
+DISJOINT_TARGETS_ARRAY = "disjoint/targets"
+SUBCLASS_EDGE_TYPES = (EdgeType.SUBCLASS_OF,)
+SUPERCLASS_EDGE_TYPES = (EdgeType.SUPERCLASS_OF,)
+ATTRIBUTE_EDGE_TYPES = (EdgeType.HAS_ATTRIBUTE, EdgeType.ATTRIBUTE_OF)
+
 
 class Ontology:
     """
     Accessing information about the ontology happens through this class
     """
 
-    entities: Dict[str, Entity] = {}
+    # How many nodes a walk down from a target may visit per query entity it answers, before the queries are
+    # answered one by one from their (memoised) ancestors instead
+    TARGET_WALK_NODES_PER_QUERY = 64
+
+    store: GraphStore
+    traversal: AncestorTraversal
+    answer_cache: AnswerCache
+    disjointness: DisjointnessIndex
+    cycles: List[List[str]]
+    inconsistent_entities: Dict[str, List[str]]
+    load_profile: LoadProfile
+    _load_profiler: LoadProfiler
+    subclass_index: Optional[ReachabilityIndex] = None
+    ancestor_index: Optional[ReachabilityIndex] = None
+    bulk_evaluator: Optional[BulkEvaluator] = None
+    metrics: Optional[QueryMetrics] = None
+    base: Optional["Ontology"] = None
+    is_base: bool = False
+    load_workers: int = 1
     logger = getLogger(__name__)
 
-    def __init__(self, file_path: Path):
-        self.load_entities(file_path)
+    def __init__(
+        self,
+        file_path: Path,
+        reachability_index: Optional[str] = None,
+        materialize_closure: bool = False,
+        answer_cache: Optional[AnswerCache] = None,
+        profile_memory: bool = False,
+        load_workers: int = 1,
+    ):
+        """
+        `reachability_index` optionally names a `ReachabilityIndex` ("interval" or "bitset") to build once loading
+        is done. Ancestor checks are then answered from the index instead of by walking the hierarchy.
+
+        `materialize_closure` has the inference engine derive every transitive InstanceOf, SubclassOf and
+        HasAttribute edge at load time, so that queries become edge lookups.
+
+        `answer_cache` bounds and configures the cache of query answers, by default an LRU cache of
+        `AnswerCache.DEFAULT_CAPACITY` answers.
+
+        How long each phase of loading took is kept in `load_profile`. `profile_memory` also measures the memory
+        and objects each phase allocates, at the cost of loading several times slower, and logs the profile.
+
+        `load_workers` processes parse the file in partitions, see `CsvLoader`. `file_path` may also be a directory
+        of shard CSV files.
+        """
+        self.load_workers = load_workers
+        self.materialize_closure = materialize_closure
+        self.answer_cache = answer_cache if answer_cache is not None else AnswerCache()
+        self._load_profiler = LoadProfiler(profile_memory)
+        self._load_profiled(
+            lambda: self.load_entities(file_path), reachability_index, profile_memory
+        )
+
+    @classmethod
+    def from_base(
+        cls,
+        base: "Ontology",
+        file_path: Path,
+        reachability_index: Optional[str] = None,
+        answer_cache: Optional[AnswerCache] = None,
+        profile_memory: bool = False,
+    ) -> "Ontology":
+        """
+        Load the edges in `file_path` as an overlay on `base`: an ontology of the base's edges plus its own, which
+        reads the base's graph store and indexes instead of copying them. The entities, adjacency rows and
+        disjointness sets an overlay adds or changes are its own, so overlays take memory in proportion to their
+        own size however large the base is, and any number of them can share one base. A materialised closure of the
+        base is carried over and kept up to date the same way. `get_entity` returns views of the overlay's store, so
+        they see the base's edges and the overlay's alike.
+
+        The base becomes read-only. Building a reachability index over an overlay copies the whole graph.
+        """
+        ontology = cls.__new__(cls)
+        ontology.base = base
+        ontology.materialize_closure = bool(base.store.closure)
+        ontology.answer_cache = (
+            answer_cache if answer_cache is not None else AnswerCache()
+        )
+        ontology._load_profiler = LoadProfiler(profile_memory)
+        base.is_base = True
+        ontology._load_profiled(
+            lambda: ontology._load_overlay(file_path),
+            reachability_index,
+            profile_memory,
+        )
+
+        return ontology
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        file_path: Path,
+        reachability_index: Optional[str] = None,
+        answer_cache: Optional[AnswerCache] = None,
+    ) -> "Ontology":
+        """
+        Load an ontology written by `save_snapshot`. The graph is mapped from the file rather than read, and nothing
+        is parsed or inferred again, so this takes a fraction of the time `Ontology(csv_path)` does and processes
+        mapping the same file share its memory. `get_entity` returns views of the mapped store.
+        """
+        start = time.perf_counter()
+        profiler = LoadProfiler()
+        with profiler.phase("snapshot"):
+            snapshot = read_snapshot(file_path)
+
+        ontology = cls.__new__(cls)
+        ontology.answer_cache = (
+            answer_cache if answer_cache is not None else AnswerCache()
+        )
+        with profiler.phase("graph_store"):
+            ontology.store = GraphStore.from_arrays(
+                decode_names(snapshot.arrays[NAMES_ARRAY]), snapshot.arrays
+            )
+        ontology.materialize_closure = bool(ontology.store.closure)
+        with profiler.phase("indexes"):
+            ontology.traversal = AncestorTraversal(ontology.store)
+            ontology.disjointness = DisjointnessIndex.from_adjacency(
+                ontology.store,
+                CsrAdjacency(
+                    snapshot.arrays[DISJOINT_OFFSETS_ARRAY],
+                    snapshot.arrays[DISJOINT_TARGETS_ARRAY],
+                ),
+            )
+        ontology.cycles = snapshot.metadata["cycles"]
+        ontology.inconsistent_entities = snapshot.metadata["inconsistent_entities"]
+        cls.logger.info(
+            "Loaded ontology snapshot %s with %d entities in %.3fs",
+            file_path,
+            len(ontology.store),
+            time.perf_counter() - start,
+        )
+
+        if reachability_index is not None:
+            with profiler.phase("reachability_index"):
+                ontology.build_reachability_indexes(reachability_index)
+
+        ontology.load_profile = profiler.stop()
+
+        return ontology
+
+    def save_snapshot(self, file_path: Path) -> None:
+        """
+        Write the loaded and inferred ontology, including edge changes made since, to `file_path` for
+        `from_snapshot`.
+        """
+        arrays = self.store.to_arrays()
+        arrays[NAMES_ARRAY] = encode_names(self.store.get_names())
+        disjoint = self.disjointness.to_adjacency(len(self.store))
+        arrays[DISJOINT_OFFSETS_ARRAY] = disjoint.offsets
+        arrays[DISJOINT_TARGETS_ARRAY] = disjoint.targets
+
+        write_snapshot(
+            file_path,
+            arrays,
+            {
+                "cycles": self.cycles,
+                "inconsistent_entities": self.inconsistent_entities,
+            },
+        )
+        self.logger.info("Saved ontology snapshot to %s", file_path)
 
     def load_entities(self, file_path: Path) -> None:
-        dataframe = pd.read_csv(file_path)
-
-        for _, row in dataframe.iterrows():
-            edge_type = row.get("EDGE_TYPE")
-            head_entity_name = row.get("HEAD_ENTITY")
-            tail_entity_name = row.get("TAIL_ENTITY")
+        with self._load_profiler.phase("parse"):
+            edge_table = CsvLoader(workers=self.load_workers).load(file_path)
 
-            head_entity = self.get_or_create_entity(head_entity_name)
-            tail_entity = self.get_or_create_entity(tail_entity_name)
-
-            relationship = Relationship(head_entity, tail_entity, edge_type)
-            head_entity.add_relationship(relationship)
+        # Straight from the loaded columns: `Entity` objects are only made as views of the store when asked for
+        with self._load_profiler.phase("graph_store"):
+            self.store = GraphStore.from_edge_table(edge_table)
 
         self.infer_relationships()
 
     def infer_relationships(self) -> None:
+        """
+        Build the indexes over the loaded graph store. Inverse edges are served from the store's inverse partitions,
+        derived once from the edges they invert, so nothing is created for them.
+        """
         self.logger.info("Inferring relationships")
-        relationships = self.get_all_relationships()
-
-        InferenceEngine(relationships=relationships).infer_relationships()
+        profiler = self._load_profiler
+
+        with profiler.phase("indexes"):
+            self.traversal = AncestorTraversal(self.store)
+            self.disjointness = DisjointnessIndex.build(self.store)
+            self.report_cycles()
+            self.report_inconsistent_entities()
+
+        if self.materialize_closure:
+            with profiler.phase("closure"):
+                self.store.closure = InferenceEngine().infer_transitive_relationships(
+                    self.store
+                )
+
+    def report_cycles(self) -> None:
+        """
+        Find the cycles in the class hierarchy. A cycle makes every entity on it an ancestor of every other, which
+        is almost certainly a mistake in the data, so they are logged as a warning.
+        """
+        self.cycles = [
+            [self.store.get_name(node_id) for node_id in nodes]
+            for nodes in self.store.get_merged_adjacency(
+                ANCESTOR_EDGE_TYPES
+            ).find_cycles()
+        ]
+
+        for cycle in self.cycles:
+            self.logger.warning(
+                "Cycle through %d entities in the class hierarchy: %s",
+                len(cycle),
+                ", ".join(cycle),
+            )
+
+    def report_inconsistent_entities(
+        self, entity_ids: Optional[Iterable[int]] = None
+    ) -> None:
+        """
+        Find the entities that are an instance or subclass of two mutually exclusive classes. Whatever they are asked
+        about, the answer is YES before NO, so they are logged as a warning. With `entity_ids` only those entities
+        are checked, and what is found is added to the entities found before.
+        """
+        found = self.disjointness.find_inconsistent_ids(entity_ids)
+        if entity_ids is None:
+            self.inconsistent_entities = {}
+
+        for excluded_id, found_ids in found.items():
+            excluded_name = self.store.get_name(excluded_id)
+            inconsistent_ids = {
+                self.store.get_id(entity_name)
+                for entity_name in self.inconsistent_entities.get(excluded_name, [])
+            }
+            inconsistent_ids.update(found_ids)
+            entity_names = [
+                self.store.get_name(entity_id) for entity_id in sorted(inconsistent_ids)
+            ]
+            self.inconsistent_entities[excluded_name] = entity_names
+
+            self.logger.warning(
+                "%d entities fall under %s and under a class mutually exclusive with it: %s",
+                len(entity_names),
+                excluded_name,
+                ", ".join(entity_names),
+            )
+
+    def build_reachability_indexes(self, name: str) -> None:
+        self.store.compact()
+        self.subclass_index = ReachabilityIndex.create(
+            name, self.store.adjacency[EdgeType.SUBCLASS_OF]
+        )
+        self.ancestor_index = ReachabilityIndex.create(
+            name,
+            self.store.get_merged_adjacency(
+                [EdgeType.INSTANCE_OF, EdgeType.SUBCLASS_OF]
+            ),
+        )
+
+    def enable_metrics(self, metrics: Optional[QueryMetrics] = None) -> QueryMetrics:
+        """
+        Start recording `QueryMetrics` for the questions answered from now on, into `metrics` if given.
+        """
+        self.metrics = metrics if metrics is not None else QueryMetrics()
+        self.store.observe_neighbours(self.metrics.observe_neighbours)
+
+        return self.metrics
+
+    def disable_metrics(self) -> None:
+        self.metrics = None
+        self.store.observe_neighbours(None)
+
+    def get_bulk_evaluator(self) -> BulkEvaluator:
+        """
+        The `BulkEvaluator` over the current ontology, built on first use. Without a materialised closure one is
+        derived for it, without changing how single questions are answered.
+        """
+        if self.bulk_evaluator is None:
+            self.store.compact()
+            closure = self.store.closure
+            if not closure:
+                closure = InferenceEngine().infer_transitive_relationships(self.store)
+
+            self.bulk_evaluator = BulkEvaluator.build(
+                len(self.store), closure, self.disjointness
+            )
+
+        return self.bulk_evaluator
+
+    def evaluate_pairs(
+        self,
+        edge_type_codes: np.ndarray,
+        query_entity_names: Sequence[str],
+        target_entity_names: Sequence[str],
+    ) -> np.ndarray:
+        """
+        Answer many questions at once with `BulkEvaluator.evaluate`, returning an int8 array of `QuestionResult`
+        values.
+        """
+        return self.get_bulk_evaluator().evaluate(
+            edge_type_codes,
+            self.store.get_ids(query_entity_names),
+            self.store.get_ids(target_entity_names),
+        )
 
     def get_or_create_entity(self, name) -> Entity:
-        if name not in self.entities:
-            self.entities[name] = Entity(name)
+        entity = self.get_entity(name)
+        if entity is None:
+            self._check_writable()
+            entity = Entity(self, self.store.get_or_create_id(name))
 
-        return self.entities[name]
+        return entity
 
     def get_entity(self, name) -> Optional[Entity]:
-        return self.entities.get(name)
+        """
+        A view of the entity in this ontology's graph store, which for an overlay includes the base's entities and
+        edges.
+        """
+        entity_id = self.store.get_id(name)
+        if entity_id is None:
+            return None
+
+        return Entity(self, entity_id)
 
     def get_entities(self) -> List[Entity]:
-        return list(self.entities.values())
+        return [Entity(self, entity_id) for entity_id in range(len(self.store))]
+
+    def get_related_entity_names(
+        self, entity_name: str, edge_type: Union[EdgeType, str]
+    ) -> List[str]:
+        """
+        The entities at the other end of the edges of `edge_type` leaving `entity_name`, which may be an inverse edge
+        type (HasInstance, SuperclassOf, AttributeOf), read from the graph store.
+        """
+        entity_id = self.store.get_id(entity_name)
+        if entity_id is None:
+            return []
+
+        return [
+            self.store.get_name(related_id)
+            for related_id in self.store.neighbours(
+                entity_id, self._get_edge_type(edge_type)
+            )
+        ]
+
+    def iter_instances(
+        self,
+        class_name: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        edge_types: Optional[Iterable[EdgeType]] = None,
+    ) -> Iterator[str]:
+        """
+        Lazily yield every entity that `is_instance_of(entity, class_name)` answers YES for, other than the class
+        itself, by a single walk down the HasInstance and SuperclassOf edges. `edge_types` names other edges to walk,
+        e.g. (HasInstance,) for instances and their instances only.
+
+        Results come breadth first in a stable order, so `offset` and `limit` page through them.
+        """
+        return self._iter_descendants(
+            [class_name], edge_types or DESCENDANT_EDGE_TYPES, limit, offset, False
+        )
+
+    def iter_subclasses(
+        self,
+        class_name: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        edge_types: Optional[Iterable[EdgeType]] = None,
+    ) -> Iterator[str]:
+        """
+        Lazily yield every entity that `is_subclass_of(entity, class_name)` answers YES for, other than the class
+        itself, by a single walk down the SuperclassOf edges. See `iter_instances` for the arguments.
+        """
+        return self._iter_descendants(
+            [class_name], edge_types or SUPERCLASS_EDGE_TYPES, limit, offset, False
+        )
+
+    def iter_entities_with_attribute(
+        self,
+        attribute_name: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        edge_types: Optional[Iterable[EdgeType]] = None,
+    ) -> Iterator[str]:
+        """
+        Lazily yield every entity that `has_attribute(entity, attribute_name)` answers YES for: the entities the
+        attribute is asserted of (along its AttributeOf edges), then everything below them. See `iter_instances`
+        for the arguments.
+        """
+        return self._iter_descendants(
+            self.get_related_entity_names(attribute_name, EdgeType.ATTRIBUTE_OF),
+            edge_types or DESCENDANT_EDGE_TYPES,
+            limit,
+            offset,
+            True,
+        )
 
     def get_all_relationships(self) -> List[Relationship]:
         relationships = []
-        for entity in self.entities.values():
+        for entity in self.get_entities():
             relationships.extend(entity.get_relationships())
 
         return relationships
 
     ...
 
-    @lru_cache(maxsize=None)
+    def add_edge(
+        self,
+        edge_type: Union[EdgeType, str],
+        head_entity_name: str,
+        tail_entity_name: str,
+    ) -> bool:
+        """
+        Add an edge to the loaded ontology, updating what was inferred from it. Returns whether the edge was new.
+        """
+        self._check_writable()
+        edge_type = self._get_edge_type(edge_type)
+        num_entities = len(self.store)
+        head_id = self.store.get_or_create_id(head_entity_name)
+        tail_id = self.store.get_or_create_id(tail_entity_name)
+        if not self.store.add_edge(head_id, tail_id, edge_type):
+            return False
+
+        self._apply_edge_change(
+            edge_type, head_id, tail_id, range(num_entities, len(self.store))
+        )
+        return True
+
+    def remove_edge(
+        self,
+        edge_type: Union[EdgeType, str],
+        head_entity_name: str,
+        tail_entity_name: str,
+    ) -> bool:
+        """
+        Remove an edge from the loaded ontology, updating what was inferred from it. Returns whether the edge
+        existed.
+        """
+        self._check_writable()
+        head_id = self.store.get_id(head_entity_name)
+        tail_id = self.store.get_id(tail_entity_name)
+        if head_id is None or tail_id is None:
+            return False
+
+        edge_type = self._get_edge_type(edge_type)
+        if not self.store.remove_edge(head_id, tail_id, edge_type):
+            return False
+
+        self._apply_edge_change(edge_type, head_id, tail_id)
+        return True
+
     def is_instance_of(
         self, query_entity_name: str, target_entity_name: str
     ) -> QuestionResult:
-        query_entity = self.get_entity(query_entity_name)
-        target_entity = self.get_entity(target_entity_name)
+        return self._get_answer(
+            EdgeType.INSTANCE_OF,
+            query_entity_name,
+            target_entity_name,
+            self._is_instance_of,
+        )
+
+    def is_subclass_of(
+        self, query_entity_name: str, target_entity_name: str
+    ) -> QuestionResult:
+        return self._get_answer(
+            EdgeType.SUBCLASS_OF,
+            query_entity_name,
+            target_entity_name,
+            self._is_subclass_of,
+        )
+
+    def has_attribute(
+        self, query_entity_name: str, target_attribute_name: str
+    ) -> QuestionResult:
+        return self._get_answer(
+            EdgeType.HAS_ATTRIBUTE,
+            query_entity_name,
+            target_attribute_name,
+            self._has_attribute,
+        )
+
+    def get_answers(
+        self,
+        edge_type: EdgeType,
+        query_entity_names: List[str],
+        target_entity_name: str,
+    ) -> List[QuestionResult]:
+        """
+        Answer the same question about one target for many query entities, in order. `edge_type` is InstanceOf,
+        SubclassOf or HasAttribute.
+
+        When the hierarchy has to be walked, the uncached queries are answered together by a single walk down from
+        the target, which stops once it has seen every query entity, instead of a walk up from each of them. The
+        walk is only worth it while the queries are a large part of what lies below the target, so it gives up after
+        `TARGET_WALK_NODES_PER_QUERY` nodes per query and the queries are then answered one by one.
+        """
+        answer = self._get_answer_method(edge_type)
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+            metrics.begin(edge_type.name)
+
+        results: List[Optional[QuestionResult]] = [
+            self.answer_cache.get((edge_type, query_entity_name, target_entity_name))
+            for query_entity_name in query_entity_names
+        ]
+        pending = [
+            position for position, result in enumerate(results) if result is None
+        ]
+
+        answers = None
+        if len(pending) > 1 and not self.store.closure and self.ancestor_index is None:
+            answers = self._answer_from_target(
+                edge_type,
+                [query_entity_names[position] for position in pending],
+                target_entity_name,
+            )
+        if answers is None:
+            answers = [
+                answer(query_entity_names[position], target_entity_name)
+                for position in pending
+            ]
+
+        for position, result in zip(pending, answers):
+            results[position] = result
+            self.answer_cache.put(
+                (edge_type, query_entity_names[position], target_entity_name), result
+            )
+
+        if metrics is not None and results:
+            metrics.count(ANSWER_CACHE_HITS, len(results) - len(pending))
+            metrics.count(ANSWER_CACHE_MISSES, len(pending))
+            metrics.record_latency(
+                edge_type.name, time.perf_counter() - start, len(results)
+            )
+
+        return results
+
+    # ---------------------------------------------------------------------------- #
+    #                                    PRIVATE                                   #
+    # ---------------------------------------------------------------------------- #
+    def _load_profiled(
+        self,
+        load: Callable[[], None],
+        reachability_index: Optional[str],
+        profile_memory: bool,
+    ) -> None:
+        """
+        Run `load`, then build the reachability index if one is asked for. The profiler is stopped whether or not
+        loading succeeds, so that a failed load does not leave memory tracing on.
+        """
+        try:
+            load()
+            if reachability_index is not None:
+                with self._load_profiler.phase("reachability_index"):
+                    self.build_reachability_indexes(reachability_index)
+        finally:
+            self.load_profile = self._load_profiler.stop()
+
+        if profile_memory:
+            self.load_profile.log(self.logger)
+
+    def _load_overlay(self, file_path: Path) -> None:
+        """
+        Add the edges in `file_path` to an overlay of the base's store, then update only what depends on them:
+        disjointness sets, cycles and inconsistent entities below the added edges, and the closure.
+        """
+        profiler = self._load_profiler
+        with profiler.phase("parse"):
+            edge_table = CsvLoader().load(file_path)
+
+        with profiler.phase("graph_store"):
+            self.store = self.base.store.create_overlay()
+            node_ids = [self.store.get_or_create_id(name) for name in edge_table.names]
+            added_edges = []
+            for edge_type, head_id, tail_id in edge_table.iter_edges():
+                head_id, tail_id = node_ids[head_id], node_ids[tail_id]
+                if self.store.add_edge(head_id, tail_id, edge_type):
+                    added_edges.append((edge_type, head_id, tail_id))
+
+        with profiler.phase("indexes"):
+            self.traversal = AncestorTraversal(self.store)
+            self.disjointness = self.base.disjointness.create_overlay(self.store)
+            affected_ids = self.store.get_reachable_ids_from_all(
+                [
+                    head_id
+                    for edge_type, head_id, _ in added_edges
+                    if edge_type not in ATTRIBUTE_EDGE_TYPES
+                ],
+                DESCENDANT_EDGE_TYPES,
+            )
+            self.disjointness.update(affected_ids)
+
+            # Edges are only added, so what was found in the base still holds
+            self.cycles = self.base.cycles
+            if any(
+                head_id in self.traversal.get_ancestor_ids(tail_id, ANCESTOR_EDGE_TYPES)
+                for edge_type, head_id, tail_id in added_edges
+                if edge_type in ANCESTOR_EDGE_TYPES
+            ):
+                self.report_cycles()
+            self.inconsistent_entities = dict(self.base.inconsistent_entities)
+            self.report_inconsistent_entities(affected_ids)
+
+        if self.store.closure:
+            with profiler.phase("closure"):
+                engine = InferenceEngine()
+                for edge_type, head_id in dict.fromkeys(
+                    (edge_type, head_id) for edge_type, head_id, _ in added_edges
+                ):
+                    engine.update_transitive_relationships(
+                        self.store, edge_type, head_id
+                    )
+
+        self.logger.info(
+            "Loaded %d edges and %d entities from %s over a base of %d entities",
+            len(added_edges),
+            len(self.store.names),
+            file_path,
+            self.store.base_size,
+        )
+
+    def _check_writable(self) -> None:
+        if self.is_base:
+            raise ReadOnlyOntologyException(
+                "Can not change an ontology that overlays are layered on"
+            )
+
+    def _get_answer(
+        self,
+        edge_type: EdgeType,
+        query_entity_name: str,
+        target_entity_name: str,
+        answer: Callable[[str, str], QuestionResult],
+    ) -> QuestionResult:
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+            metrics.begin(edge_type.name)
+
+        key = (edge_type, query_entity_name, target_entity_name)
+        result = self.answer_cache.get(key)
+
+        if metrics is not None:
+            metrics.count(
+                ANSWER_CACHE_HITS if result is not None else ANSWER_CACHE_MISSES
+            )
+
+        if result is None:
+            result = answer(query_entity_name, target_entity_name)
+            self.answer_cache.put(key, result)
+
+        if metrics is not None:
+            metrics.record_latency(edge_type.name, time.perf_counter() - start)
+
+        return result
+
+    def _iter_descendants(
+        self,
+        entity_names: List[str],
+        edge_types: Iterable[EdgeType],
+        limit: Optional[int],
+        offset: int,
+        include_start: bool,
+    ) -> Iterator[str]:
+        start_ids = [
+            entity_id
+            for entity_id in map(self.store.get_id, entity_names)
+            if entity_id is not None
+        ]
+        descendant_ids = self.store.iter_reachable_ids(
+            start_ids, [self._get_edge_type(edge_type) for edge_type in edge_types]
+        )
+        if not include_start:
+            descendant_ids = islice(descendant_ids, len(start_ids), None)
+
+        stop = None if limit is None else offset + limit
+        for descendant_id in islice(descendant_ids, offset, stop):
+            yield self.store.get_name(descendant_id)
+
+    def _get_edge_type(self, edge_type: Union[EdgeType, str]) -> EdgeType:
+        try:
+            return EdgeType.from_string(edge_type)
+        except ValueError:
+            raise InvalidEdgeTypeException(f"Unknown edge type {edge_type}")
+
+    def _get_answer_method(
+        self, edge_type: EdgeType
+    ) -> Callable[[str, str], QuestionResult]:
+        if edge_type == EdgeType.INSTANCE_OF:
+            return self._is_instance_of
+        if edge_type == EdgeType.SUBCLASS_OF:
+            return self._is_subclass_of
+        if edge_type == EdgeType.HAS_ATTRIBUTE:
+            return self._has_attribute
+
+        raise InvalidEdgeTypeException(f"Can not answer questions about {edge_type}")
+
+    def _answer_from_target(
+        self,
+        edge_type: EdgeType,
+        query_entity_names: List[str],
+        target_entity_name: str,
+    ) -> Optional[List[QuestionResult]]:
+        """
+        Answer the queries from a walk down from the target, or None if the walk gave up, see `get_answers`.
+        """
+        target_id = self.store.get_id(target_entity_name)
+        query_ids = [self.store.get_id(name) for name in query_entity_names]
+
+        if target_id is None:
+            return [QuestionResult.DONT_KNOW] * len(query_ids)
+
+        if edge_type == EdgeType.HAS_ATTRIBUTE:
+            start_ids = self.store.neighbours(target_id, EdgeType.ATTRIBUTE_OF)
+            descendant_edge_types = DESCENDANT_EDGE_TYPES
+        elif edge_type == EdgeType.SUBCLASS_OF:
+            start_ids = [target_id]
+            descendant_edge_types = (EdgeType.SUPERCLASS_OF,)
+        else:
+            start_ids = [target_id]
+            descendant_edge_types = DESCENDANT_EDGE_TYPES
+
+        found_ids = self.store.find_reachable_ids(
+            start_ids,
+            descendant_edge_types,
+            [query_id for query_id in query_ids if query_id is not None],
+            len(query_ids) * self.TARGET_WALK_NODES_PER_QUERY,
+        )
+        if found_ids is None:
+            return None
+
+        target_superclass_ids = None
+        results = []
+        for query_id in query_ids:
+            if query_id is None:
+                results.append(QuestionResult.DONT_KNOW)
+            elif query_id in found_ids:
+                results.append(QuestionResult.YES)
+            elif edge_type == EdgeType.INSTANCE_OF:
+                if target_superclass_ids is None:
+                    target_superclass_ids = self.traversal.get_ancestor_ids(
+                        target_id, SUBCLASS_EDGE_TYPES
+                    )
+                results.append(
+                    self._check_mutually_exclusive(query_id, target_superclass_ids)
+                )
+            else:
+                results.append(QuestionResult.DONT_KNOW)
+
+        return results
+
+    def _apply_edge_change(
+        self,
+        edge_type: EdgeType,
+        head_id: int,
+        tail_id: int,
+        created_ids: Iterable[int] = (),
+    ) -> None:
+        if self.metrics is not None:
+            self.metrics.begin(EDGE_CHANGE)
+
+        InferenceEngine().update_transitive_relationships(
+            self.store, edge_type, head_id
+        )
+        self.bulk_evaluator = None
+
+        if edge_type == EdgeType.HAS_ATTRIBUTE:
+            # Ancestors, disjointness and the reachability indexes do not follow HasAttribute edges, so only whether
+            # entities have this attribute can have changed, and answers naming an entity created by this change
+            evicted = self.answer_cache.evict_targets(
+                EdgeType.HAS_ATTRIBUTE, self.store.get_name(tail_id)
+            ) + self.answer_cache.evict_entities(
+                self.store.get_name(node_id) for node_id in created_ids
+            )
+            self.logger.debug("Attribute change evicted %d cached answers", evicted)
+            return
+
+        affected_ids = self.store.get_reachable_ids(head_id, DESCENDANT_EDGE_TYPES)
+        self.traversal.evict(affected_ids)
+        if edge_type not in ATTRIBUTE_EDGE_TYPES:
+            self.disjointness.update(affected_ids)
+
+        if self.ancestor_index is not None:
+            self.logger.info(
+                "Dropping reachability indexes after an edge change, "
+                "call build_reachability_indexes to rebuild them"
+            )
+            self.subclass_index = self.ancestor_index = None
+
+        # Only entities below the changed edge can have different answers as the query, or (through their
+        # superclasses) as the target. The tail is included because it may have been created by this change.
+        affected_ids.add(tail_id)
+        evicted = self.answer_cache.evict_entities(
+            self.store.get_name(node_id) for node_id in affected_ids
+        )
+        self.logger.debug(
+            "Edge change affected %d entities, evicted %d cached answers",
+            len(affected_ids),
+            evicted,
+        )
+
+    def _is_instance_of(
+        self, query_entity_name: str, target_entity_name: str
+    ) -> QuestionResult:
+        query_id = self.store.get_id(query_entity_name)
+        target_id = self.store.get_id(target_entity_name)
 
-        if query_entity is None or target_entity is None:
+        if query_id is None or target_id is None:
             return QuestionResult.DONT_KNOW
 
-        if query_entity == target_entity:
+        if query_id == target_id:
             return QuestionResult.YES
 
-        return self._check_instance_and_subclass(query_entity, target_entity)
+        return self._check_instance_and_subclass(query_id, target_id)
 
-    @lru_cache(maxsize=None)
-    def is_subclass_of(
+    def _is_subclass_of(
         self, query_entity_name: str, target_entity_name: str
     ) -> QuestionResult:
-        query_entity = self.get_entity(query_entity_name)
-        target_entity = self.get_entity(target_entity_name)
+        query_id = self.store.get_id(query_entity_name)
+        target_id = self.store.get_id(target_entity_name)
 
-        if query_entity is None or target_entity is None:
+        if query_id is None or target_id is None:
             return QuestionResult.DONT_KNOW
 
-        if query_entity == target_entity:
+        if query_id == target_id:
             return QuestionResult.YES
 
-        return self._check_subclass(query_entity, target_entity)
+        return self._check_subclass(query_id, target_id)
 
-    @lru_cache(maxsize=None)
-    def has_attribute(
+    def _has_attribute(
         self, query_entity_name: str, target_attribute_name: str
     ) -> QuestionResult:
-        query_entity = self.get_entity(query_entity_name)
-        target_attribute = self.get_entity(target_attribute_name)
+        query_id = self.store.get_id(query_entity_name)
+        attribute_id = self.store.get_id(target_attribute_name)
 
-        if query_entity is None or target_attribute is None:
+        if query_id is None or attribute_id is None:
             return QuestionResult.DONT_KNOW
 
-        return self._check_has_attribute(query_entity, target_attribute)
+        return self._check_has_attribute(query_id, attribute_id)
 
-    # ---------------------------------------------------------------------------- #
-    #                                    PRIVATE                                   #
-    # ---------------------------------------------------------------------------- #
-    def _check_has_attribute(
-        self, query_entity: Entity, target_attribute: Entity
-    ) -> QuestionResult:
-        stack = [query_entity]
-
-        while stack:
-            current_entity = stack.pop()
-            for relationship in current_entity.get_relationships():
-                if (
-                    relationship.is_has_attribute()
-                    and relationship.tail_entity == target_attribute
-                ):
-                    return QuestionResult.YES
+    def _check_has_attribute(self, query_id: int, attribute_id: int) -> QuestionResult:
+        if self.store.closure:
+            if self.store.closure[EdgeType.HAS_ATTRIBUTE].has_edge(
+                query_id, attribute_id
+            ):
+                return QuestionResult.YES
+            return QuestionResult.DONT_KNOW
 
-                if relationship.is_instance_of() or relationship.is_subclass_of():
-                    stack.append(relationship.tail_entity)
+        holder_ids = self.store.neighbours(attribute_id, EdgeType.ATTRIBUTE_OF)
+
+        if self.ancestor_index is not None:
+            if any(self.ancestor_index.reaches(query_id, h) for h in holder_ids):
+                return QuestionResult.YES
+            return QuestionResult.DONT_KNOW
+
+        ancestor_ids = self.traversal.get_ancestor_ids(query_id, ANCESTOR_EDGE_TYPES)
+        if any(holder_id in ancestor_ids for holder_id in holder_ids):
+            return QuestionResult.YES
 
         return QuestionResult.DONT_KNOW
 
-    def _check_subclass(
-        self, query_entity: Entity, target_entity: Entity
-    ) -> QuestionResult:
-        stack = [query_entity]
-
-        while stack:
-            current_entity = stack.pop()
-            for relationship in current_entity.get_relationships():
-                if (
-                    relationship.is_subclass_of()
-                    and relationship.tail_entity == target_entity
-                ):
-                    return QuestionResult.YES
-                if relationship.is_subclass_of():
-                    stack.append(relationship.tail_entity)
+    def _check_subclass(self, query_id: int, target_id: int) -> QuestionResult:
+        if self.store.closure:
+            if self.store.closure[EdgeType.SUBCLASS_OF].has_edge(query_id, target_id):
+                return QuestionResult.YES
+            return QuestionResult.DONT_KNOW
+
+        if self.subclass_index is not None:
+            if self.subclass_index.reaches(query_id, target_id):
+                return QuestionResult.YES
+            return QuestionResult.DONT_KNOW
+
+        if target_id in self.traversal.get_ancestor_ids(query_id, SUBCLASS_EDGE_TYPES):
+            return QuestionResult.YES
 
         return QuestionResult.DONT_KNOW
 
     def _check_instance_and_subclass(
-        self, query_entity: Entity, target_entity: Entity
+        self, query_id: int, target_id: int
     ) -> QuestionResult:
-        stack = [query_entity]
-
-        while stack:
-            current_entity = stack.pop()
-            for relationship in current_entity.get_relationships():
-                if relationship.is_mutually_exclusive_with():
-                    if relationship.tail_entity == target_entity:
-                        return QuestionResult.NO
-
-                    if (
-                        self.is_subclass_of(
-                            target_entity.name, relationship.tail_entity.name
-                        )
-                        == QuestionResult.YES
-                    ):
-                        return QuestionResult.NO
-
-                if relationship.is_instance_of() or relationship.is_subclass_of():
-                    if relationship.tail_entity == target_entity:
-                        return QuestionResult.YES
-                    stack.append(relationship.tail_entity)
+        """
+        YES if the target is an ancestor of the query entity, otherwise NO if an ancestor of the query entity
+        (itself included) is mutually exclusive with the target or one of its superclasses.
+        """
+        if self.store.closure:
+            ancestors = self.store.closure[EdgeType.INSTANCE_OF]
+            if ancestors.has_edge(query_id, target_id):
+                return QuestionResult.YES
+
+            return self._check_mutually_exclusive(
+                query_id,
+                self.store.closure[EdgeType.SUBCLASS_OF].neighbours(target_id)
+                + [target_id],
+            )
+
+        if self.ancestor_index is not None:
+            return self._check_instance_and_subclass_indexed(query_id, target_id)
+
+        ancestor_ids = self.traversal.get_ancestor_ids(query_id, ANCESTOR_EDGE_TYPES)
+        if target_id in ancestor_ids:
+            return QuestionResult.YES
+
+        return self._check_mutually_exclusive(
+            query_id, self.traversal.get_ancestor_ids(target_id, SUBCLASS_EDGE_TYPES)
+        )
+
+    def _check_instance_and_subclass_indexed(
+        self, query_id: int, target_id: int
+    ) -> QuestionResult:
+        if self.ancestor_index.reaches(query_id, target_id):
+            return QuestionResult.YES
+
+        for excluded_id in self.disjointness.get_disjoint_ids(query_id):
+            if self.subclass_index.reaches(target_id, excluded_id):
+                return QuestionResult.NO
+
+        return QuestionResult.DONT_KNOW
+
+    def _check_mutually_exclusive(
+        self, query_id: int, target_superclass_ids: Iterable[int]
+    ) -> QuestionResult:
+        if self.metrics is not None:
+            self.metrics.count(MUTUAL_EXCLUSION_CHECKS)
+
+        if self.disjointness.is_disjoint(query_id, target_superclass_ids):
+            return QuestionResult.NO
 
         return QuestionResult.DONT_KNOW
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 # Enable forward declarations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Tuple
 
 from ontology.domain.edge_type import EdgeType
 from ontology.exceptions.ontology_exceptions import InvalidEdgeTypeException
@@ -40,6 +40,21 @@ class Relationship:
 
         return base_string
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Relationship):
+            return NotImplemented
+
+        return self.get_key() == other.get_key()
+
+    def __hash__(self) -> int:
+        return hash(self.get_key())
+
+    def get_key(self) -> Tuple[Entity, Entity, EdgeType]:
+        """
+        The identity of this relationship. Whether it was inferred is not part of it.
+        """
+        return self.head_entity, self.tail_entity, self.edge_type
+
     def get_edge_type(self, edge_type: str) -> EdgeType:
         try:
             edge_type_obj = EdgeType.from_string(edge_type)
@@ -48,33 +63,6 @@ class Relationship:
 
         return edge_type_obj
 
-    def get_inverse(self) -> Relationship | None:
-        """
-        Get the inverse relationship of this relationship.
-        """
-        if self.is_instance_of():
-            return Relationship(
-                self.tail_entity,
-                self.head_entity,
-                EdgeType.HAS_INSTANCE,
-            )
-        elif self.is_subclass_of():
-            return Relationship(
-                self.tail_entity,
-                self.head_entity,
-                EdgeType.SUPERCLASS_OF,
-            )
-        elif self.is_has_attribute():
-            return Relationship(
-                self.tail_entity,
-                self.head_entity,
-                EdgeType.ATTRIBUTE_OF,
-            )
-        elif self.is_mutually_exclusive_with():
-            return
-        else:
-            raise InvalidEdgeTypeException(f"Unknown edge type {self.edge_type}")
-
     def set_is_inferred(self, is_inferred: bool) -> None:
         self.is_inferred = is_inferred
 
@@ -5,3 +5,19 @@ class OntologyException(Exception):
 
 class InvalidEdgeTypeException(OntologyException):
     pass
+
+
+class UnknownReachabilityIndexException(OntologyException):
+    pass
+
+
+class UnknownEvictionPolicyException(OntologyException):
+    pass
+
+
+class InvalidSnapshotException(OntologyException):
+    pass
+
+
+class ReadOnlyOntologyException(OntologyException):
+    pass
@@ -1,8 +1,23 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from logger import getLogger
+from ontology.answer_cache import AnswerCache, AnswerCacheStats
+from ontology.domain.edge_type import EdgeType
 from ontology.domain.ontology import Ontology
+from ontology.load_profile import LoadProfile
+from ontology.loader import EDGE_TYPES
+from ontology.query_metrics import QueryMetrics
+from ontology.snapshot import is_snapshot
 from question import Question, QuestionType
 from question_result import QuestionResult
 
@@ -17,17 +32,222 @@ class OntologyFacade:
         - If I chose to change the implementation of the ontology, no external calls to the facade would need to change since they are implemnentation agnostic
     """
 
-    def __init__(self, file_path: Path):
-        self.ontology = self.create_ontology(file_path)
-        self.PROCESSING_METHODS_MAP = {
-            QuestionType.INSTANCE_OF: self.ontology.is_instance_of,
-            QuestionType.SUBCLASS_OF: self.ontology.is_subclass_of,
-            QuestionType.HAS_ATTRIBUTE: self.ontology.has_attribute,
+    DEFAULT_WATCH_INTERVAL_SECONDS = 1.0
+
+    def __init__(
+        self,
+        file_path: Path,
+        reachability_index: Optional[str] = None,
+        materialize_closure: bool = False,
+        answer_cache: Optional[AnswerCache] = None,
+        metrics: Optional[QueryMetrics] = None,
+        profile_memory: bool = False,
+        base: Optional[Ontology] = None,
+        load_workers: int = 1,
+    ):
+        """
+        The options are kept, so that `reload` builds the next ontology the same way.
+        """
+        self.file_path = file_path
+        self.reachability_index = reachability_index
+        self.materialize_closure = materialize_closure
+        self.profile_memory = profile_memory
+        self.base = base
+        self.load_workers = load_workers
+        self.metrics = metrics
+        self._reload_lock = threading.Lock()
+        self._reloader: Optional[ThreadPoolExecutor] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        self.EDGE_TYPES_MAP = {
+            QuestionType.INSTANCE_OF: EdgeType.INSTANCE_OF,
+            QuestionType.SUBCLASS_OF: EdgeType.SUBCLASS_OF,
+            QuestionType.HAS_ATTRIBUTE: EdgeType.HAS_ATTRIBUTE,
         }
 
-    def create_ontology(self, file_path: Path):
+        ontology = self.create_ontology(
+            file_path,
+            reachability_index,
+            materialize_closure,
+            answer_cache,
+            profile_memory,
+            base,
+            load_workers,
+        )
+        if metrics is not None:
+            ontology.enable_metrics(metrics)
+        self._swap(ontology)
+
+    def create_ontology(
+        self,
+        file_path: Path,
+        reachability_index: Optional[str] = None,
+        materialize_closure: bool = False,
+        answer_cache: Optional[AnswerCache] = None,
+        profile_memory: bool = False,
+        base: Optional[Ontology] = None,
+        load_workers: int = 1,
+    ) -> Ontology:
+        """
+        With a `base`, the file is loaded as an overlay on it (see `Ontology.from_base`), and has the base's closure
+        whatever `materialize_closure` is.
+        """
+        if base is not None:
+            self.logger.info(f"Creating ontology overlay from file {file_path}")
+            return Ontology.from_base(
+                base, file_path, reachability_index, answer_cache, profile_memory
+            )
+
+        if is_snapshot(file_path):
+            self.logger.info(f"Loading ontology snapshot {file_path}")
+            return Ontology.from_snapshot(file_path, reachability_index, answer_cache)
+
         self.logger.info(f"Creating ontology from file {file_path}")
-        return Ontology(file_path)
+        return Ontology(
+            file_path,
+            reachability_index,
+            materialize_closure,
+            answer_cache,
+            profile_memory,
+            load_workers,
+        )
+
+    def reload(
+        self,
+        file_path: Optional[Path] = None,
+        warm_up: int = 0,
+        in_subprocess: bool = False,
+    ) -> Ontology:
+        """
+        Build a new ontology from `file_path` (by default the file the current one came from) with the options this
+        facade was created with, then swap it in and return it. Until the swap, questions are answered by the
+        current ontology, and questions in flight at the swap finish against it. Edge changes made to the current
+        ontology are not carried over. One reload runs at a time.
+
+        `warm_up` answers up to that many of the questions the current ontology cached most recently with the new
+        one before the swap, so that they are cache hits right after it.
+
+        `in_subprocess` parses and infers a CSV file in a separate process, which writes a snapshot for this one to
+        map, so that loading does not hold the GIL the questions need. Overlays are always built in this process.
+        """
+        with self._reload_lock:
+            start = time.perf_counter()
+            file_path = file_path if file_path is not None else self.file_path
+            ontology = self._build_ontology(file_path, in_subprocess)
+            warmed_up = self._warm_up(ontology, warm_up)
+            if self.metrics is not None:
+                ontology.enable_metrics(self.metrics)
+
+            self._swap(ontology)
+            self.file_path = file_path
+            self.logger.info(
+                "Reloaded ontology from %s in %.3fs, warmed up %d answers",
+                file_path,
+                time.perf_counter() - start,
+                warmed_up,
+            )
+
+        return ontology
+
+    def reload_in_background(
+        self,
+        file_path: Optional[Path] = None,
+        warm_up: int = 0,
+        in_subprocess: bool = False,
+    ) -> "Future[Ontology]":
+        """
+        `reload` on a background thread. The future holds the new ontology, or the error that kept it from being
+        swapped in, in which case the current ontology stays.
+        """
+        if self._reloader is None:
+            self._reloader = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="ontology-reload"
+            )
+
+        return self._reloader.submit(self.reload, file_path, warm_up, in_subprocess)
+
+    def watch(
+        self,
+        interval_seconds: float = DEFAULT_WATCH_INTERVAL_SECONDS,
+        warm_up: int = 0,
+        in_subprocess: bool = False,
+    ) -> None:
+        """
+        `reload` whenever the ontology file changes, until `stop_watching`. The file's modification time and size
+        are checked every `interval_seconds` on a daemon thread, and a change is only loaded once they have held
+        for a whole interval, so that a file still being written is not. A reload that fails is logged and the
+        current ontology kept.
+        """
+        if self._watcher is not None:
+            return
+
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(
+            target=self._watch,
+            args=(
+                self._get_file_signature(self.file_path),
+                interval_seconds,
+                warm_up,
+                in_subprocess,
+            ),
+            name="ontology-watcher",
+            daemon=True,
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        if self._watcher is None:
+            return
+
+        self._stop_watching.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def close(self) -> None:
+        """
+        Stop watching the ontology file, and wait for a background reload to finish.
+        """
+        self.stop_watching()
+        if self._reloader is not None:
+            self._reloader.shutdown()
+            self._reloader = None
+
+    def add_edge(
+        self, edge_type: str, head_entity_name: str, tail_entity_name: str
+    ) -> bool:
+        return self.ontology.add_edge(edge_type, head_entity_name, tail_entity_name)
+
+    def remove_edge(
+        self, edge_type: str, head_entity_name: str, tail_entity_name: str
+    ) -> bool:
+        return self.ontology.remove_edge(edge_type, head_entity_name, tail_entity_name)
+
+    def get_load_profile(self) -> LoadProfile:
+        """
+        How long each phase of creating the ontology took, and with `profile_memory` what it allocated.
+        """
+        return self.ontology.load_profile
+
+    def get_answer_cache_stats(self) -> AnswerCacheStats:
+        return self.ontology.answer_cache.get_stats()
+
+    def clear_answer_cache(self) -> None:
+        self.ontology.answer_cache.clear()
+
+    def enable_metrics(self, metrics: Optional[QueryMetrics] = None) -> QueryMetrics:
+        return self.ontology.enable_metrics(metrics)
+
+    def disable_metrics(self) -> None:
+        self.ontology.disable_metrics()
+
+    def get_metrics_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The counters and latency histograms recorded since metrics were enabled, or nothing if they are not.
+        """
+        if self.ontology.metrics is None:
+            return {}
+
+        return self.ontology.metrics.get_snapshot()
 
     def process_question(self, question: Question) -> QuestionResult:
         processing_method = self._get_processing_method(question)
@@ -38,6 +258,88 @@ class OntologyFacade:
 
         return processing_method(question.head, question.tail)
 
+    def process_questions(self, questions: List[Question]) -> List[QuestionResult]:
+        """
+        Answer many questions, in order. Questions of the same type about the same target are answered together.
+        """
+        # Read once, so that a reload in the meantime does not split the questions between two ontologies
+        ontology = self.ontology
+        results = [QuestionResult.DONT_KNOW] * len(questions)
+        groups: Dict[Tuple[QuestionType, str], List[int]] = {}
+        for position, question in enumerate(questions):
+            groups.setdefault((question.get_type(), question.tail), []).append(position)
+
+        for (question_type, target), positions in groups.items():
+            edge_type = self.EDGE_TYPES_MAP.get(question_type)
+            if edge_type is None:
+                self.logger.warning(f"No processing method found for {question_type}")
+                continue
+
+            answers = ontology.get_answers(
+                edge_type, [questions[position].head for position in positions], target
+            )
+            for position, answer in zip(positions, answers):
+                results[position] = answer
+
+        self.logger.debug(
+            "Answered %d questions in %d groups", len(questions), len(groups)
+        )
+
+        return results
+
+    def iter_instances(
+        self,
+        class_name: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        edge_types: Optional[Iterable[EdgeType]] = None,
+    ) -> Iterator[str]:
+        """
+        Every entity "is <entity> a <class_name>?" is answered YES for, lazily and in pages, see
+        `Ontology.iter_instances`.
+        """
+        return self.ontology.iter_instances(class_name, limit, offset, edge_types)
+
+    def iter_subclasses(
+        self,
+        class_name: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        edge_types: Optional[Iterable[EdgeType]] = None,
+    ) -> Iterator[str]:
+        return self.ontology.iter_subclasses(class_name, limit, offset, edge_types)
+
+    def iter_entities_with_attribute(
+        self,
+        attribute_name: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        edge_types: Optional[Iterable[EdgeType]] = None,
+    ) -> Iterator[str]:
+        return self.ontology.iter_entities_with_attribute(
+            attribute_name, limit, offset, edge_types
+        )
+
+    def evaluate_pairs(
+        self,
+        question_types: Sequence[QuestionType],
+        heads: Sequence[str],
+        tails: Sequence[str],
+    ) -> np.ndarray:
+        """
+        Answer parallel sequences of question types, heads and tails with array operations, for offline scoring.
+        Returns an int8 array of `QuestionResult` values.
+        """
+        edge_type_codes = np.fromiter(
+            (
+                EDGE_TYPES.index(self.EDGE_TYPES_MAP[question_type])
+                for question_type in question_types
+            ),
+            dtype=np.int8,
+        )
+
+        return self.ontology.evaluate_pairs(edge_type_codes, heads, tails)
+
     # ---------------------------------------------------------------------------- #
     #                                    PRIVATE                                   #
     # ---------------------------------------------------------------------------- #
@@ -45,3 +347,97 @@ class OntologyFacade:
         question_type = question.get_type()
 
         return self.PROCESSING_METHODS_MAP.get(question_type)
+
+    def _swap(self, ontology: Ontology) -> None:
+        processing_methods = {
+            QuestionType.INSTANCE_OF: ontology.is_instance_of,
+            QuestionType.SUBCLASS_OF: ontology.is_subclass_of,
+            QuestionType.HAS_ATTRIBUTE: ontology.has_attribute,
+        }
+        # Each is replaced by a single assignment and read once per question, so a question is answered wholly by
+        # one ontology or the other
+        self.ontology = ontology
+        self.PROCESSING_METHODS_MAP = processing_methods
+
+    def _build_ontology(self, file_path: Path, in_subprocess: bool) -> Ontology:
+        answer_cache = self.ontology.answer_cache.create_empty()
+        if not in_subprocess or self.base is not None or is_snapshot(file_path):
+            return self.create_ontology(
+                file_path,
+                self.reachability_index,
+                self.materialize_closure,
+                answer_cache,
+                self.profile_memory,
+                self.base,
+                self.load_workers,
+            )
+
+        snapshot_dir = Path(tempfile.mkdtemp(prefix="ontology-reload-"))
+        snapshot_path = snapshot_dir / "ontology.snapshot"
+        try:
+            with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+                executor.submit(
+                    _write_snapshot,
+                    file_path,
+                    self.materialize_closure,
+                    self.load_workers,
+                    snapshot_path,
+                ).result()
+
+            # The snapshot stays mapped once its file is removed
+            return Ontology.from_snapshot(
+                snapshot_path, self.reachability_index, answer_cache
+            )
+        finally:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+    def _warm_up(self, ontology: Ontology, limit: int) -> int:
+        keys = self.ontology.answer_cache.get_recent_keys(limit)
+        queries: Dict[Tuple[EdgeType, str], List[str]] = {}
+        for edge_type, query_entity_name, target_entity_name in keys:
+            queries.setdefault((edge_type, target_entity_name), []).append(
+                query_entity_name
+            )
+
+        for (edge_type, target_entity_name), query_entity_names in queries.items():
+            ontology.get_answers(edge_type, query_entity_names, target_entity_name)
+
+        return len(keys)
+
+    def _watch(
+        self,
+        loaded: Optional[Tuple[int, int]],
+        interval_seconds: float,
+        warm_up: int,
+        in_subprocess: bool,
+    ) -> None:
+        previous = loaded
+
+        while not self._stop_watching.wait(interval_seconds):
+            current = self._get_file_signature(self.file_path)
+            if current is not None and current != loaded and current == previous:
+                loaded = current
+                try:
+                    self.reload(warm_up=warm_up, in_subprocess=in_subprocess)
+                except Exception:
+                    self.logger.exception(
+                        "Reloading %s failed, keeping the current ontology",
+                        self.file_path,
+                    )
+            previous = current
+
+    def _get_file_signature(self, file_path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+
+def _write_snapshot(
+    file_path: Path, materialize_closure: bool, load_workers: int, snapshot_path: Path
+) -> None:
+    Ontology(
+        file_path, materialize_closure=materialize_closure, load_workers=load_workers
+    ).save_snapshot(snapshot_path)
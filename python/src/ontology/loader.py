@@ -0,0 +1,265 @@
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from logger import getLogger
+from ontology.domain.edge_type import EdgeType
+from ontology.exceptions.ontology_exceptions import InvalidEdgeTypeException
+
+EDGE_TYPES: List[EdgeType] = list(EdgeType)
+
+
+@dataclass
+class EdgeTable:
+    """
+    Column-oriented edges of an ontology file. Entity names are interned into `names` and edges refer to them by
+    position, edge types are positions in `EDGE_TYPES`.
+    """
+
+    names: List[str]
+    edge_types: np.ndarray
+    head_ids: np.ndarray
+    tail_ids: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.edge_types)
+
+    @classmethod
+    def merge(cls, edge_tables: Iterable["EdgeTable"]) -> "EdgeTable":
+        """
+        The edges of `edge_tables`, in order, with their names interned into one id space. Names get ids in order
+        of first appearance, as if the tables had been read as one file.
+        """
+        name_ids: Dict[str, int] = {}
+        edge_types, head_ids, tail_ids = [], [], []
+
+        for edge_table in edge_tables:
+            ids = np.fromiter(
+                (name_ids.setdefault(name, len(name_ids)) for name in edge_table.names),
+                dtype=np.int64,
+                count=len(edge_table.names),
+            )
+            edge_types.append(edge_table.edge_types)
+            head_ids.append(ids[edge_table.head_ids])
+            tail_ids.append(ids[edge_table.tail_ids])
+
+        return cls(
+            list(name_ids),
+            np.concatenate(edge_types) if edge_types else np.empty(0, np.int8),
+            np.concatenate(head_ids) if head_ids else np.empty(0, np.int64),
+            np.concatenate(tail_ids) if tail_ids else np.empty(0, np.int64),
+        )
+
+    def iter_edges(self) -> Iterator[Tuple[EdgeType, int, int]]:
+        edge_types = [EDGE_TYPES[code] for code in self.edge_types.tolist()]
+
+        return zip(edge_types, self.head_ids.tolist(), self.tail_ids.tolist())
+
+    def deduplicated(self) -> "EdgeTable":
+        """
+        Drop repeated (edge type, head, tail) rows, keeping the first occurrence of each edge in file order.
+        """
+        num_names = max(len(self.names), 1)
+        keys = (
+            self.edge_types.astype(np.int64) * num_names + self.head_ids
+        ) * num_names + self.tail_ids
+        _, first_indices = np.unique(keys, return_index=True)
+        first_indices.sort()
+
+        return EdgeTable(
+            self.names,
+            self.edge_types[first_indices],
+            self.head_ids[first_indices],
+            self.tail_ids[first_indices],
+        )
+
+
+@dataclass(frozen=True)
+class CsvPartition:
+    """
+    The rows of a CSV file that start in the byte range [`start`, `end`), to be parsed with the file's `header`
+    line.
+    """
+
+    file_path: Path
+    header: bytes
+    start: int
+    end: int
+
+
+class CsvLoader:
+    """
+    Bulk loader for ontology CSV files.
+
+    The file is parsed in chunks and every chunk is handled column-wise: entity names are interned with a single
+    factorize per chunk, so Python-level work is proportional to the number of distinct names rather than rows.
+
+    With more than one of `workers`, or given a directory of shard CSV files (each with a header), the files are
+    split into byte ranges of about `partition_bytes` on line boundaries, and a process pool parses the ranges and
+    interns their names. The partial edge tables are then merged into one id space, holding the same edges and names
+    as reading the files one after another (though the ids may be numbered differently). Quoted names spanning
+    lines are not supported when partitioning.
+    """
+
+    logger = getLogger(__name__)
+    COLUMNS = ["EDGE_TYPE", "HEAD_ENTITY", "TAIL_ENTITY"]
+    DEFAULT_CHUNK_SIZE = 1_000_000
+    DEFAULT_PARTITION_BYTES = 64 * 2**20
+
+    chunk_size: int
+    workers: int
+    partition_bytes: int
+
+    def __init__(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        workers: int = 1,
+        partition_bytes: int = DEFAULT_PARTITION_BYTES,
+    ):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.partition_bytes = partition_bytes
+
+    def load(self, file_path: Union[Path, BinaryIO]) -> EdgeTable:
+        """
+        Load a CSV file, or every *.csv file in a directory in name order. File objects are read sequentially.
+        """
+        start = time.perf_counter()
+        is_path = isinstance(file_path, (str, Path))
+        if is_path and (self.workers > 1 or Path(file_path).is_dir()):
+            edge_table = self._load_partitions(self.get_partitions(Path(file_path)))
+        else:
+            edge_table = self._parse(file_path)
+        num_rows = len(edge_table)
+        edge_table = edge_table.deduplicated()
+
+        elapsed = time.perf_counter() - start
+        self.logger.info(
+            "Loaded %d rows (%d unique edges, %d entities) from %s in %.3fs (%.0f rows/sec)",
+            num_rows,
+            len(edge_table),
+            len(edge_table.names),
+            file_path,
+            elapsed,
+            num_rows / elapsed if elapsed else 0.0,
+        )
+
+        return edge_table
+
+    def get_partitions(self, path: Path) -> List[CsvPartition]:
+        """
+        Split the CSV file `path`, or every *.csv file in the directory `path`, into byte ranges of about
+        `partition_bytes`.
+        """
+        file_paths = sorted(path.glob("*.csv")) if path.is_dir() else [path]
+        partitions = []
+
+        for file_path in file_paths:
+            with open(file_path, "rb") as file:
+                header = file.readline()
+            data_start = len(header)
+            data_bytes = file_path.stat().st_size - data_start
+            num_partitions = max(-(-data_bytes // self.partition_bytes), 1)
+            bounds = np.linspace(
+                data_start, data_start + data_bytes, num_partitions + 1
+            )
+            bounds = bounds.astype(np.int64).tolist()
+
+            partitions.extend(
+                CsvPartition(file_path, header, start, end)
+                for start, end in zip(bounds, bounds[1:])
+                if start < end
+            )
+
+        return partitions
+
+    def parse_partition(self, partition: CsvPartition) -> EdgeTable:
+        """
+        Parse the rows starting in the partition's byte range, interning their names into ids of their own.
+        """
+        with open(partition.file_path, "rb") as file:
+            file.seek(partition.start - 1)
+            # A row cut by the start of the range belongs to the previous range
+            if file.read(1) != b"\n":
+                file.readline()
+
+            position = file.tell()
+            data = file.read(max(partition.end - position, 0))
+            if data and not data.endswith(b"\n"):
+                data += file.readline()
+
+        return self._parse(io.BytesIO(partition.header + data))
+
+    # ---------------------------------------------------------------------------- #
+    #                                    PRIVATE                                   #
+    # ---------------------------------------------------------------------------- #
+    def _parse(self, source: Union[Path, BinaryIO]) -> EdgeTable:
+        name_ids: Dict[str, int] = {}
+        edge_types, head_ids, tail_ids = [], [], []
+
+        for chunk in pd.read_csv(
+            source,
+            usecols=self.COLUMNS,
+            dtype=str,
+            na_filter=False,
+            chunksize=self.chunk_size,
+        ):
+            names = np.concatenate(
+                [
+                    chunk["HEAD_ENTITY"].to_numpy(dtype=object),
+                    chunk["TAIL_ENTITY"].to_numpy(dtype=object),
+                ]
+            )
+            ids = self._intern(names, name_ids)
+
+            edge_types.append(self._encode_edge_types(chunk["EDGE_TYPE"]))
+            head_ids.append(ids[: len(chunk)])
+            tail_ids.append(ids[len(chunk) :])
+
+        return EdgeTable(
+            list(name_ids),
+            np.concatenate(edge_types) if edge_types else np.empty(0, np.int8),
+            np.concatenate(head_ids) if head_ids else np.empty(0, np.int64),
+            np.concatenate(tail_ids) if tail_ids else np.empty(0, np.int64),
+        )
+
+    def _load_partitions(self, partitions: List[CsvPartition]) -> EdgeTable:
+        workers = min(self.workers, len(partitions))
+        if workers <= 1:
+            return EdgeTable.merge(map(self.parse_partition, partitions))
+
+        # Forked workers would inherit the parent's threads and locks, e.g. those of a server reloading its ontology
+        with ProcessPoolExecutor(workers, mp_context=get_context("spawn")) as executor:
+            return EdgeTable.merge(executor.map(self.parse_partition, partitions))
+
+    def _intern(self, names: np.ndarray, name_ids: Dict[str, int]) -> np.ndarray:
+        codes, uniques = pd.factorize(names)
+        unique_ids = np.fromiter(
+            (name_ids.setdefault(name, len(name_ids)) for name in uniques),
+            dtype=np.int64,
+            count=len(uniques),
+        )
+
+        return unique_ids[codes]
+
+    def _encode_edge_types(self, column: pd.Series) -> np.ndarray:
+        codes, uniques = pd.factorize(column)
+        unique_codes = np.array(
+            [EDGE_TYPES.index(self._get_edge_type(value)) for value in uniques],
+            dtype=np.int8,
+        )
+
+        return unique_codes[codes]
+
+    def _get_edge_type(self, edge_type: str) -> EdgeType:
+        try:
+            return EdgeType.from_string(edge_type)
+        except ValueError:
+            raise InvalidEdgeTypeException(f"Unknown edge type {edge_type}")
@@ -0,0 +1,149 @@
+import json
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, DefaultDict, Dict, List, Sequence
+
+QUESTIONS = "questions"
+ANSWER_CACHE_HITS = "answer_cache_hits"
+ANSWER_CACHE_MISSES = "answer_cache_misses"
+NODES_VISITED = "nodes_visited"
+EDGES_SCANNED = "edges_scanned"
+MUTUAL_EXCLUSION_CHECKS = "mutual_exclusion_checks"
+# The question type of questions that could not be parsed
+INVALID = "INVALID"
+# What the walks made to update the ontology after an edge change are counted under
+EDGE_CHANGE = "EDGE_CHANGE"
+
+# Upper bounds of the latency histogram buckets, in microseconds. A last bucket holds anything slower.
+LATENCY_BUCKET_BOUNDS_US = (
+    1,
+    2,
+    5,
+    10,
+    20,
+    50,
+    100,
+    200,
+    500,
+    1_000,
+    2_000,
+    5_000,
+    10_000,
+    100_000,
+    1_000_000,
+)
+
+
+class LatencyHistogram:
+    """
+    Counts of latencies in fixed, roughly logarithmic buckets, so that any number of them takes constant memory.
+    """
+
+    bounds: Sequence[float]
+    counts: List[int]
+    total_seconds: float
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKET_BOUNDS_US):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total_seconds = 0.0
+
+    def record(self, seconds: float, count: int = 1) -> None:
+        """
+        Record `count` latencies of `seconds` each.
+        """
+        self.counts[bisect_left(self.bounds, seconds * 1_000_000)] += count
+        self.total_seconds += seconds * count
+
+    def to_dict(self) -> Dict[str, Any]:
+        count = sum(self.counts)
+
+        return {
+            "count": count,
+            "mean_us": self.total_seconds * 1_000_000 / count if count else 0.0,
+            "buckets": {
+                **{
+                    f"le_{bound}us": bucket_count
+                    for bound, bucket_count in zip(self.bounds, self.counts)
+                },
+                "inf": self.counts[-1],
+            },
+        }
+
+
+class QueryMetrics:
+    """
+    Counters and latency histograms of the questions an `Ontology` answers, per question type ("INSTANCE_OF",
+    "SUBCLASS_OF", "HAS_ATTRIBUTE"):
+
+    - questions: how many were asked
+    - answer_cache_hits, answer_cache_misses: how many were answered from the answer cache, and how many were not
+    - nodes_visited, edges_scanned: neighbour lookups made walking the graph (one per node per edge type walked),
+      and the edges those lookups returned
+    - mutual_exclusion_checks: how many were checked against the mutually exclusive classes of the target
+
+    Questions that could not be parsed are counted under "INVALID", and the walks made after an edge change under
+    "EDGE_CHANGE".
+
+    Nothing is recorded unless the metrics are enabled with `Ontology.enable_metrics`, and a disabled ontology does
+    no more than check that it has no metrics once per question.
+    """
+
+    counters: DefaultDict[str, Counter]
+    histograms: DefaultDict[str, LatencyHistogram]
+    current: Counter
+
+    def __init__(self):
+        self.reset()
+
+    def begin(self, question_type: str) -> None:
+        """
+        Attribute what is counted from now on to `question_type`.
+        """
+        self.current = self.counters[question_type]
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.current[name] += amount
+
+    def observe_neighbours(self, num_neighbours: int) -> None:
+        current = self.current
+        current[NODES_VISITED] += 1
+        current[EDGES_SCANNED] += num_neighbours
+
+    def record_latency(
+        self, question_type: str, seconds: float, questions: int = 1
+    ) -> None:
+        """
+        Record that `questions` questions of `question_type` took `seconds` in all.
+        """
+        self.counters[question_type][QUESTIONS] += questions
+        self.histograms[question_type].record(seconds / questions, questions)
+
+    def record_invalid(self, questions: int = 1) -> None:
+        self.counters[INVALID][QUESTIONS] += questions
+
+    def get_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Every counter and histogram so far, by question type, as plain JSON-serialisable values.
+        """
+        return {
+            question_type: {
+                **counters,
+                **(
+                    {"latency": self.histograms[question_type].to_dict()}
+                    if question_type in self.histograms
+                    else {}
+                ),
+            }
+            for question_type, counters in sorted(self.counters.items())
+        }
+
+    def dump(self, file_path: Path) -> None:
+        with open(file_path, "w") as file:
+            json.dump(self.get_snapshot(), file, indent=2)
+
+    def reset(self) -> None:
+        self.counters = defaultdict(Counter)
+        self.histograms = defaultdict(LatencyHistogram)
+        self.current = Counter()
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple, Type
+
+import numpy as np
+
+from logger import getLogger
+from ontology.domain.graph_store import CsrAdjacency
+from ontology.exceptions.ontology_exceptions import UnknownReachabilityIndexException
+
+
+class ReachabilityIndex(ABC):
+    """
+    Precomputed answers to "can `target` be reached from `source`?" over a fixed adjacency.
+
+    Strongly connected components are collapsed first, so the labelling schemes only ever see a DAG and cycles in
+    the input are harmless. Every node reaches itself. Nodes added to the graph after the index was built, which
+    edges it does not follow (e.g. HasAttribute) may create, reach nothing else and are reached by nothing else.
+    """
+
+    logger = getLogger(__name__)
+    component: np.ndarray
+    build_seconds: float
+
+    def __init__(self, adjacency: CsrAdjacency):
+        start = time.perf_counter()
+
+        self.component, num_components = adjacency.strongly_connected_components()
+        condensed_head_ids = self.component[adjacency.head_ids()]
+        condensed_tail_ids = self.component[adjacency.targets]
+        between_components = condensed_head_ids != condensed_tail_ids
+        self._build(
+            CsrAdjacency.from_edges(
+                condensed_head_ids[between_components],
+                condensed_tail_ids[between_components],
+                num_components,
+            )
+        )
+
+        self.build_seconds = time.perf_counter() - start
+        self.logger.info(
+            "Built %s over %d nodes (%d components) in %.3fs using %d bytes",
+            type(self).__name__,
+            adjacency.num_nodes,
+            num_components,
+            self.build_seconds,
+            self.nbytes,
+        )
+
+    @classmethod
+    def create(cls, name: str, adjacency: CsrAdjacency) -> ReachabilityIndex:
+        if name not in REACHABILITY_INDEXES:
+            raise UnknownReachabilityIndexException(
+                f"Unknown reachability index {name}, expected one of {sorted(REACHABILITY_INDEXES)}"
+            )
+
+        return REACHABILITY_INDEXES[name](adjacency)
+
+    def reaches(self, source_id: int, target_id: int) -> bool:
+        if source_id == target_id:
+            return True
+        num_nodes = len(self.component)
+        if source_id >= num_nodes or target_id >= num_nodes:
+            return False
+
+        return self._components_reach(
+            int(self.component[source_id]), int(self.component[target_id])
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.component.nbytes + self._nbytes()
+
+    # ---------------------------------------------------------------------------- #
+    #                                    PRIVATE                                   #
+    # ---------------------------------------------------------------------------- #
+    @abstractmethod
+    def _build(self, condensation: CsrAdjacency) -> None:
+        pass
+
+    @abstractmethod
+    def _components_reach(self, source: int, target: int) -> bool:
+        pass
+
+    @abstractmethod
+    def _nbytes(self) -> int:
+        pass
+
+
+class IntervalReachabilityIndex(ReachabilityIndex):
+    """
+    Interval labelling (Agrawal, Borgida & Jagadish). Components are numbered in post-order of a DFS running
+    against the edges, and each component stores the merged intervals covering the numbers of everything that
+    reaches it. A tree-shaped hierarchy needs a single interval per node; multiple inheritance adds intervals only
+    where it occurs. Queries are a binary search over the target's intervals.
+    """
+
+    def _build(self, condensation: CsrAdjacency) -> None:
+        reverse = condensation.transpose()
+        offsets = reverse.offsets.tolist()
+        targets = reverse.targets.tolist()
+        num_components = condensation.num_nodes
+
+        post_order = self._post_order(condensation, offsets, targets)
+        self.post = np.empty(num_components, dtype=np.int64)
+        self.post[post_order] = np.arange(num_components)
+
+        intervals: List[List[Tuple[int, int]]] = [[] for _ in range(num_components)]
+        for number, component in enumerate(post_order):
+            covered = [(number, number)]
+            for child in targets[offsets[component] : offsets[component + 1]]:
+                covered.extend(intervals[child])
+            intervals[component] = self._merge(covered)
+
+        lengths = np.fromiter((len(row) for row in intervals), np.int64, num_components)
+        self.interval_offsets = np.zeros(num_components + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.interval_offsets[1:])
+        flat = np.array(
+            [interval for row in intervals for interval in row], dtype=np.int64
+        ).reshape(-1, 2)
+        self.interval_starts = flat[:, 0].copy()
+        self.interval_ends = flat[:, 1].copy()
+
+    def _post_order(
+        self, condensation: CsrAdjacency, offsets: List[int], targets: List[int]
+    ) -> List[int]:
+        roots = np.flatnonzero(np.diff(condensation.offsets) == 0).tolist()
+        visited = [False] * condensation.num_nodes
+        post_order = []
+
+        for root in roots:
+            visited[root] = True
+            work = [(root, offsets[root])]
+            while work:
+                node, edge = work[-1]
+                if edge < offsets[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    child = targets[edge]
+                    if not visited[child]:
+                        visited[child] = True
+                        work.append((child, offsets[child]))
+                else:
+                    work.pop()
+                    post_order.append(node)
+
+        return post_order
+
+    def _merge(self, intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        intervals.sort()
+        merged = [intervals[0]]
+        for start, end in intervals[1:]:
+            last_start, last_end = merged[-1]
+            if start <= last_end + 1:
+                merged[-1] = (last_start, max(last_end, end))
+            else:
+                merged.append((start, end))
+
+        return merged
+
+    def _components_reach(self, source: int, target: int) -> bool:
+        number = self.post[source]
+        start, end = self.interval_offsets[target], self.interval_offsets[target + 1]
+        position = (
+            start
+            + np.searchsorted(self.interval_starts[start:end], number, side="right")
+            - 1
+        )
+
+        return bool(position >= start and self.interval_ends[position] >= number)
+
+    def _nbytes(self) -> int:
+        return (
+            self.post.nbytes
+            + self.interval_offsets.nbytes
+            + self.interval_starts.nbytes
+            + self.interval_ends.nbytes
+        )
+
+
+class BitsetReachabilityIndex(ReachabilityIndex):
+    """
+    Full transitive closure held as one bitset per component, with a bit for every component that the component
+    reaches. Only components that something else reaches (i.e. classes rather than leaf instances) are given a bit
+    position, so the bitsets are as wide as the number of classes. Queries are a single bit test. Memory grows with
+    components x classes, so this suits small and medium ontologies.
+    """
+
+    def _build(self, condensation: CsrAdjacency) -> None:
+        offsets = condensation.offsets.tolist()
+        targets = condensation.targets.tolist()
+
+        is_reached = np.bincount(condensation.targets, minlength=condensation.num_nodes)
+        self.bit_positions = np.full(condensation.num_nodes, -1, dtype=np.int64)
+        reached_components = np.flatnonzero(is_reached)
+        self.bit_positions[reached_components] = np.arange(len(reached_components))
+        bit_positions = self.bit_positions.tolist()
+
+        # Components reached from `i` are all numbered below `i`, so building in ascending order always finds
+        # their bitsets complete.
+        self.bitsets = []
+        for component in range(condensation.num_nodes):
+            bitset = 0
+            for parent in targets[offsets[component] : offsets[component + 1]]:
+                bitset |= self.bitsets[parent] | 1 << bit_positions[parent]
+            self.bitsets.append(bitset)
+
+    def _components_reach(self, source: int, target: int) -> bool:
+        if source == target:
+            return True
+
+        bit_position = int(self.bit_positions[target])
+
+        return bool(bit_position >= 0 and self.bitsets[source] >> bit_position & 1)
+
+    def _nbytes(self) -> int:
+        return (
+            self.bit_positions.nbytes
+            + sys.getsizeof(self.bitsets)
+            + sum(sys.getsizeof(bitset) for bitset in self.bitsets)
+        )
+
+
+REACHABILITY_INDEXES: Dict[str, Type[ReachabilityIndex]] = {
+    "interval": IntervalReachabilityIndex,
+    "bitset": BitsetReachabilityIndex,
+}
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+ALIGNMENT = 64
+
+# (dtype, shape, byte offset) of each array within the block
+ArrayLayout = Dict[str, Tuple[str, Tuple[int, ...], int]]
+
+
+@dataclass(frozen=True)
+class SharedArraysManifest:
+    """
+    What another process needs to attach to published `SharedArrays`. Small and picklable.
+    """
+
+    block_name: str
+    layout: ArrayLayout
+
+
+class SharedArrays:
+    """
+    Named NumPy arrays held in a single `multiprocessing.shared_memory` block.
+
+    The publishing process copies the arrays in once with `publish` and owns the block: it must `unlink` it when
+    done. Its child processes `attach` with the manifest and get read-only views of the same memory, so nothing is
+    copied or unpickled however large the arrays are. (Children share the publisher's resource tracker, which is
+    what keeps an attaching process from unlinking the block when it exits.)
+    """
+
+    block: shared_memory.SharedMemory
+    manifest: SharedArraysManifest
+    arrays: Dict[str, np.ndarray]
+
+    def __init__(self, block: shared_memory.SharedMemory, layout: ArrayLayout):
+        self.block = block
+        self.manifest = SharedArraysManifest(block.name, layout)
+        self.arrays = {}
+
+        for name, (dtype, shape, offset) in layout.items():
+            array = np.ndarray(
+                shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset
+            )
+            array.flags.writeable = False
+            self.arrays[name] = array
+
+    @classmethod
+    def publish(cls, arrays: Dict[str, np.ndarray]) -> SharedArrays:
+        layout, size = get_layout(arrays)
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name, array in arrays.items():
+            dtype, shape, offset = layout[name]
+            view = np.ndarray(
+                shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset
+            )
+            view[...] = array
+
+        return cls(block, layout)
+
+    @classmethod
+    def attach(cls, manifest: SharedArraysManifest) -> SharedArrays:
+        return cls(
+            shared_memory.SharedMemory(name=manifest.block_name), manifest.layout
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.block.size
+
+    def close(self) -> None:
+        """
+        Detach this process from the block. Views handed out from `arrays` must not be used afterwards.
+        """
+        self.arrays = {}
+        self.block.close()
+
+    def unlink(self) -> None:
+        self.block.unlink()
+
+
+def get_layout(arrays: Dict[str, np.ndarray]) -> Tuple[ArrayLayout, int]:
+    """
+    Where each array goes when they are packed one after the other, each aligned to `ALIGNMENT` bytes, and the total
+    size they take.
+    """
+    layout: ArrayLayout = {}
+    size = 0
+    for name, array in arrays.items():
+        offset = align(size) if array.nbytes else 0
+        layout[name] = (array.dtype.str, array.shape, offset)
+        size = max(size, offset + array.nbytes)
+
+    return layout, size
+
+
+def align(size: int) -> int:
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def encode_names(names: List[str]) -> np.ndarray:
+    """
+    Entity names as a single array of UTF-8 bytes, so that they can be shared alongside the graph arrays.
+    """
+    return np.frombuffer("\0".join(names).encode(), dtype=np.uint8)
+
+
+def decode_names(encoded: np.ndarray) -> List[str]:
+    """
+    The names encoded by `encode_names`. No names and a single empty name encode alike, and decode as no names.
+    """
+    if not encoded.size:
+        return []
+
+    return encoded.tobytes().decode().split("\0")
+
+
+def encode_name_index(names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The UTF-8 encoded `names` in sorted order, as fixed-width byte strings, and the id (position in `names`) of
+    each. Processes sharing them look ids up with `lookup_ids` rather than each building a dictionary of every name.
+    """
+    encoded = np.array([name.encode() for name in names], dtype=bytes)
+    order = np.argsort(encoded, kind="stable")
+
+    return encoded[order], order.astype(np.int64)
+
+
+def lookup_ids(
+    sorted_names: np.ndarray, sorted_ids: np.ndarray, names: List[str]
+) -> np.ndarray:
+    """
+    The id of each of `names` in an index from `encode_name_index`, or -1 for names not in it.
+    """
+    ids = np.full(len(names), -1, dtype=np.int64)
+    if not len(sorted_names) or not names:
+        return ids
+
+    encoded = np.array([name.encode() for name in names], dtype=bytes)
+    positions = np.minimum(
+        np.searchsorted(sorted_names, encoded), len(sorted_names) - 1
+    )
+    found = sorted_names[positions] == encoded
+    ids[found] = sorted_ids[positions[found]]
+
+    return ids
@@ -0,0 +1,99 @@
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Union
+
+import numpy as np
+
+from ontology.exceptions.ontology_exceptions import InvalidSnapshotException
+from ontology.shared_arrays import align, get_layout
+
+MAGIC = b"ONTOSNAP"
+VERSION = 1
+# Magic, format version, length of the JSON metadata that follows
+HEADER = struct.Struct("<8sII")
+
+
+@dataclass
+class Snapshot:
+    """
+    The contents of a snapshot file. The arrays are read-only views straight into the memory-mapped file, so they
+    are paged in on first touch and shared through the page cache by every process that maps the same file.
+    """
+
+    metadata: Dict[str, Any]
+    arrays: Dict[str, np.ndarray]
+
+
+def write_snapshot(
+    file_path: Path, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]
+) -> None:
+    """
+    Write named arrays and JSON-serialisable metadata to `file_path`. The file is written next to its destination
+    and renamed into place, so readers never see a partial snapshot.
+
+    Layout: the header, the metadata (including where each array is), then the arrays, each aligned for direct
+    mapping.
+    """
+    layout, _ = get_layout(arrays)
+    encoded_metadata = json.dumps({**metadata, "layout": layout}).encode()
+    data_start = align(HEADER.size + len(encoded_metadata))
+
+    temporary_path = Path(f"{file_path}.tmp")
+    with open(temporary_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(encoded_metadata)))
+        file.write(encoded_metadata)
+        for name, array in arrays.items():
+            _, _, offset = layout[name]
+            if array.nbytes:
+                file.seek(data_start + offset)
+                file.write(np.ascontiguousarray(array).tobytes())
+
+    os.replace(temporary_path, file_path)
+
+
+def read_snapshot(file_path: Path) -> Snapshot:
+    with open(file_path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapped) < HEADER.size:
+        raise InvalidSnapshotException(f"{file_path} is not an ontology snapshot")
+
+    magic, version, metadata_length = HEADER.unpack_from(mapped)
+    if magic != MAGIC:
+        raise InvalidSnapshotException(f"{file_path} is not an ontology snapshot")
+    if version != VERSION:
+        raise InvalidSnapshotException(
+            f"{file_path} is snapshot format version {version}, expected {VERSION}"
+        )
+
+    metadata = json.loads(mapped[HEADER.size : HEADER.size + metadata_length])
+    data_start = align(HEADER.size + metadata_length)
+    arrays = {}
+    for name, (dtype, shape, offset) in metadata.pop("layout").items():
+        count = int(np.prod(shape))
+        arrays[name] = np.frombuffer(
+            mapped,
+            dtype=np.dtype(dtype),
+            count=count,
+            offset=data_start + offset if count else 0,
+        ).reshape(shape)
+
+    return Snapshot(metadata, arrays)
+
+
+def is_snapshot(file_path: Union[Path, Any]) -> bool:
+    """
+    Whether `file_path` names a snapshot file rather than e.g. a CSV file.
+    """
+    if not isinstance(file_path, (str, Path)):
+        return False
+
+    try:
+        with open(file_path, "rb") as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
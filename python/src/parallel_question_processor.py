@@ -0,0 +1,173 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from logger import getLogger
+from ontology.bulk_evaluator import (
+    HAS_ATTRIBUTE_CODE,
+    INSTANCE_OF_CODE,
+    SUBCLASS_OF_CODE,
+    BulkEvaluator,
+)
+from ontology.facade import OntologyFacade
+from ontology.shared_arrays import (
+    SharedArrays,
+    SharedArraysManifest,
+    encode_name_index,
+    lookup_ids,
+)
+from question import Question, QuestionType
+from question_result import QuestionResult
+
+SORTED_NAMES_ARRAY = "names/sorted"
+SORTED_IDS_ARRAY = "names/ids"
+RESULTS = {result.value: result for result in QuestionResult}
+QUESTION_EDGE_TYPE_CODES = {
+    QuestionType.INSTANCE_OF: INSTANCE_OF_CODE,
+    QuestionType.SUBCLASS_OF: SUBCLASS_OF_CODE,
+    QuestionType.HAS_ATTRIBUTE: HAS_ATTRIBUTE_CODE,
+}
+
+
+class ParallelQuestionProcessor:
+    """
+    Answers batches of questions on a pool of worker processes.
+
+    The ontology is loaded and inferred once, in this process. Its `BulkEvaluator` arrays and a sorted index of
+    entity names are then published in shared memory, and each worker attaches to them when it starts, so workers
+    neither read the CSV nor rerun inference, and hold no copy of the graph or of the names. Questions are sent to the
+    workers in chunks and the results come back in the order the questions were given.
+
+    Use it as a context manager, or call `close`, to stop the workers and free the shared memory.
+    """
+
+    DEFAULT_CHUNK_SIZE = 10_000
+
+    logger = getLogger(__name__)
+    ontology_facade: OntologyFacade
+    chunk_size: int
+    shared_arrays: SharedArrays
+    executor: ProcessPoolExecutor
+
+    def __init__(
+        self,
+        ontology_csv: Path,
+        workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.ontology_facade = OntologyFacade(ontology_csv)
+        self.chunk_size = chunk_size
+
+        ontology = self.ontology_facade.ontology
+        arrays = ontology.get_bulk_evaluator().to_arrays()
+        arrays[SORTED_NAMES_ARRAY], arrays[SORTED_IDS_ARRAY] = encode_name_index(
+            ontology.store.get_names()
+        )
+        self.shared_arrays = SharedArrays.publish(arrays)
+
+        workers = workers or os.cpu_count()
+        # Forked workers would inherit the parent's threads and locks, e.g. those of a server reloading its ontology
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=_attach_worker,
+            initargs=(self.shared_arrays.manifest,),
+        )
+        self.logger.info(
+            "Started %d workers over %d bytes of shared ontology arrays",
+            workers,
+            self.shared_arrays.nbytes,
+        )
+
+    def __enter__(self) -> "ParallelQuestionProcessor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def process_many(self, input_questions: Iterable[str]) -> List[QuestionResult]:
+        start = time.perf_counter()
+        results = []
+
+        for codes in self.executor.map(_answer_chunk, self._chunks(input_questions)):
+            results.extend(RESULTS[code] for code in codes.tolist())
+
+        elapsed = time.perf_counter() - start
+        self.logger.info(
+            "Processed %d questions in %.3fs, %.0f questions/s",
+            len(results),
+            elapsed,
+            len(results) / elapsed if elapsed else 0.0,
+        )
+
+        return results
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        self.shared_arrays.close()
+        self.shared_arrays.unlink()
+
+    # ---------------------------------------------------------------------------- #
+    #                                    PRIVATE                                   #
+    # ---------------------------------------------------------------------------- #
+    def _chunks(self, input_questions: Iterable[str]) -> Iterator[List[str]]:
+        chunk = []
+        for input_question in input_questions:
+            chunk.append(input_question)
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+
+# ---------------------------------------------------------------------------- #
+#                                WORKER PROCESS                                #
+# ---------------------------------------------------------------------------- #
+_worker_shared_arrays: Optional[SharedArrays] = None
+_worker_evaluator: Optional[BulkEvaluator] = None
+
+
+def _attach_worker(manifest: SharedArraysManifest) -> None:
+    global _worker_shared_arrays, _worker_evaluator
+
+    _worker_shared_arrays = SharedArrays.attach(manifest)
+    _worker_evaluator = BulkEvaluator.from_arrays(_worker_shared_arrays.arrays)
+
+
+def _lookup_ids(names: List[str]) -> np.ndarray:
+    arrays = _worker_shared_arrays.arrays
+
+    return lookup_ids(arrays[SORTED_NAMES_ARRAY], arrays[SORTED_IDS_ARRAY], names)
+
+
+def _answer_chunk(input_questions: List[str]) -> np.ndarray:
+    edge_type_codes = np.empty(len(input_questions), dtype=np.int8)
+    query_ids = np.full(len(input_questions), -1, dtype=np.int64)
+    target_ids = np.full(len(input_questions), -1, dtype=np.int64)
+    valid = np.ones(len(input_questions), dtype=bool)
+    heads, tails = [], []
+
+    for position, question in enumerate(Question.parse_many(input_questions)):
+        if question is None:
+            valid[position] = False
+            edge_type_codes[position] = INSTANCE_OF_CODE
+            continue
+
+        edge_type_codes[position] = QUESTION_EDGE_TYPE_CODES[question.get_type()]
+        heads.append(question.head)
+        tails.append(question.tail)
+
+    query_ids[valid] = _lookup_ids(heads)
+    target_ids[valid] = _lookup_ids(tails)
+
+    results = _worker_evaluator.evaluate(edge_type_codes, query_ids, target_ids)
+    results[~valid] = QuestionResult.INVALID.value
+
+    return results
@@ -2,7 +2,8 @@ from __future__ import annotations  # For use-during-define in classmethod
 
 from dataclasses import dataclass
 from enum import Enum, auto
-from re import compile
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, Tuple
 
 
 class QuestionType(Enum):
@@ -11,11 +12,14 @@ class QuestionType(Enum):
     HAS_ATTRIBUTE = auto()
 
 
-_QUESTION_PATTERNS = {
-    QuestionType.SUBCLASS_OF: compile(r"is (.*) a type of (.*)\?"),
-    QuestionType.INSTANCE_OF: compile(r"is (.*) (?:a|an) (.*)\?"),
-    QuestionType.HAS_ATTRIBUTE: compile(r"is (.*) considered to be (.*)\?"),
-}
+PARSE_CACHE_SIZE = 100_000
+
+_PREFIX = "is "
+_SUFFIX = "?"
+_SUBCLASS_OF_SEPARATOR = " a type of "
+_INSTANCE_OF_SEPARATOR = " a "
+_INSTANCE_OF_AN_SEPARATOR = " an "
+_HAS_ATTRIBUTE_SEPARATOR = " considered to be "
 
 
 class QuestionParsingException(Exception):
@@ -30,16 +34,22 @@ class Question:
 
     @classmethod
     def from_string(cls, question: str) -> Question:
-        for question_type in QuestionType:
-            pattern = _QUESTION_PATTERNS[question_type]
-            match = pattern.fullmatch(question)
+        parsed = _parse(question)
 
-            if match is None:
-                continue
+        if parsed is None:
+            raise QuestionParsingException(f"Unable to parse question: {question}")
 
-            return cls(question_type, match.group(1), match.group(2))
+        return cls(*parsed)
 
-        raise QuestionParsingException(f"Unable to parse question: {question}")
+    @classmethod
+    def parse_many(cls, questions: Iterable[str]) -> Iterator[Optional[Question]]:
+        """
+        Parse questions one at a time as they are read, e.g. from the lines of a file, yielding `None` for any that
+        can not be parsed. A trailing line break is not part of the question.
+        """
+        for question in questions:
+            parsed = _parse(question.rstrip("\r\n"))
+            yield None if parsed is None else cls(*parsed)
 
     def get_type(self) -> QuestionType:
         return self.question_type
@@ -52,3 +62,58 @@ class Question:
 
     def has_attribute(self) -> bool:
         return self.question_type == QuestionType.HAS_ATTRIBUTE
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse(question: str) -> Optional[Tuple[QuestionType, str, str]]:
+    """
+    Parse a question in a single pass over its separators, in order of precedence:
+
+    - "is <head> a type of <tail>?"
+    - "is <head> a <tail>?" or "is <head> an <tail>?"
+    - "is <head> considered to be <tail>?"
+
+    Where a separator occurs more than once the last occurrence splits the question, so a head may itself contain
+    a separator. Questions spanning several lines are rejected.
+    """
+    if (
+        not question.startswith(_PREFIX)
+        or not question.endswith(_SUFFIX)
+        or "\n" in question
+    ):
+        return None
+
+    body = question[len(_PREFIX) : -len(_SUFFIX)]
+
+    position = body.rfind(_SUBCLASS_OF_SEPARATOR)
+    if position != -1:
+        return (
+            QuestionType.SUBCLASS_OF,
+            body[:position],
+            body[position + len(_SUBCLASS_OF_SEPARATOR) :],
+        )
+
+    position = body.rfind(_INSTANCE_OF_SEPARATOR)
+    an_position = body.rfind(_INSTANCE_OF_AN_SEPARATOR)
+    if an_position > position:
+        return (
+            QuestionType.INSTANCE_OF,
+            body[:an_position],
+            body[an_position + len(_INSTANCE_OF_AN_SEPARATOR) :],
+        )
+    if position != -1:
+        return (
+            QuestionType.INSTANCE_OF,
+            body[:position],
+            body[position + len(_INSTANCE_OF_SEPARATOR) :],
+        )
+
+    position = body.rfind(_HAS_ATTRIBUTE_SEPARATOR)
+    if position != -1:
+        return (
+            QuestionType.HAS_ATTRIBUTE,
+            body[:position],
+            body[position + len(_HAS_ATTRIBUTE_SEPARATOR) :],
+        )
+
+    return None
@@ -1,8 +1,12 @@
+import time
 from pathlib import Path
+from typing import Iterable, List, Optional
 
 from logger import getLogger
+from ontology.domain.ontology import Ontology
 from ontology.exceptions.ontology_exceptions import OntologyException
 from ontology.facade import OntologyFacade
+from ontology.query_metrics import QueryMetrics
 from question import Question, QuestionParsingException
 from question_result import QuestionResult
 
@@ -11,18 +15,82 @@ class QuestionProcessor:
     logger = getLogger(__name__)
     data = {}
 
-    def __init__(self, ontology_csv: Path):
-        self.ontology_facade = OntologyFacade(ontology_csv)
+    def __init__(
+        self,
+        ontology_csv: Path,
+        reachability_index: Optional[str] = None,
+        materialize_closure: bool = False,
+        metrics: Optional[QueryMetrics] = None,
+        base: Optional[Ontology] = None,
+        load_workers: int = 1,
+    ):
+        """
+        `metrics` turns on recording of `QueryMetrics` for every question processed, invalid ones included.
+
+        `base` layers the ontology on a shared base ontology, see `Ontology.from_base`. `load_workers` processes
+        parse the ontology file, see `CsvLoader`.
+        """
+        self.metrics = metrics
+        self.ontology_facade = OntologyFacade(
+            ontology_csv,
+            reachability_index,
+            materialize_closure,
+            metrics=metrics,
+            base=base,
+            load_workers=load_workers,
+        )
 
     def process(self, input_question: str) -> QuestionResult:
         try:
             question = Question.from_string(input_question)
-            self.logger.info(f"Processing valid question '{input_question}'")
+            self.logger.debug("Processing valid question '%s'", input_question)
             return self._process_question(question)
         except QuestionParsingException:
             self.logger.exception("Error processing question")
+            if self.metrics is not None:
+                self.metrics.record_invalid()
             return QuestionResult.INVALID
 
+    def process_many(self, input_questions: Iterable[str]) -> List[QuestionResult]:
+        """
+        Process a batch of questions, returning their results in order. Questions sharing a type and a target are
+        answered together, and the batch is logged once rather than per question. Questions may be lines read from a
+        file, with their line breaks.
+        """
+        start = time.perf_counter()
+        results = []
+        questions = []
+        positions = []
+
+        for question in Question.parse_many(input_questions):
+            if question is None:
+                results.append(QuestionResult.INVALID)
+            else:
+                questions.append(question)
+                positions.append(len(results))
+                results.append(QuestionResult.DONT_KNOW)
+
+        try:
+            answers = self.ontology_facade.process_questions(questions)
+            for position, answer in zip(positions, answers):
+                results[position] = answer
+        except OntologyException as exception:
+            self.logger.error("Error processing questions: %s", exception)
+
+        if self.metrics is not None and len(results) > len(questions):
+            self.metrics.record_invalid(len(results) - len(questions))
+
+        elapsed = time.perf_counter() - start
+        self.logger.info(
+            "Processed %d questions (%d invalid) in %.3fs, %.0f questions/s",
+            len(results),
+            len(results) - len(questions),
+            elapsed,
+            len(results) / elapsed if elapsed else 0.0,
+        )
+
+        return results
+
     def _process_question(self, question: Question) -> QuestionResult:
         try:
             return self.ontology_facade.process_question(question)
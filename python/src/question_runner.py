@@ -0,0 +1,189 @@
+import argparse
+import logging
+import sys
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from latency import get_latency_percentiles
+from ontology.facade import OntologyFacade
+from ontology.query_metrics import QueryMetrics
+from ontology.reachability_index import REACHABILITY_INDEXES
+from question_processor import QuestionProcessor
+from question_result import QuestionResult
+
+
+class QuestionRunner:
+    """
+    Streams questions through a `QuestionProcessor` and writes each answer as soon as its batch is done.
+
+    Questions are read lazily and answered `batch_size` at a time, so memory stays flat however long the input is.
+    Latencies are measured per batch, as questions in a batch are answered together; with a batch size of 1 every
+    question is answered on its own and they are per question.
+    """
+
+    DEFAULT_BATCH_SIZE = 1_000
+    DEFAULT_LATENCY_SAMPLES = 1_000_000
+
+    question_processor: QuestionProcessor
+    batch_size: int
+    results: Counter
+    latencies: Deque[float]
+    elapsed: float
+
+    def __init__(
+        self,
+        question_processor: QuestionProcessor,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        latency_samples: int = DEFAULT_LATENCY_SAMPLES,
+    ):
+        self.question_processor = question_processor
+        self.batch_size = batch_size
+        self.results = Counter()
+        self.latencies = deque(maxlen=latency_samples)
+        self.elapsed = 0.0
+
+    def run(self, questions: Iterable[str], output: TextIO, echo: bool = False) -> None:
+        """
+        Write the answer to each question on its own line of `output`, flushing after every batch.
+        """
+        for answered in self._answer_batches(questions):
+            for question, answer in answered:
+                if echo:
+                    output.write(f"{question}\t{answer.name}\n")
+                else:
+                    output.write(f"{answer.name}\n")
+
+            output.flush()
+
+    def get_summary(self) -> Dict[str, float]:
+        """
+        Counts of each result, throughput, and batch latency percentiles ("batch_p50_ms" and so on).
+        """
+        questions = sum(self.results.values())
+        summary = {
+            "questions": questions,
+            **{result.name.lower(): self.results[result] for result in QuestionResult},
+            "seconds": self.elapsed,
+            "questions_per_second": questions / self.elapsed if self.elapsed else 0.0,
+            "batches": len(self.latencies),
+        }
+        summary.update(get_latency_percentiles(self.latencies, "batch_"))
+
+        return summary
+
+    # ---------------------------------------------------------------------------- #
+    #                                    PRIVATE                                   #
+    # ---------------------------------------------------------------------------- #
+    def _answer_batches(
+        self, questions: Iterable[str]
+    ) -> Iterator[List[Tuple[str, QuestionResult]]]:
+        start = time.perf_counter()
+
+        try:
+            for batch in self._batches(questions):
+                batch_start = time.perf_counter()
+                answers = self.question_processor.process_many(batch)
+                self.latencies.append(time.perf_counter() - batch_start)
+
+                for answer in answers:
+                    self.results[answer] += 1
+
+                yield [
+                    (question.rstrip("\r\n"), answer)
+                    for question, answer in zip(batch, answers)
+                ]
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def _batches(self, questions: Iterable[str]) -> Iterator[List[str]]:
+        batch = []
+        for question in questions:
+            batch.append(question)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Answer questions read from a file or stdin, one per line"
+    )
+    parser.add_argument(
+        "ontology", type=Path, help="ontology CSV file, directory of shards or snapshot"
+    )
+    parser.add_argument(
+        "questions",
+        nargs="?",
+        default="-",
+        help="file of questions, one per line (default: stdin)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=QuestionRunner.DEFAULT_BATCH_SIZE
+    )
+    parser.add_argument(
+        "--echo", action="store_true", help="write each question before its answer"
+    )
+    parser.add_argument("--reachability-index", choices=sorted(REACHABILITY_INDEXES))
+    parser.add_argument("--materialize-closure", action="store_true")
+    parser.add_argument(
+        "--load-workers",
+        type=int,
+        default=1,
+        help="processes to parse the ontology CSV file (or directory of shards) with",
+    )
+    parser.add_argument(
+        "--base",
+        type=Path,
+        help="ontology CSV file or snapshot to layer the ontology CSV file on",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        help="record per question type counters and latency histograms to this JSON file",
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    options = parser.parse_args(arguments)
+
+    logging.getLogger().setLevel(options.log_level)
+
+    metrics = QueryMetrics() if options.metrics is not None else None
+    load_start = time.perf_counter()
+    base = None
+    if options.base is not None:
+        base = OntologyFacade(
+            options.base, materialize_closure=options.materialize_closure
+        ).ontology
+    question_processor = QuestionProcessor(
+        options.ontology,
+        options.reachability_index,
+        options.materialize_closure,
+        metrics,
+        base,
+        options.load_workers,
+    )
+    load_seconds = time.perf_counter() - load_start
+
+    runner = QuestionRunner(question_processor, options.batch_size)
+    if options.questions == "-":
+        runner.run(sys.stdin, sys.stdout, options.echo)
+    else:
+        with open(options.questions) as questions:
+            runner.run(questions, sys.stdout, options.echo)
+
+    if metrics is not None:
+        metrics.dump(options.metrics)
+
+    summary = {"load_seconds": load_seconds, **runner.get_summary()}
+    print(
+        ", ".join(f"{name}={value:g}" for name, value in summary.items()),
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import argparse
+import asyncio
+import signal
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+from latency import get_latency_percentiles
+from logger import getLogger
+from question_processor import QuestionProcessor
+from question_result import QuestionResult
+
+
+class QuestionServer:
+    """
+    Serves questions over TCP with a line protocol: each line received is a question, and each is answered with a
+    line holding the name of its `QuestionResult`, in the order the questions arrived on that connection. Clients may
+    pipeline as many questions as they like without waiting for answers.
+
+    Questions from every connection go through one queue. A single dispatcher takes whatever is waiting, up to
+    `max_batch_size` questions, and answers it with `QuestionProcessor.process_many` on a worker thread, so the event
+    loop keeps accepting connections while the ontology works. A question that is already queued or being answered
+    is not queued again: later askers wait on the first asker's answer.
+
+    Backpressure: at most `max_pending` distinct questions are queued, and each connection has at most
+    `max_pipelined` questions awaiting an answer. Past either limit the server stops reading from the connection
+    until answers drain, which pushes back on the client through TCP.
+
+    Lines longer than `MAX_LINE_BYTES` or that are not UTF-8 are answered INVALID, and the connection is kept.
+
+    On SIGHUP the ontology is reloaded in the background (see `OntologyFacade.reload`), warming up
+    `reload_warm_up` answers, while questions keep being answered.
+    """
+
+    DEFAULT_MAX_PENDING = 10_000
+    DEFAULT_MAX_BATCH_SIZE = 1_000
+    DEFAULT_MAX_PIPELINED = 100
+    DEFAULT_LATENCY_SAMPLES = 100_000
+    MAX_LINE_BYTES = 64 * 1024
+
+    logger = getLogger(__name__)
+    question_processor: QuestionProcessor
+    max_batch_size: int
+    max_pipelined: int
+    requests: int
+    coalesced: int
+    batches: int
+    _queue: "asyncio.Queue[str]"
+    _in_flight: Dict[str, "asyncio.Future[QuestionResult]"]
+    _latencies: Deque[float]
+    _executor: ThreadPoolExecutor
+    _dispatcher: Optional["asyncio.Task[None]"]
+
+    def __init__(
+        self,
+        question_processor: QuestionProcessor,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_pipelined: int = DEFAULT_MAX_PIPELINED,
+        latency_samples: int = DEFAULT_LATENCY_SAMPLES,
+        reload_warm_up: int = 0,
+    ):
+        self.question_processor = question_processor
+        self.max_pending = max_pending
+        self.max_batch_size = max_batch_size
+        self.max_pipelined = max_pipelined
+        self.reload_warm_up = reload_warm_up
+        self.requests = 0
+        self.coalesced = 0
+        self.batches = 0
+        self._in_flight = {}
+        self._latencies = deque(maxlen=latency_samples)
+        # One thread, because the ontology's caches are not safe to share between threads
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._dispatcher = None
+
+    async def answer(self, question: str) -> QuestionResult:
+        """
+        Answer one question, sharing the work with identical questions already in flight.
+        """
+        start = time.perf_counter()
+        self._ensure_dispatcher()
+        self.requests += 1
+
+        future = self._in_flight.get(question)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[question] = future
+            await self._queue.put(question)
+
+        result = await asyncio.shield(future)
+        self._latencies.append(time.perf_counter() - start)
+
+        return result
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(
+            self.handle_connection, host, port, limit=self.MAX_LINE_BYTES
+        )
+        addresses = ", ".join(str(socket.getsockname()) for socket in server.sockets)
+        self.logger.info("Serving questions on %s", addresses)
+        if hasattr(signal, "SIGHUP"):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.reload)
+
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                self.log_stats()
+                await self.close()
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        answers: "asyncio.Queue[Optional[asyncio.Future[QuestionResult]]]" = (
+            asyncio.Queue(maxsize=self.max_pipelined)
+        )
+        replier = asyncio.ensure_future(self._reply(answers, writer))
+
+        try:
+            while True:
+                line = await self._read_line(reader)
+                if line == b"":
+                    break
+
+                try:
+                    question = line.decode().strip() if line is not None else None
+                except UnicodeDecodeError:
+                    question = None
+                if question is None:
+                    await answers.put(self._answered(QuestionResult.INVALID))
+                elif question:
+                    await answers.put(asyncio.ensure_future(self.answer(question)))
+        finally:
+            await answers.put(None)
+            await replier
+            writer.close()
+
+    def reload(self) -> None:
+        """
+        Reload the ontology in the background, answering questions from the current one until it is done.
+        """
+        self.logger.info("Reloading the ontology")
+        self.question_processor.ontology_facade.reload_in_background(
+            warm_up=self.reload_warm_up
+        )
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Request counters, and latency percentiles in milliseconds over the most recent requests.
+        """
+        stats = {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "pending": self._queue.qsize() if self._dispatcher is not None else 0,
+        }
+        stats.update(get_latency_percentiles(self._latencies))
+
+        return stats
+
+    def log_stats(self) -> None:
+        self.logger.info(
+            "Question server stats: %s",
+            ", ".join(f"{name}={value:g}" for name, value in self.get_stats().items()),
+        )
+
+    async def close(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+
+        self._executor.shutdown()
+
+    # ---------------------------------------------------------------------------- #
+    #                                    PRIVATE                                   #
+    # ---------------------------------------------------------------------------- #
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None:
+            # Created here rather than in __init__ so that they belong to the running event loop
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self.question_processor.process_many, batch
+                )
+            except Exception as exception:
+                self.logger.exception("Error answering a batch of questions")
+                for question in batch:
+                    self._in_flight.pop(question).set_exception(exception)
+                continue
+
+            self.batches += 1
+            for question, result in zip(batch, results):
+                self._in_flight.pop(question).set_result(result)
+
+    async def _read_line(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        """
+        The next line, b"" at the end of the stream, or None if the line is longer than the reader's limit, in which
+        case the rest of it is skipped. `StreamReader.readline` raises instead, and may leave the rest of the line to
+        be read as the next one.
+        """
+        try:
+            return await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as error:
+            return error.partial
+        except asyncio.LimitOverrunError as error:
+            overrun = error.consumed
+
+        while True:
+            await reader.readexactly(overrun)
+            try:
+                await reader.readuntil(b"\n")
+                return None
+            except asyncio.IncompleteReadError:
+                return None
+            except asyncio.LimitOverrunError as error:
+                overrun = error.consumed
+
+    @classmethod
+    def _answered(cls, result: QuestionResult) -> "asyncio.Future[QuestionResult]":
+        answer = asyncio.get_running_loop().create_future()
+        answer.set_result(result)
+
+        return answer
+
+    async def _reply(
+        self,
+        answers: "asyncio.Queue[Optional[asyncio.Future[QuestionResult]]]",
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        while True:
+            answer = await answers.get()
+            if answer is None:
+                return
+
+            try:
+                result = await answer
+            except Exception:
+                result = QuestionResult.DONT_KNOW
+
+            try:
+                writer.write(f"{result.name}\n".encode())
+                await writer.drain()
+            except ConnectionError:
+                # The client went away, keep consuming its answers so that the reader is not blocked
+                pass
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve ontology questions over TCP")
+    parser.add_argument("ontology_csv", type=Path)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--max-pending", type=int, default=QuestionServer.DEFAULT_MAX_PENDING
+    )
+    parser.add_argument(
+        "--max-batch-size", type=int, default=QuestionServer.DEFAULT_MAX_BATCH_SIZE
+    )
+    parser.add_argument(
+        "--max-pipelined", type=int, default=QuestionServer.DEFAULT_MAX_PIPELINED
+    )
+    parser.add_argument(
+        "--watch",
+        type=float,
+        metavar="SECONDS",
+        help="reload the ontology when its file changes, checking this often",
+    )
+    parser.add_argument(
+        "--warm-up",
+        type=int,
+        default=0,
+        help="recently cached answers to compute with a reloaded ontology before it is swapped in",
+    )
+    options = parser.parse_args(arguments)
+
+    question_processor = QuestionProcessor(options.ontology_csv)
+    server = QuestionServer(
+        question_processor,
+        max_pending=options.max_pending,
+        max_batch_size=options.max_batch_size,
+        max_pipelined=options.max_pipelined,
+        reload_warm_up=options.warm_up,
+    )
+    if options.watch is not None:
+        question_processor.ontology_facade.watch(options.watch, options.warm_up)
+    try:
+        asyncio.run(server.serve(options.host, options.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
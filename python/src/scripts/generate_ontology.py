@@ -0,0 +1,237 @@
+import argparse
+import csv
+import random
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# Edge type, head entity, tail entity
+Edge = Tuple[str, str, str]
+
+
+@dataclass(frozen=True)
+class OntologyShape:
+    """
+    The parameters of a synthetic ontology.
+
+    Classes form a tree `depth` levels below a single root, each class having `branching_factor` subclasses, cut
+    short after `max_classes` classes if given. Each non-root class is also a subclass of another, shallower class
+    with probability `multiple_inheritance_rate`. `instances` instances each belong to a random leaf class, classes
+    have on average `attributes_per_class` of `attributes` attributes, and each class is mutually exclusive with its
+    next sibling with probability `mutual_exclusion_density`. `cycles` SubclassOf edges from a class to one of its
+    descendants are added at the end; there are none by default, so the hierarchy is acyclic.
+    """
+
+    depth: int = 4
+    branching_factor: int = 8
+    max_classes: Optional[int] = None
+    multiple_inheritance_rate: float = 0.05
+    instances: int = 10_000
+    attributes: int = 100
+    attributes_per_class: float = 0.5
+    mutual_exclusion_density: float = 0.1
+    cycles: int = 0
+    seed: int = 0
+
+    @classmethod
+    def for_edges(cls, num_edges: int, seed: int = 0) -> "OntologyShape":
+        """
+        A shape of roughly `num_edges` edges: about 40% SubclassOf, 40% InstanceOf, 15% HasAttribute and the rest
+        MutuallyExclusiveWith.
+        """
+        max_classes = max(num_edges * 2 // 5, 2)
+        depth = 1
+        while (8 ** (depth + 1) - 1) // 7 < max_classes:
+            depth += 1
+
+        return cls(
+            depth=depth,
+            max_classes=max_classes,
+            multiple_inheritance_rate=0.0,
+            instances=num_edges * 2 // 5,
+            attributes_per_class=0.375,
+            mutual_exclusion_density=0.1,
+            seed=seed,
+        )
+
+    @property
+    def num_classes(self) -> int:
+        if self.branching_factor == 1:
+            num_classes = self.depth + 1
+        else:
+            num_classes = (self.branching_factor ** (self.depth + 1) - 1) // (
+                self.branching_factor - 1
+            )
+
+        if self.max_classes is not None:
+            return min(num_classes, self.max_classes)
+
+        return num_classes
+
+
+class OntologyGenerator:
+    """
+    Generates the edges of an `OntologyShape` one at a time. Classes are numbered in level order, so every class's
+    parents and ancestors are computed from its number rather than remembered, and memory use does not grow with the
+    size of the ontology.
+    """
+
+    shape: OntologyShape
+
+    def __init__(self, shape: OntologyShape):
+        self.shape = shape
+
+    def iter_edges(self) -> Iterator[Edge]:
+        rng = random.Random(self.shape.seed)
+        num_classes = self.shape.num_classes
+        first_leaf_id = self._get_first_leaf_id(num_classes)
+
+        for class_id in range(1, num_classes):
+            parent_id = self._get_parent_id(class_id)
+            yield "SubclassOf", self._class_name(class_id), self._class_name(parent_id)
+
+            # Any lower-numbered class is no deeper, so the extra parent can not make a cycle
+            if parent_id > 0 and rng.random() < self.shape.multiple_inheritance_rate:
+                other_parent_id = rng.randrange(parent_id)
+                yield "SubclassOf", self._class_name(class_id), self._class_name(
+                    other_parent_id
+                )
+
+        for class_id in range(num_classes):
+            for _ in range(self._get_attribute_count(rng)):
+                yield "HasAttribute", self._class_name(class_id), self._attribute_name(
+                    rng.randrange(self.shape.attributes)
+                )
+
+            sibling_id = class_id + 1
+            if (
+                class_id > 0
+                and sibling_id < num_classes
+                and self._get_parent_id(sibling_id) == self._get_parent_id(class_id)
+                and rng.random() < self.shape.mutual_exclusion_density
+            ):
+                yield "MutuallyExclusiveWith", self._class_name(
+                    class_id
+                ), self._class_name(sibling_id)
+
+        for instance_id in range(self.shape.instances):
+            yield "InstanceOf", f"instance {instance_id}", self._class_name(
+                rng.randrange(first_leaf_id, num_classes)
+            )
+
+        for _ in range(self.shape.cycles):
+            class_id = rng.randrange(1, num_classes) if num_classes > 1 else 0
+            ancestor_ids = self._get_ancestor_ids(class_id)
+            yield "SubclassOf", self._class_name(
+                rng.choice(ancestor_ids)
+            ), self._class_name(class_id)
+
+    def write(self, file_path: Path) -> int:
+        """
+        Stream the edges to a CSV file as they are generated, returning how many were written.
+        """
+        num_edges = 0
+        with open(file_path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["ID", "EDGE_TYPE", "HEAD_ENTITY", "TAIL_ENTITY"])
+            for num_edges, edge in enumerate(self.iter_edges(), start=1):
+                writer.writerow((num_edges, *edge))
+
+        return num_edges
+
+    # ---------------------------------------------------------------------------- #
+    #                                    PRIVATE                                   #
+    # ---------------------------------------------------------------------------- #
+    def _get_parent_id(self, class_id: int) -> int:
+        return (class_id - 1) // self.shape.branching_factor
+
+    def _get_ancestor_ids(self, class_id: int) -> List[int]:
+        ancestor_ids = []
+        while class_id > 0:
+            class_id = self._get_parent_id(class_id)
+            ancestor_ids.append(class_id)
+
+        return ancestor_ids or [0]
+
+    def _get_first_leaf_id(self, num_classes: int) -> int:
+        # The first class without subclasses: every class after it has none either
+        return min(
+            num_classes - 1, -(-(num_classes - 1) // self.shape.branching_factor)
+        )
+
+    def _get_attribute_count(self, rng: random.Random) -> int:
+        count = int(self.shape.attributes_per_class)
+        if rng.random() < self.shape.attributes_per_class - count:
+            count += 1
+
+        return count
+
+    def _class_name(self, class_id: int) -> str:
+        return f"class {class_id}"
+
+    def _attribute_name(self, attribute_id: int) -> str:
+        return f"attribute {attribute_id}"
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    defaults = OntologyShape()
+    parser = argparse.ArgumentParser(
+        description="Write a seeded synthetic ontology CSV file"
+    )
+    parser.add_argument("output", type=Path)
+    parser.add_argument(
+        "--edges",
+        type=int,
+        help="size the ontology to about this many edges, instead of the shape options",
+    )
+    parser.add_argument("--depth", type=int, default=defaults.depth)
+    parser.add_argument(
+        "--branching-factor", type=int, default=defaults.branching_factor
+    )
+    parser.add_argument("--max-classes", type=int, default=defaults.max_classes)
+    parser.add_argument(
+        "--multiple-inheritance-rate",
+        type=float,
+        default=defaults.multiple_inheritance_rate,
+    )
+    parser.add_argument("--instances", type=int, default=defaults.instances)
+    parser.add_argument("--attributes", type=int, default=defaults.attributes)
+    parser.add_argument(
+        "--attributes-per-class", type=float, default=defaults.attributes_per_class
+    )
+    parser.add_argument(
+        "--mutual-exclusion-density",
+        type=float,
+        default=defaults.mutual_exclusion_density,
+    )
+    parser.add_argument(
+        "--cycles", type=int, default=defaults.cycles, help="SubclassOf cycles to add"
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    options = parser.parse_args(arguments)
+
+    if options.edges is not None:
+        shape = replace(
+            OntologyShape.for_edges(options.edges, options.seed),
+            cycles=options.cycles,
+        )
+    else:
+        shape = OntologyShape(
+            depth=options.depth,
+            branching_factor=options.branching_factor,
+            max_classes=options.max_classes,
+            multiple_inheritance_rate=options.multiple_inheritance_rate,
+            instances=options.instances,
+            attributes=options.attributes,
+            attributes_per_class=options.attributes_per_class,
+            mutual_exclusion_density=options.mutual_exclusion_density,
+            cycles=options.cycles,
+            seed=options.seed,
+        )
+
+    num_edges = OntologyGenerator(shape).write(options.output)
+    print(f"Wrote {num_edges} edges to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+from pathlib import Path
+
+import pytest
+
+from ontology.answer_cache import AnswerCache
+from ontology.domain.edge_type import EdgeType
+from ontology.domain.ontology import Ontology
+from ontology.exceptions.ontology_exceptions import UnknownEvictionPolicyException
+from question_result import QuestionResult
+
+
+def key(query: str, target: str = "target") -> tuple:
+    return (EdgeType.INSTANCE_OF, query, target)
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    cache = AnswerCache(capacity=2, policy="lru")
+    cache.put(key("a"), QuestionResult.YES)
+    cache.put(key("b"), QuestionResult.NO)
+    cache.get(key("a"))
+    cache.put(key("c"), QuestionResult.YES)
+
+    assert cache.get(key("b")) is None
+    assert cache.get(key("a")) == QuestionResult.YES
+    assert cache.get(key("c")) == QuestionResult.YES
+    assert cache.get_stats().evictions == 1
+
+
+def test_lfu_evicts_least_frequently_used() -> None:
+    cache = AnswerCache(capacity=2, policy="lfu")
+    cache.put(key("a"), QuestionResult.YES)
+    cache.put(key("b"), QuestionResult.NO)
+    cache.get(key("b"))
+    cache.get(key("b"))
+    cache.get(key("a"))
+    cache.put(key("c"), QuestionResult.YES)
+
+    assert cache.get(key("a")) is None
+    assert cache.get(key("b")) == QuestionResult.NO
+
+
+def test_ttl_expires_answers(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr("ontology.answer_cache.time.monotonic", lambda: now[0])
+    cache = AnswerCache(policy="ttl", ttl_seconds=10)
+    cache.put(key("a"), QuestionResult.YES)
+
+    now[0] += 5
+    assert cache.get(key("a")) == QuestionResult.YES
+
+    now[0] += 10
+    assert cache.get(key("a")) is None
+    assert cache.get_stats().expirations == 1
+    assert len(cache) == 0
+
+
+def test_stats_and_clear() -> None:
+    cache = AnswerCache()
+    cache.put(key("a"), QuestionResult.YES)
+    cache.get(key("a"))
+    cache.get(key("b"))
+
+    stats = cache.get_stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+    assert stats.hit_rate == 0.5
+    assert stats.bytes > 0
+
+    cache.clear()
+
+    assert cache.get_stats().entries == 0
+    assert cache.get_stats().bytes == 0
+    assert cache.evict_entities(["a"]) == 0
+
+
+def test_evict_entities() -> None:
+    cache = AnswerCache(policy="lfu")
+    cache.put(key("a", "x"), QuestionResult.YES)
+    cache.put(key("b", "x"), QuestionResult.YES)
+    cache.put(key("b", "y"), QuestionResult.YES)
+
+    assert cache.evict_entities(["x"]) == 2
+    assert len(cache) == 1
+    assert cache.get(key("b", "y")) == QuestionResult.YES
+
+
+def test_evict_targets() -> None:
+    cache = AnswerCache()
+    cache.put(key("a", "x"), QuestionResult.YES)
+    cache.put((EdgeType.HAS_ATTRIBUTE, "a", "x"), QuestionResult.YES)
+    cache.put((EdgeType.HAS_ATTRIBUTE, "x", "y"), QuestionResult.YES)
+
+    assert cache.evict_targets(EdgeType.HAS_ATTRIBUTE, "x") == 1
+    assert len(cache) == 2
+    assert cache.get((EdgeType.HAS_ATTRIBUTE, "a", "x")) is None
+
+
+def test_unknown_policy() -> None:
+    with pytest.raises(UnknownEvictionPolicyException):
+        AnswerCache(policy="fifo")
+
+
+def test_ontology_uses_its_own_cache() -> None:
+    ontology = Ontology(Path("data/ontology.csv"), answer_cache=AnswerCache(capacity=1))
+
+    ontology.is_instance_of("Keiko", "mammal")
+    ontology.is_instance_of("Keiko", "mammal")
+    ontology.is_subclass_of("killer whale", "animal")
+
+    stats = ontology.answer_cache.get_stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries) == (1, 2, 1, 1)
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from benchmark import OntologyBenchmark
+
+
+def test_benchmark_reports_every_measurement(tmp_path: Path) -> None:
+    benchmark = OntologyBenchmark(tmp_path, questions_per_type=20)
+
+    result = benchmark.run(1_000)
+
+    assert (tmp_path / "benchmark-1000-0.csv").exists()
+    assert result["num_edges"] == 1_000
+    assert result["mode"] == "traversal"
+    assert result["parse_seconds"] > 0
+    assert list(result["load_phases"]) == [
+        "parse",
+        "graph_store",
+        "indexes",
+    ]
+    assert result["peak_rss_mb"] > 0
+    for cache in ("cold", "warm"):
+        assert set(result["latency"][cache]) == {
+            "SUBCLASS_OF",
+            "INSTANCE_OF",
+            "HAS_ATTRIBUTE",
+        }
+        assert result["latency"][cache]["INSTANCE_OF"]["p99_ms"] > 0
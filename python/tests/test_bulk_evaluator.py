@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from ontology.domain.edge_type import EdgeType
+from ontology.domain.ontology import Ontology
+from ontology.exceptions.ontology_exceptions import InvalidEdgeTypeException
+from ontology.loader import EDGE_TYPES, CsvLoader
+from question_result import QuestionResult
+
+QUESTION_EDGE_TYPES = [
+    EdgeType.INSTANCE_OF,
+    EdgeType.SUBCLASS_OF,
+    EdgeType.HAS_ATTRIBUTE,
+]
+
+
+@pytest.mark.parametrize("materialize_closure", [False, True])
+def test_bulk_evaluation_matches_single_questions(materialize_closure: bool) -> None:
+    data_file = Path("data/ontology.csv")
+    ontology = Ontology(data_file, materialize_closure=materialize_closure)
+    names = CsvLoader().load(data_file).names + ["unknown thing"]
+
+    edge_types, heads, tails, expected = [], [], [], []
+    for edge_type, answer in zip(
+        QUESTION_EDGE_TYPES,
+        [ontology.is_instance_of, ontology.is_subclass_of, ontology.has_attribute],
+    ):
+        for head in names:
+            for tail in names:
+                edge_types.append(EDGE_TYPES.index(edge_type))
+                heads.append(head)
+                tails.append(tail)
+                expected.append(answer(head, tail).value)
+
+    results = ontology.evaluate_pairs(np.array(edge_types), heads, tails)
+
+    assert results.tolist() == expected
+    assert QuestionResult.NO.value in expected
+
+
+def test_bulk_evaluator_is_rebuilt_after_edge_changes(tmp_path: Path) -> None:
+    data_file = tmp_path / "ontology.csv"
+    data_file.write_text(
+        "ID,EDGE_TYPE,HEAD_ENTITY,TAIL_ENTITY\n" "1,InstanceOf,bulk Rex,bulk dog\n"
+    )
+    ontology = Ontology(data_file)
+    code = np.array([EDGE_TYPES.index(EdgeType.INSTANCE_OF)])
+
+    assert ontology.evaluate_pairs(code, ["bulk Rex"], ["bulk animal"]).tolist() == [
+        QuestionResult.DONT_KNOW.value
+    ]
+
+    ontology.add_edge("SubclassOf", "bulk dog", "bulk animal")
+
+    assert ontology.evaluate_pairs(code, ["bulk Rex"], ["bulk animal"]).tolist() == [
+        QuestionResult.YES.value
+    ]
+
+
+def test_bulk_evaluation_rejects_other_edge_types() -> None:
+    ontology = Ontology(Path("data/ontology.csv"))
+    code = np.array([EDGE_TYPES.index(EdgeType.SUPERCLASS_OF)])
+
+    with pytest.raises(InvalidEdgeTypeException):
+        ontology.evaluate_pairs(code, ["dog"], ["animal"])
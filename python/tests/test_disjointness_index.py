@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import pytest
+
+from ontology.domain.ontology import Ontology
+from question_result import QuestionResult
+
+
+@pytest.fixture
+def ontology(tmp_path: Path) -> Ontology:
+    data_file = tmp_path / "ontology.csv"
+    data_file.write_text(
+        "ID,EDGE_TYPE,HEAD_ENTITY,TAIL_ENTITY\n"
+        "1,SubclassOf,disjoint animal,disjoint organism\n"
+        "2,SubclassOf,disjoint plant,disjoint organism\n"
+        "3,SubclassOf,disjoint fish,disjoint animal\n"
+        "4,SubclassOf,disjoint tree,disjoint plant\n"
+        "5,InstanceOf,disjoint Nemo,disjoint fish\n"
+        "6,InstanceOf,disjoint Triffid,disjoint animal\n"
+        "7,InstanceOf,disjoint Triffid,disjoint tree\n"
+        "8,MutuallyExclusiveWith,disjoint animal,disjoint plant\n"
+    )
+    return Ontology(data_file)
+
+
+def test_disjointness_is_propagated_down_the_hierarchy(ontology: Ontology) -> None:
+    store = ontology.store
+    plant = store.get_id("disjoint plant")
+
+    assert ontology.disjointness.get_disjoint_ids(store.get_id("disjoint Nemo")) == {
+        plant
+    }
+    assert not ontology.disjointness.get_disjoint_ids(store.get_id("disjoint tree"))
+    assert ontology.is_instance_of("disjoint Nemo", "disjoint tree") == (
+        QuestionResult.NO
+    )
+    assert ontology.is_instance_of("disjoint tree", "disjoint fish") == (
+        QuestionResult.DONT_KNOW
+    )
+
+
+def test_inconsistent_entities_are_reported(ontology: Ontology) -> None:
+    assert ontology.inconsistent_entities == {"disjoint plant": ["disjoint Triffid"]}
+    assert ontology.is_instance_of("disjoint Triffid", "disjoint plant") == (
+        QuestionResult.YES
+    )
+
+
+def test_disjointness_follows_edge_changes(ontology: Ontology) -> None:
+    ontology.remove_edge("MutuallyExclusiveWith", "disjoint animal", "disjoint plant")
+
+    assert ontology.is_instance_of("disjoint Nemo", "disjoint tree") == (
+        QuestionResult.DONT_KNOW
+    )
+
+    ontology.add_edge("MutuallyExclusiveWith", "disjoint organism", "disjoint tree")
+
+    assert ontology.is_instance_of("disjoint Nemo", "disjoint tree") == (
+        QuestionResult.NO
+    )
+    assert ontology.is_instance_of("disjoint Nemo", "disjoint plant") == (
+        QuestionResult.DONT_KNOW
+    )
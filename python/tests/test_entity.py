@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+
+from ontology.domain.edge_type import EdgeType
+from ontology.domain.ontology import Ontology
+from ontology.domain.relationship import Relationship
+from question_result import QuestionResult
+
+
+@pytest.fixture
+def ontology(tmp_path: Path) -> Ontology:
+    file_path = tmp_path / "ontology.csv"
+    file_path.write_text(
+        "ID,EDGE_TYPE,HEAD_ENTITY,TAIL_ENTITY\n"
+        "1,SubclassOf,dog,mammal\n"
+        "2,SubclassOf,mammal,animal\n"
+    )
+    return Ontology(file_path)
+
+
+def test_duplicate_relationships_are_skipped(ontology: Ontology) -> None:
+    dog = ontology.get_entity("dog")
+    mammal = ontology.get_entity("mammal")
+    animal = ontology.get_entity("animal")
+
+    dog.add_relationship(Relationship(dog, mammal, EdgeType.SUBCLASS_OF))
+    dog.add_relationship(Relationship(dog, mammal, EdgeType.SUBCLASS_OF, True))
+    dog.add_relationships(
+        [
+            Relationship(dog, mammal, EdgeType.SUBCLASS_OF),
+            Relationship(dog, animal, EdgeType.SUBCLASS_OF),
+            Relationship(dog, animal, EdgeType.SUBCLASS_OF),
+            Relationship(dog, animal, EdgeType.INSTANCE_OF),
+        ]
+    )
+
+    assert [str(relationship) for relationship in dog.get_relationships()] == [
+        "dog -- InstanceOf --> animal",
+        "dog -- SubclassOf --> mammal",
+        "dog -- SubclassOf --> animal",
+    ]
+    assert dog.has_relationship(Relationship(dog, animal, EdgeType.INSTANCE_OF))
+    assert dog == ontology.get_entity("dog")
+
+
+def test_inverse_edges_are_read_from_the_store(ontology: Ontology) -> None:
+    dog = ontology.get_entity("dog")
+    lassie = ontology.get_or_create_entity("Lassie")
+    furry = ontology.get_or_create_entity("furry")
+
+    lassie.add_relationship(Relationship(lassie, dog, EdgeType.INSTANCE_OF))
+    dog.add_relationship(Relationship(dog, furry, EdgeType.HAS_ATTRIBUTE))
+
+    assert dog.get_related_entities(EdgeType.HAS_INSTANCE) == [lassie]
+    assert furry.get_related_entities(EdgeType.ATTRIBUTE_OF) == [dog]
+    assert lassie.get_related_entities(EdgeType.INSTANCE_OF) == [dog]
+    assert dog.get_related_entities(EdgeType.SUPERCLASS_OF) == []
+    # No relationships are created for the inverse edges
+    assert dog.get_relationships(EdgeType.HAS_INSTANCE) == []
+    # Changes made through an entity are inferred from like any other edge change
+    assert ontology.has_attribute("Lassie", "furry") == QuestionResult.YES
+
+    lassie.remove_relationship(Relationship(lassie, dog, EdgeType.INSTANCE_OF))
+    assert dog.get_related_entities(EdgeType.HAS_INSTANCE) == []
+    assert ontology.has_attribute("Lassie", "furry") == QuestionResult.DONT_KNOW
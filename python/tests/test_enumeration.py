@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+from ontology.domain.edge_type import EdgeType
+from ontology.facade import OntologyFacade
+from question_result import QuestionResult
+
+
+@pytest.fixture
+def facade() -> OntologyFacade:
+    return OntologyFacade(Path("data/ontology.csv"))
+
+
+def get_yes_answers(facade: OntologyFacade, answer, target: str):
+    return {
+        name
+        for name in facade.ontology.store.names
+        if name != target and answer(name, target) == QuestionResult.YES
+    }
+
+
+@pytest.mark.parametrize("target", ["animal", "mammal", "dog", "plant", "Lassie"])
+def test_enumerations_match_the_yes_answers(
+    facade: OntologyFacade, target: str
+) -> None:
+    ontology = facade.ontology
+
+    assert set(facade.iter_instances(target)) == get_yes_answers(
+        facade, ontology.is_instance_of, target
+    )
+    assert set(facade.iter_subclasses(target)) == get_yes_answers(
+        facade, ontology.is_subclass_of, target
+    )
+
+
+@pytest.mark.parametrize(
+    "attribute", ["poisonous", "warm-blooded", "unknown attribute"]
+)
+def test_attribute_enumeration_matches_the_yes_answers(
+    facade: OntologyFacade, attribute: str
+) -> None:
+    assert set(facade.iter_entities_with_attribute(attribute)) == get_yes_answers(
+        facade, facade.ontology.has_attribute, attribute
+    )
+
+
+def test_pages_cover_every_result_once(facade: OntologyFacade) -> None:
+    everything = list(facade.iter_instances("animal"))
+    pages = [
+        list(facade.iter_instances("animal", limit=3, offset=offset))
+        for offset in range(0, len(everything), 3)
+    ]
+
+    assert len(everything) > 3
+    assert [name for page in pages for name in page] == everything
+    assert list(facade.iter_instances("animal", limit=0)) == []
+    assert list(facade.iter_instances("no such class")) == []
+
+
+def test_walk_can_be_narrowed_by_edge_type(facade: OntologyFacade) -> None:
+    direct = set(facade.iter_instances("dog", edge_types=[EdgeType.HAS_INSTANCE]))
+
+    assert "Lassie" in direct
+    assert direct <= set(facade.iter_instances("dog"))
+    assert "Springer" not in set(
+        facade.iter_instances("mammal", edge_types=[EdgeType.HAS_INSTANCE])
+    )
+
+
+def test_enumeration_sees_edge_changes(facade: OntologyFacade) -> None:
+    facade.add_edge("InstanceOf", "Rex", "dog")
+
+    assert "Rex" in set(facade.iter_instances("animal"))
@@ -0,0 +1,63 @@
+from itertools import islice
+from pathlib import Path
+
+from ontology.domain.ontology import Ontology
+from scripts.generate_ontology import OntologyGenerator, OntologyShape
+
+
+def test_hierarchy_has_the_requested_shape() -> None:
+    shape = OntologyShape(
+        depth=3,
+        branching_factor=4,
+        multiple_inheritance_rate=0.0,
+        instances=50,
+        attributes_per_class=0.0,
+        mutual_exclusion_density=0.0,
+    )
+    edges = list(OntologyGenerator(shape).iter_edges())
+
+    assert shape.num_classes == 1 + 4 + 16 + 64
+    assert sum(edge_type == "SubclassOf" for edge_type, _, _ in edges) == 84
+    assert ("SubclassOf", "class 84", "class 20") in edges
+    # Instances belong to leaf classes
+    assert all(
+        int(tail.split()[1]) >= 21
+        for edge_type, _, tail in edges
+        if edge_type == "InstanceOf"
+    )
+    assert len(edges) == 84 + 50
+
+
+def test_generation_is_seeded() -> None:
+    shape = OntologyShape(depth=3, instances=100)
+
+    assert list(OntologyGenerator(shape).iter_edges()) == list(
+        OntologyGenerator(shape).iter_edges()
+    )
+
+
+def test_hierarchy_is_acyclic_unless_cycles_are_injected(tmp_path: Path) -> None:
+    shape = OntologyShape(depth=3, multiple_inheritance_rate=0.5, instances=100)
+    file_path = tmp_path / "ontology.csv"
+
+    OntologyGenerator(shape).write(file_path)
+    assert Ontology(file_path).cycles == []
+
+    OntologyGenerator(OntologyShape(depth=3, instances=100, cycles=2)).write(file_path)
+    assert Ontology(file_path).cycles != []
+
+
+def test_write_streams_every_edge(tmp_path: Path) -> None:
+    file_path = tmp_path / "ontology.csv"
+
+    num_edges = OntologyGenerator(OntologyShape.for_edges(1_000)).write(file_path)
+
+    # The header, then one row per edge
+    assert len(file_path.read_text().splitlines()) == num_edges + 1
+    assert 900 <= num_edges <= 1_100
+
+
+def test_edges_are_generated_lazily() -> None:
+    shape = OntologyShape(depth=12, instances=10**9)
+
+    assert len(list(islice(OntologyGenerator(shape).iter_edges(), 10))) == 10
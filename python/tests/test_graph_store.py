@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import pytest
+
+from ontology.domain.edge_type import EdgeType
+from ontology.domain.graph_store import CsrAdjacency
+from ontology.domain.ontology import Ontology
+
+
+@pytest.fixture
+def ontology() -> Ontology:
+    return Ontology(Path("data/ontology.csv"))
+
+
+def test_csr_adjacency_from_edges() -> None:
+    adjacency = CsrAdjacency.from_edges([2, 0, 0, 2], [1, 2, 1, 0], num_nodes=3)
+
+    assert adjacency.neighbours(0) == [1, 2]
+    assert adjacency.neighbours(1) == []
+    assert adjacency.neighbours(2) == [0, 1]
+    assert adjacency.has_edge(2, 1)
+    assert not adjacency.has_edge(1, 2)
+    assert adjacency.transpose().neighbours(1) == [0, 2]
+
+
+def test_find_reachable_ids_gives_up_after_max_visited(ontology: Ontology) -> None:
+    store = ontology.store
+    animal = store.get_id("animal")
+    candidate_ids = [store.get_id("Lassie"), store.get_id("hemlock")]
+    descendant_edge_types = [EdgeType.HAS_INSTANCE, EdgeType.SUPERCLASS_OF]
+
+    assert store.find_reachable_ids([animal], descendant_edge_types, candidate_ids) == {
+        store.get_id("Lassie")
+    }
+    assert (
+        store.find_reachable_ids([animal], descendant_edge_types, candidate_ids, 2)
+        is None
+    )
+
+
+def test_store_partitions_edges_by_type(ontology: Ontology) -> None:
+    store = ontology.store
+    killer_whale = store.get_id("killer whale")
+
+    parents = store.neighbours(killer_whale, EdgeType.SUBCLASS_OF)
+    instances = store.neighbours(killer_whale, EdgeType.HAS_INSTANCE)
+
+    assert sorted(store.get_name(node_id) for node_id in parents) == [
+        "mammal",
+        "sea animal",
+    ]
+    assert sorted(store.get_name(node_id) for node_id in instances) == [
+        "Keiko",
+        "Luna the Whale",
+        "Springer",
+    ]
+    assert store.neighbours(killer_whale, EdgeType.INSTANCE_OF) == []
+
+
+def test_inverse_edges_are_not_materialised_as_relationships(
+    ontology: Ontology,
+) -> None:
+    killer_whale = ontology.get_entity("killer whale")
+
+    assert all(
+        relationship.edge_type.get_forward() is None
+        for entity in ontology.get_entities()
+        for relationship in entity.get_relationships()
+    )
+    assert sorted(
+        entity.name
+        for entity in killer_whale.get_related_entities(EdgeType.HAS_INSTANCE)
+    ) == sorted(ontology.get_related_entity_names("killer whale", "HasInstance"))
+
+
+def test_overlay_store_layers_names_and_rows(ontology: Ontology) -> None:
+    store = ontology.store
+    overlay = store.create_overlay()
+    dog, mammal = store.get_id("dog"), store.get_id("mammal")
+
+    robot_dog = overlay.get_or_create_id("robot dog")
+    overlay.add_edge(robot_dog, dog, EdgeType.SUBCLASS_OF)
+    store.get_or_create_id("cat")
+
+    assert robot_dog == len(store) - 1 == len(overlay) - 1
+    assert overlay.get_name(robot_dog) == "robot dog"
+    assert overlay.get_id("cat") is None
+    assert overlay.get_ids(["dog", "robot dog", "cat"]).tolist() == [dog, robot_dog, -1]
+    assert overlay.get_names()[-1] == "robot dog"
+    assert overlay.neighbours(dog, EdgeType.SUPERCLASS_OF) == [robot_dog]
+    assert store.neighbours(dog, EdgeType.SUPERCLASS_OF) == []
+    assert overlay.neighbours(dog, EdgeType.SUBCLASS_OF) == [mammal]
@@ -0,0 +1,46 @@
+from itertools import product
+from pathlib import Path
+
+import pytest
+
+from ontology.domain.ontology import Ontology
+from ontology.loader import CsvLoader
+from question_result import QuestionResult
+
+
+def test_materialized_answers_match_traversal() -> None:
+    data_file = Path("data/ontology.csv")
+    traversed = Ontology(data_file)
+    materialized = Ontology(data_file, materialize_closure=True)
+
+    for query, target in product(CsvLoader().load(data_file).names, repeat=2):
+        assert materialized.is_subclass_of(query, target) == traversed.is_subclass_of(
+            query, target
+        )
+        assert materialized.is_instance_of(query, target) == traversed.is_instance_of(
+            query, target
+        )
+        assert materialized.has_attribute(query, target) == traversed.has_attribute(
+            query, target
+        )
+
+
+@pytest.mark.parametrize("materialize_closure", [False, True])
+def test_cyclic_hierarchy(tmp_path: Path, materialize_closure: bool) -> None:
+    data_file = tmp_path / "ontology.csv"
+    data_file.write_text(
+        "ID,EDGE_TYPE,HEAD_ENTITY,TAIL_ENTITY\n"
+        "1,SubclassOf,cycle a,cycle b\n"
+        "2,SubclassOf,cycle b,cycle c\n"
+        "3,SubclassOf,cycle c,cycle a\n"
+        "4,InstanceOf,cycle instance,cycle c\n"
+        "5,HasAttribute,cycle b,cyclic\n"
+    )
+    ontology = Ontology(data_file, materialize_closure=materialize_closure)
+
+    assert [sorted(cycle) for cycle in ontology.cycles] == [
+        ["cycle a", "cycle b", "cycle c"]
+    ]
+    assert ontology.is_instance_of("cycle instance", "cycle b") == QuestionResult.YES
+    assert ontology.has_attribute("cycle instance", "cyclic") == QuestionResult.YES
+    assert ontology.is_subclass_of("cycle b", "cyclic") == QuestionResult.DONT_KNOW
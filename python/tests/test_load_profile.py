@@ -0,0 +1,79 @@
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from ontology.domain.ontology import Ontology
+from ontology.exceptions.ontology_exceptions import InvalidEdgeTypeException
+from ontology.load_profile import LoadProfiler
+
+
+def test_every_load_phase_is_timed() -> None:
+    ontology = Ontology(Path("data/ontology.csv"), "interval", materialize_closure=True)
+    profile = ontology.load_profile
+
+    assert [phase.name for phase in profile.phases] == [
+        "parse",
+        "graph_store",
+        "indexes",
+        "closure",
+        "reachability_index",
+    ]
+    assert profile.total_seconds == pytest.approx(
+        sum(phase.seconds for phase in profile.phases)
+    )
+    assert profile.get_phase("graph_store").allocated_blocks > 0
+    # Memory is only measured when asked for
+    assert "allocated_bytes" not in profile.to_dict()["graph_store"]
+
+
+def test_memory_is_profiled_and_logged(caplog: pytest.LogCaptureFixture) -> None:
+    with caplog.at_level("INFO"):
+        ontology = Ontology(Path("data/ontology.csv"), profile_memory=True)
+
+    graph_store = ontology.load_profile.get_phase("graph_store")
+    assert graph_store.allocated_bytes > 0
+    assert graph_store.peak_bytes >= graph_store.allocated_bytes
+    assert graph_store.objects > 0
+    assert "Load phase graph_store" in caplog.text
+
+
+def test_memory_tracing_stops_when_loading_fails(tmp_path: Path) -> None:
+    file_path = tmp_path / "ontology.csv"
+    file_path.write_text("ID,EDGE_TYPE,HEAD_ENTITY,TAIL_ENTITY\n1,PartOf,tail,dog\n")
+
+    with pytest.raises(InvalidEdgeTypeException):
+        Ontology(file_path, profile_memory=True)
+    assert not tracemalloc.is_tracing()
+
+    base = Ontology(Path("data/ontology.csv"))
+    with pytest.raises(InvalidEdgeTypeException):
+        Ontology.from_base(base, file_path, profile_memory=True)
+    assert not tracemalloc.is_tracing()
+
+
+def test_snapshot_loading_is_profiled(tmp_path: Path) -> None:
+    Ontology(Path("data/ontology.csv")).save_snapshot(tmp_path / "ontology.snap")
+
+    ontology = Ontology.from_snapshot(tmp_path / "ontology.snap")
+
+    assert list(ontology.load_profile.to_dict()) == [
+        "snapshot",
+        "graph_store",
+        "indexes",
+    ]
+
+
+def test_profiler_leaves_tracing_it_did_not_start() -> None:
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        profiler = LoadProfiler(trace_memory=True)
+        with profiler.phase("phase"):
+            pass
+        profiler.stop()
+
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
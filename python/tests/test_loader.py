@@ -0,0 +1,151 @@
+from pathlib import Path
+from typing import Set, Tuple
+
+import pytest
+
+from ontology.domain.edge_type import EdgeType
+from ontology.domain.ontology import Ontology
+from ontology.exceptions.ontology_exceptions import InvalidEdgeTypeException
+from ontology.loader import EDGE_TYPES, CsvLoader, EdgeTable
+from question_result import QuestionResult
+from scripts.generate_ontology import OntologyGenerator, OntologyShape
+
+HEADER = "ID,EDGE_TYPE,HEAD_ENTITY,TAIL_ENTITY\n"
+
+
+def get_edges(edge_table: EdgeTable) -> Set[Tuple[int, str, str]]:
+    names = edge_table.names
+    return {
+        (int(edge_type), names[head_id], names[tail_id])
+        for edge_type, head_id, tail_id in zip(
+            edge_table.edge_types, edge_table.head_ids, edge_table.tail_ids
+        )
+    }
+
+
+def write_rows(file_path: Path, rows: str) -> Path:
+    file_path.write_text(HEADER + rows)
+    return file_path
+
+
+@pytest.fixture(scope="module")
+def ontology_file(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    file_path = tmp_path_factory.mktemp("loader") / "ontology.csv"
+    OntologyGenerator(OntologyShape.for_edges(5_000)).write(file_path)
+    return file_path
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_partitioned_load_matches_sequential_load(
+    ontology_file: Path, workers: int
+) -> None:
+    sequential = CsvLoader().load(ontology_file)
+    partitioned = CsvLoader(workers=workers, partition_bytes=10_000).load(ontology_file)
+
+    assert len(CsvLoader(partition_bytes=10_000).get_partitions(ontology_file)) > 10
+    assert sorted(partitioned.names) == sorted(sequential.names)
+    assert len(partitioned) == len(sequential)
+    assert get_edges(partitioned) == get_edges(sequential)
+
+
+def test_partitions_split_on_line_boundaries(tmp_path: Path) -> None:
+    file_path = tmp_path / "ontology.csv"
+    file_path.write_text(
+        HEADER + "".join(f"{i},InstanceOf,entity {i},class\n" for i in range(100))
+    )
+
+    for partition_bytes in (1, 7, 30, 10_000):
+        loader = CsvLoader(partition_bytes=partition_bytes)
+        edge_tables = [
+            loader.parse_partition(partition)
+            for partition in loader.get_partitions(file_path)
+        ]
+
+        assert sum(len(edge_table) for edge_table in edge_tables) == 100
+        assert get_edges(EdgeTable.merge(edge_tables)) == get_edges(
+            CsvLoader().load(file_path)
+        )
+
+
+def test_load_directory_of_shards(tmp_path: Path, ontology_file: Path) -> None:
+    lines = ontology_file.read_text().splitlines(keepends=True)
+    shard_dir = tmp_path / "shards"
+    shard_dir.mkdir()
+    for shard in range(3):
+        (shard_dir / f"part-{shard}.csv").write_text(
+            lines[0] + "".join(lines[1 + shard :: 3])
+        )
+    (shard_dir / "empty.csv").write_text(lines[0])
+
+    sharded = CsvLoader(workers=2).load(shard_dir)
+
+    assert get_edges(sharded) == get_edges(CsvLoader().load(ontology_file))
+    ontology = Ontology(shard_dir, load_workers=2)
+    assert ontology.is_instance_of("Lassie", "class 0") == QuestionResult.DONT_KNOW
+    instance = next(ontology.iter_instances("class 0"))
+    assert ontology.is_instance_of(instance, "class 0") == QuestionResult.YES
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 100])
+def test_chunked_load_matches_single_chunk(tmp_path: Path, chunk_size: int) -> None:
+    file_path = write_rows(
+        tmp_path / "ontology.csv",
+        "".join(f"{i},SubclassOf,class {i % 7},class {i % 3}\n" for i in range(20)),
+    )
+
+    chunked = CsvLoader(chunk_size=chunk_size).load(file_path)
+
+    assert chunked.names == CsvLoader().load(file_path).names
+    assert get_edges(chunked) == get_edges(CsvLoader().load(file_path))
+
+
+def test_names_are_interned_in_order_of_first_appearance(tmp_path: Path) -> None:
+    file_path = write_rows(
+        tmp_path / "ontology.csv",
+        "1,InstanceOf,Lassie,dog\n"
+        "2,SubclassOf,dog,mammal\n"
+        "3,InstanceOf,Rex,dog\n"
+        "4,HasAttribute,dog,hairy\n",
+    )
+
+    edge_table = CsvLoader(chunk_size=2).load(file_path)
+
+    assert edge_table.names == ["Lassie", "dog", "mammal", "Rex", "hairy"]
+    assert edge_table.head_ids.tolist() == [0, 1, 3, 1]
+    assert edge_table.tail_ids.tolist() == [1, 2, 1, 4]
+    assert [EDGE_TYPES[code] for code in edge_table.edge_types] == [
+        EdgeType.INSTANCE_OF,
+        EdgeType.SUBCLASS_OF,
+        EdgeType.INSTANCE_OF,
+        EdgeType.HAS_ATTRIBUTE,
+    ]
+
+
+def test_repeated_edges_are_dropped(tmp_path: Path) -> None:
+    file_path = write_rows(
+        tmp_path / "ontology.csv",
+        "1,InstanceOf,Lassie,dog\n"
+        "2,SubclassOf,dog,mammal\n"
+        "3,InstanceOf,Lassie,dog\n"
+        "4,HasAttribute,Lassie,dog\n"
+        "5,SubclassOf,dog,mammal\n",
+    )
+
+    edge_table = CsvLoader(chunk_size=2).load(file_path)
+
+    assert len(edge_table) == 3
+    assert list(edge_table.iter_edges()) == [
+        (EdgeType.INSTANCE_OF, 0, 1),
+        (EdgeType.SUBCLASS_OF, 1, 2),
+        (EdgeType.HAS_ATTRIBUTE, 0, 1),
+    ]
+
+
+def test_invalid_edge_type_is_rejected(tmp_path: Path) -> None:
+    file_path = write_rows(
+        tmp_path / "ontology.csv",
+        "1,InstanceOf,Lassie,dog\n2,PartOf,tail,dog\n",
+    )
+
+    with pytest.raises(InvalidEdgeTypeException):
+        CsvLoader(chunk_size=1).load(file_path)
@@ -0,0 +1,142 @@
+import tracemalloc
+from itertools import islice
+from pathlib import Path
+
+import pytest
+
+from ontology.domain.edge_type import EdgeType
+from ontology.domain.ontology import Ontology
+from ontology.exceptions.ontology_exceptions import ReadOnlyOntologyException
+from question_result import QuestionResult
+from scripts.generate_ontology import OntologyGenerator, OntologyShape
+
+BASE_FILE = Path("data/ontology.csv")
+OVERLAY_FILE = Path("data/ontology-large.csv")
+
+
+@pytest.fixture
+def tenant_file(tmp_path: Path) -> Path:
+    tenant_file = tmp_path / "tenant.csv"
+    tenant_file.write_text(
+        "ID,EDGE_TYPE,HEAD_ENTITY,TAIL_ENTITY\n"
+        "1,InstanceOf,Rex,dog\n"
+        "2,SubclassOf,robot dog,dog\n"
+        "3,HasAttribute,robot dog,metallic\n"
+        "4,InstanceOf,Robo,robot dog\n"
+        "5,MutuallyExclusiveWith,mammal,robot\n"
+        "6,InstanceOf,Robo,robot\n"
+    )
+    return tenant_file
+
+
+def test_ontologies_keep_their_own_entities() -> None:
+    small = Ontology(BASE_FILE)
+    large = Ontology(OVERLAY_FILE)
+
+    assert small.get_entity("grenadine") is None
+    assert large.get_entity("Lassie") is None
+    assert small.is_instance_of("grenadine", "drink") == QuestionResult.DONT_KNOW
+
+
+@pytest.mark.parametrize("materialize_closure", [False, True])
+def test_overlay_answers_like_the_files_loaded_together(
+    tmp_path: Path, materialize_closure: bool
+) -> None:
+    combined_file = tmp_path / "combined.csv"
+    combined_file.write_text(
+        BASE_FILE.read_text() + "".join(OVERLAY_FILE.open().readlines()[1:])
+    )
+    combined = Ontology(combined_file, materialize_closure=materialize_closure)
+    overlay = Ontology.from_base(
+        Ontology(BASE_FILE, materialize_closure=materialize_closure), OVERLAY_FILE
+    )
+
+    names = combined.store.get_names()
+    assert sorted(overlay.store.get_names()) == sorted(names)
+    assert overlay.cycles == combined.cycles
+    assert overlay.inconsistent_entities == combined.inconsistent_entities
+    for query in names[::7]:
+        for target in names[::5]:
+            for ask in ("is_instance_of", "is_subclass_of", "has_attribute"):
+                assert getattr(overlay, ask)(query, target) == getattr(combined, ask)(
+                    query, target
+                ), (ask, query, target)
+
+
+def test_tenants_share_the_base_graph_in_isolation(tenant_file: Path) -> None:
+    base = Ontology(BASE_FILE)
+    tenant = Ontology.from_base(base, tenant_file)
+    other_tenant = Ontology.from_base(base, OVERLAY_FILE)
+
+    for edge_type in EdgeType:
+        assert (
+            tenant.store.adjacency[edge_type].targets
+            is base.store.adjacency[edge_type].targets
+        )
+    assert tenant.is_instance_of("Robo", "animal") == QuestionResult.YES
+    assert tenant.has_attribute("Robo", "metallic") == QuestionResult.YES
+    assert tenant.is_instance_of("Lassie", "robot") == QuestionResult.NO
+    assert tenant.inconsistent_entities == {"robot": ["Robo"]}
+    assert tenant.get_entity("Lassie").node_id == base.get_entity("Lassie").node_id
+
+    for ontology in (base, other_tenant):
+        assert ontology.is_instance_of("Robo", "animal") == QuestionResult.DONT_KNOW
+        assert ontology.is_instance_of("Lassie", "robot") == QuestionResult.DONT_KNOW
+        assert ontology.inconsistent_entities == {}
+    assert len(base.store) + 5 == len(tenant.store)
+    assert base.store.get_id("Robo") is None
+
+
+def test_overlay_entities_are_views_of_the_overlay(tenant_file: Path) -> None:
+    base = Ontology(BASE_FILE)
+    tenant = Ontology.from_base(base, tenant_file)
+
+    rex = tenant.get_entity("Rex")
+    dog = tenant.get_entity("dog")
+
+    assert rex is not None and rex.ontology is tenant
+    assert rex in dog.get_related_entities(EdgeType.HAS_INSTANCE)
+    assert tenant.get_entity("Lassie") in dog.get_related_entities(
+        EdgeType.HAS_INSTANCE
+    )
+    assert {entity.name for entity in tenant.get_entities()} == set(
+        tenant.store.get_names()
+    )
+    assert base.get_entity("Rex") is None
+    assert "Rex" not in {
+        entity.name
+        for entity in base.get_entity("dog").get_related_entities(EdgeType.HAS_INSTANCE)
+    }
+
+
+def test_overlay_changes_stay_in_the_overlay(tenant_file: Path) -> None:
+    base = Ontology(BASE_FILE)
+    tenant = Ontology.from_base(base, tenant_file)
+
+    assert tenant.remove_edge("SubclassOf", "dog", "mammal")
+    assert tenant.add_edge("InstanceOf", "Lassie", "robot dog")
+
+    assert tenant.is_instance_of("Lassie", "mammal") == QuestionResult.DONT_KNOW
+    assert tenant.has_attribute("Lassie", "metallic") == QuestionResult.YES
+    assert base.is_instance_of("Lassie", "mammal") == QuestionResult.YES
+    assert base.has_attribute("Lassie", "metallic") == QuestionResult.DONT_KNOW
+    with pytest.raises(ReadOnlyOntologyException):
+        base.add_edge("InstanceOf", "Lassie", "robot dog")
+
+
+def test_overlays_grow_with_their_own_size(tmp_path: Path, tenant_file: Path) -> None:
+    base_file = tmp_path / "base.csv"
+    OntologyGenerator(OntologyShape.for_edges(20_000)).write(base_file)
+
+    tracemalloc.start()
+    try:
+        base = Ontology(base_file)
+        base_bytes, _ = tracemalloc.get_traced_memory()
+        tenants = [Ontology.from_base(base, tenant_file) for _ in range(5)]
+        tenant_bytes = (tracemalloc.get_traced_memory()[0] - base_bytes) / len(tenants)
+    finally:
+        tracemalloc.stop()
+
+    assert tenant_bytes < base_bytes / 50
+    instance = next(islice(base.iter_instances("class 0"), 5, None))
+    assert tenants[0].is_instance_of(instance, "class 0") == QuestionResult.YES
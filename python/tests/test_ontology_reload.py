@@ -0,0 +1,101 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from ontology.answer_cache import AnswerCache
+from ontology.facade import OntologyFacade
+from question import Question
+from question_result import QuestionResult
+
+HEADER = "ID,EDGE_TYPE,HEAD_ENTITY,TAIL_ENTITY\n"
+
+
+@pytest.fixture
+def data_file(tmp_path: Path) -> Path:
+    data_file = tmp_path / "ontology.csv"
+    data_file.write_text(
+        HEADER + "1,SubclassOf,dog,mammal\n" "2,InstanceOf,Lassie,dog\n"
+    )
+    return data_file
+
+
+def add_edges(data_file: Path, *edges: str) -> None:
+    data_file.write_text(data_file.read_text() + "".join(f"{edge}\n" for edge in edges))
+    # Make the change visible to the watcher even on file systems with coarse modification times
+    stat = data_file.stat()
+    os.utime(data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def ask(facade: OntologyFacade, question: str) -> QuestionResult:
+    return facade.process_question(Question.from_string(question))
+
+
+def test_reload_swaps_in_the_new_ontology(data_file: Path) -> None:
+    facade = OntologyFacade(data_file, answer_cache=AnswerCache(capacity=10))
+    previous = facade.ontology
+    assert ask(facade, "is Lassie an animal?") == QuestionResult.DONT_KNOW
+
+    add_edges(data_file, "3,SubclassOf,mammal,animal")
+    ontology = facade.reload()
+
+    assert facade.ontology is ontology is not previous
+    assert ask(facade, "is Lassie an animal?") == QuestionResult.YES
+    assert ontology.answer_cache.capacity == 10
+    # Questions already holding the previous ontology finish against it
+    assert previous.is_instance_of("Lassie", "animal") == QuestionResult.DONT_KNOW
+
+
+def test_reload_warms_up_the_new_cache(data_file: Path) -> None:
+    facade = OntologyFacade(data_file)
+    questions = [
+        Question.from_string(question)
+        for question in ("is Lassie a mammal?", "is dog a mammal?", "is Lassie a dog?")
+    ]
+    facade.process_questions(questions)
+
+    facade.reload(warm_up=2)
+
+    assert facade.get_answer_cache_stats().entries == 2
+    assert facade.process_questions(questions) == [QuestionResult.YES] * 3
+    assert facade.get_answer_cache_stats().hits == 2
+
+
+def test_failed_reload_keeps_the_current_ontology(
+    data_file: Path, tmp_path: Path
+) -> None:
+    facade = OntologyFacade(data_file)
+    ontology = facade.ontology
+
+    future = facade.reload_in_background(tmp_path / "missing.csv")
+
+    with pytest.raises(FileNotFoundError):
+        future.result()
+    assert facade.ontology is ontology
+    assert ask(facade, "is Lassie a mammal?") == QuestionResult.YES
+    facade.close()
+
+
+def test_watch_reloads_a_changed_file(data_file: Path) -> None:
+    facade = OntologyFacade(data_file)
+    facade.watch(interval_seconds=0.05)
+    try:
+        add_edges(data_file, "3,SubclassOf,mammal,animal")
+        deadline = time.monotonic() + 10
+        while ask(facade, "is Lassie an animal?") != QuestionResult.YES:
+            assert time.monotonic() < deadline
+            facade.clear_answer_cache()
+            time.sleep(0.05)
+    finally:
+        facade.close()
+
+
+def test_reload_in_a_subprocess(data_file: Path) -> None:
+    facade = OntologyFacade(data_file, materialize_closure=True)
+    add_edges(data_file, "3,SubclassOf,mammal,animal")
+
+    ontology = facade.reload(in_subprocess=True)
+
+    assert ontology.store.closure
+    assert ask(facade, "is Lassie an animal?") == QuestionResult.YES
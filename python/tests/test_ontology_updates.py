@@ -0,0 +1,144 @@
+from pathlib import Path
+
+import pytest
+
+from ontology.domain.edge_type import EdgeType
+from ontology.domain.ontology import Ontology
+from question_result import QuestionResult
+
+
+@pytest.fixture
+def data_file(tmp_path: Path) -> Path:
+    data_file = tmp_path / "ontology.csv"
+    data_file.write_text(
+        "ID,EDGE_TYPE,HEAD_ENTITY,TAIL_ENTITY\n"
+        "1,SubclassOf,update bird,update animal\n"
+        "2,SubclassOf,update penguin,update bird\n"
+        "3,InstanceOf,update Pingu,update penguin\n"
+        "4,HasAttribute,update bird,update feathered\n"
+        "5,SubclassOf,update plant,update organism\n"
+    )
+    return data_file
+
+
+@pytest.fixture(params=[False, True], ids=["traversal", "materialized"])
+def ontology(data_file: Path, request: pytest.FixtureRequest) -> Ontology:
+    return Ontology(data_file, materialize_closure=request.param)
+
+
+def test_add_edge(ontology: Ontology) -> None:
+    assert ontology.is_instance_of("update Pingu", "update organism") == (
+        QuestionResult.DONT_KNOW
+    )
+    assert ontology.has_attribute("update Pingu", "update alive") == (
+        QuestionResult.DONT_KNOW
+    )
+
+    assert ontology.add_edge("SubclassOf", "update animal", "update organism")
+    assert ontology.add_edge("HasAttribute", "update organism", "update alive")
+    assert not ontology.add_edge("SubclassOf", "update animal", "update organism")
+
+    assert ontology.is_instance_of("update Pingu", "update organism") == (
+        QuestionResult.YES
+    )
+    assert ontology.is_subclass_of("update penguin", "update organism") == (
+        QuestionResult.YES
+    )
+    assert ontology.has_attribute("update Pingu", "update alive") == (
+        QuestionResult.YES
+    )
+    assert ontology.has_attribute("update plant", "update alive") == (
+        QuestionResult.YES
+    )
+
+
+def test_remove_edge(ontology: Ontology) -> None:
+    assert ontology.is_instance_of("update Pingu", "update animal") == (
+        QuestionResult.YES
+    )
+    assert ontology.has_attribute("update Pingu", "update feathered") == (
+        QuestionResult.YES
+    )
+
+    assert ontology.remove_edge("SubclassOf", "update penguin", "update bird")
+    assert not ontology.remove_edge("SubclassOf", "update penguin", "update bird")
+
+    assert ontology.is_instance_of("update Pingu", "update animal") == (
+        QuestionResult.DONT_KNOW
+    )
+    assert ontology.has_attribute("update Pingu", "update feathered") == (
+        QuestionResult.DONT_KNOW
+    )
+    assert ontology.is_subclass_of("update bird", "update animal") == (
+        QuestionResult.YES
+    )
+
+
+def test_attribute_edge_only_evicts_answers_about_the_attribute(
+    ontology: Ontology,
+) -> None:
+    kept = [
+        (EdgeType.INSTANCE_OF, "update Pingu", "update animal"),
+        (EdgeType.HAS_ATTRIBUTE, "update Pingu", "update feathered"),
+    ]
+    for edge_type, query, target in kept:
+        assert ontology.get_answers(edge_type, [query], target) == [QuestionResult.YES]
+    assert ontology.has_attribute("update Pingu", "update flightless") == (
+        QuestionResult.DONT_KNOW
+    )
+    assert ontology.is_instance_of("update flightless", "update flightless") == (
+        QuestionResult.DONT_KNOW
+    )
+
+    assert ontology.add_edge("HasAttribute", "update penguin", "update flightless")
+
+    assert all(ontology.answer_cache.get(key) == QuestionResult.YES for key in kept)
+    assert ontology.has_attribute("update Pingu", "update flightless") == (
+        QuestionResult.YES
+    )
+    assert ontology.is_instance_of("update flightless", "update flightless") == (
+        QuestionResult.YES
+    )
+
+
+@pytest.mark.parametrize("reachability_index", ["interval", "bitset"])
+def test_attribute_edge_keeps_reachability_indexes(
+    data_file: Path, reachability_index: str
+) -> None:
+    ontology = Ontology(data_file)
+    ontology.build_reachability_indexes(reachability_index)
+    ancestor_index = ontology.ancestor_index
+
+    assert ontology.add_edge("HasAttribute", "update penguin", "update flightless")
+
+    assert ontology.ancestor_index is ancestor_index
+    assert ontology.has_attribute("update Pingu", "update flightless") == (
+        QuestionResult.YES
+    )
+
+    # An entity created by the edge is not covered by the indexes
+    assert ontology.add_edge("HasAttribute", "update cat", "update furry")
+
+    assert ontology.is_instance_of("update cat", "update animal") == (
+        QuestionResult.DONT_KNOW
+    )
+    assert ontology.is_subclass_of("update penguin", "update furry") == (
+        QuestionResult.DONT_KNOW
+    )
+    assert ontology.has_attribute("update cat", "update furry") == (QuestionResult.YES)
+    assert ontology.is_instance_of("update Pingu", "update animal") == (
+        QuestionResult.YES
+    )
+    assert ontology.ancestor_index is ancestor_index
+
+
+def test_mutually_exclusive_edge(ontology: Ontology) -> None:
+    assert ontology.is_instance_of("update Pingu", "update plant") == (
+        QuestionResult.DONT_KNOW
+    )
+
+    ontology.add_edge("MutuallyExclusiveWith", "update animal", "update plant")
+
+    assert ontology.is_instance_of("update Pingu", "update plant") == (
+        QuestionResult.NO
+    )
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from parallel_question_processor import ParallelQuestionProcessor
+from question_processor import QuestionProcessor
+
+
+def test_parallel_results_match_and_keep_order() -> None:
+    data_file = Path("data/ontology.csv")
+    entities = ["Lassie", "dog", "Springer", "hemlock", "unknown thing"]
+    targets = ["animal", "mammal", "plant", "tree", "four-legged", "aquatic"]
+    questions = [
+        template.format(entity, target)
+        for entity in entities
+        for target in targets
+        for template in (
+            "is {} a {}?",
+            "is {} a type of {}?",
+            "is {} considered to be {}?",
+        )
+    ]
+    questions.insert(7, "am I an instance of stupid?")
+
+    expected = QuestionProcessor(data_file).process_many(questions)
+
+    with ParallelQuestionProcessor(data_file, workers=2, chunk_size=8) as processor:
+        assert processor.process_many(questions) == expected
+        assert processor.process_many([]) == []
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import pytest
+
+from ontology.domain.edge_type import EdgeType
+from ontology.query_metrics import LatencyHistogram, QueryMetrics
+from question_processor import QuestionProcessor
+from question_result import QuestionResult
+
+
+@pytest.fixture
+def question_processor() -> QuestionProcessor:
+    return QuestionProcessor(Path("data/ontology.csv"), metrics=QueryMetrics())
+
+
+def test_counters_are_recorded_per_question_type(
+    question_processor: QuestionProcessor,
+) -> None:
+    assert question_processor.process("is Lassie an animal?") == QuestionResult.YES
+    assert question_processor.process("is Lassie an animal?") == QuestionResult.YES
+    assert question_processor.process("is Lassie a plant?") == QuestionResult.NO
+    assert question_processor.process("what is Lassie?") == QuestionResult.INVALID
+
+    snapshot = question_processor.ontology_facade.get_metrics_snapshot()
+    instance_of = snapshot["INSTANCE_OF"]
+    assert instance_of["questions"] == 3
+    assert instance_of["answer_cache_hits"] == 1
+    assert instance_of["answer_cache_misses"] == 2
+    assert instance_of["nodes_visited"] > 0
+    assert instance_of["edges_scanned"] > 0
+    assert instance_of["mutual_exclusion_checks"] == 1
+    assert instance_of["latency"]["count"] == 3
+    assert snapshot["INVALID"]["questions"] == 1
+
+
+def test_batches_are_counted_per_question(
+    question_processor: QuestionProcessor,
+) -> None:
+    question_processor.process_many(
+        ["is Lassie a type of dog?", "is dog a type of animal?", "is dog an?"]
+    )
+
+    snapshot = question_processor.ontology_facade.get_metrics_snapshot()
+    assert snapshot["SUBCLASS_OF"]["questions"] == 2
+    assert snapshot["SUBCLASS_OF"]["latency"]["count"] == 2
+
+
+def test_disabled_metrics_record_nothing(
+    question_processor: QuestionProcessor,
+) -> None:
+    facade = question_processor.ontology_facade
+    facade.disable_metrics()
+
+    question_processor.process("is Lassie an animal?")
+
+    assert facade.get_metrics_snapshot() == {}
+    assert "neighbours" not in vars(facade.ontology.store)
+
+    metrics = facade.enable_metrics()
+    facade.ontology.add_edge(EdgeType.SUBCLASS_OF, "dog", "pet")
+    assert metrics.get_snapshot()["EDGE_CHANGE"]["nodes_visited"] > 0
+
+
+def test_metrics_dump(question_processor: QuestionProcessor, tmp_path: Path) -> None:
+    question_processor.process("is hemlock considered to be poisonous?")
+    question_processor.metrics.dump(tmp_path / "metrics.json")
+
+    assert '"HAS_ATTRIBUTE"' in (tmp_path / "metrics.json").read_text()
+
+
+def test_latency_histogram_buckets() -> None:
+    histogram = LatencyHistogram((10, 100))
+    histogram.record(0.000_005)
+    histogram.record(0.000_050, count=2)
+    histogram.record(1.0)
+
+    assert histogram.counts == [1, 2, 1]
+    assert histogram.to_dict()["count"] == 4
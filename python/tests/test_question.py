@@ -0,0 +1,69 @@
+import random
+import re
+
+import pytest
+
+from question import Question, QuestionParsingException, QuestionType
+
+# The original one-regex-per-type parser, which the single-pass parser must agree with
+REGEX_PATTERNS = {
+    QuestionType.SUBCLASS_OF: re.compile(r"is (.*) a type of (.*)\?"),
+    QuestionType.INSTANCE_OF: re.compile(r"is (.*) (?:a|an) (.*)\?"),
+    QuestionType.HAS_ATTRIBUTE: re.compile(r"is (.*) considered to be (.*)\?"),
+}
+
+
+def parse_with_regexes(question: str):
+    for question_type, pattern in REGEX_PATTERNS.items():
+        match = pattern.fullmatch(question)
+        if match is not None:
+            return Question(question_type, match.group(1), match.group(2))
+
+    return None
+
+
+def parse(question: str):
+    try:
+        return Question.from_string(question)
+    except QuestionParsingException:
+        return None
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "is Lassie a dog?",
+        "is an apple an apple?",
+        "is baby grand a type of musical instrument?",
+        "is Cheddar considered to be hard?",
+        "is Cheddar considered to be a cheese?",
+        "is a type of a type of a type of?",
+        "is a an a?",
+        "is  a ?",
+        "is ?",
+        "is Lassie a dog",
+        "is Lassie\na dog?",
+        "is Lassie a dog??",
+    ],
+)
+def test_parser_agrees_with_regexes(question: str) -> None:
+    assert parse(question) == parse_with_regexes(question)
+
+
+def test_parser_agrees_with_regexes_on_random_questions() -> None:
+    random_generator = random.Random(0)
+    tokens = ["is", "a", "an", "type", "of", "considered", "to", "be", "dog", "?"]
+    for _ in range(5_000):
+        words = [random_generator.choice(tokens) for _ in range(8)]
+        question = "is " + " ".join(words) + random_generator.choice(["?", ""])
+        assert parse(question) == parse_with_regexes(question)
+
+
+def test_parse_many() -> None:
+    questions = iter(["is Lassie a dog?\n", "what?\n", "is dog a type of animal?"])
+
+    assert list(Question.parse_many(questions)) == [
+        Question(QuestionType.INSTANCE_OF, "Lassie", "dog"),
+        None,
+        Question(QuestionType.SUBCLASS_OF, "dog", "animal"),
+    ]
@@ -126,3 +126,33 @@ def test_mutually_exclusive_with_condition(
     question_processor: QuestionProcessor,
 ) -> None:
     assert expected_result == question_processor.process(question)
+
+
+# The walk down from each target gives up at once with no budget, and never with a large one
+@pytest.mark.parametrize("walk_nodes_per_query", [0, 1_000_000])
+def test_process_many_matches_process(
+    question_processor: QuestionProcessor,
+    monkeypatch: pytest.MonkeyPatch,
+    walk_nodes_per_query: int,
+) -> None:
+    monkeypatch.setattr(Ontology, "TARGET_WALK_NODES_PER_QUERY", walk_nodes_per_query)
+    entities = ["Lassie", "dog", "Springer", "hemlock", "unknown thing"]
+    targets = ["animal", "mammal", "plant", "tree", "four-legged", "unknown class"]
+    questions = [
+        template.format(entity, target)
+        for entity in entities
+        for target in targets
+        for template in (
+            "is {} a {}?",
+            "is {} a type of {}?",
+            "is {} considered to be {}?",
+        )
+    ]
+    questions.append("am I an instance of stupid?")
+
+    expected = [question_processor.process(question) for question in questions]
+    question_processor.ontology_facade.clear_answer_cache()
+
+    assert question_processor.process_many(questions) == expected
+    assert question_processor.process_many(iter(questions)) == expected
+    assert question_processor.process_many([]) == []
@@ -2,14 +2,17 @@ from pathlib import Path
 
 import pytest
 
+from ontology.domain.ontology import Ontology
 from question_processor import QuestionProcessor
 from question_result import QuestionResult
 
 
 @pytest.fixture
-# The path returned will be used as the data file for all tests in this scope
-def question_processor_data_file() -> Path:
-    return Path("data/ontology-large.csv")
+def question_processor() -> QuestionProcessor:
+    # The large ontology extends the small one, so it is layered on it
+    return QuestionProcessor(
+        Path("data/ontology-large.csv"), base=Ontology(Path("data/ontology.csv"))
+    )
 
 
 def test_baby_grand_is_a_type_of_musical_instrument(
@@ -0,0 +1,32 @@
+from pathlib import Path
+
+import pytest
+
+from question_runner import main
+
+
+def test_runner_streams_answers_in_order(
+    tmp_path: Path, capsys: pytest.CaptureFixture
+) -> None:
+    questions_file = tmp_path / "questions.txt"
+    questions_file.write_text(
+        "is Lassie an animal?\n"
+        "is Lassie a plant?\n"
+        "what is Lassie?\n"
+        "is hemlock considered to be poisonous?\n"
+        "is Lassie a pet?\n"
+    )
+
+    main(["data/ontology.csv", str(questions_file), "--batch-size", "2", "--echo"])
+
+    output = capsys.readouterr()
+    assert output.out.splitlines() == [
+        "is Lassie an animal?\tYES",
+        "is Lassie a plant?\tNO",
+        "what is Lassie?\tINVALID",
+        "is hemlock considered to be poisonous?\tYES",
+        "is Lassie a pet?\tDONT_KNOW",
+    ]
+    assert "questions=5, yes=2, no=1, dont_know=1, invalid=1" in output.err
+    assert "batches=3" in output.err
+    assert "batch_p50_ms=" in output.err
@@ -0,0 +1,111 @@
+import asyncio
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from question_processor import QuestionProcessor
+from question_result import QuestionResult
+from question_server import QuestionServer
+
+
+@pytest.fixture
+# The path returned will be used as the data file for all tests in this scope
+def question_processor_data_file() -> Path:
+    return Path("data/ontology.csv")
+
+
+def test_identical_in_flight_questions_are_coalesced(
+    question_processor: QuestionProcessor,
+) -> None:
+    server = QuestionServer(question_processor)
+
+    async def ask() -> List[QuestionResult]:
+        try:
+            return await asyncio.gather(
+                *[server.answer("is Lassie an animal?") for _ in range(5)],
+                server.answer("is Lassie a plant?"),
+                server.answer("is Lassie a plantt"),
+            )
+        finally:
+            await server.close()
+
+    assert asyncio.run(ask()) == [QuestionResult.YES] * 5 + [
+        QuestionResult.NO,
+        QuestionResult.INVALID,
+    ]
+    stats = server.get_stats()
+    assert (stats["requests"], stats["coalesced"], stats["batches"]) == (7, 4, 1)
+    assert stats["p50_ms"] <= stats["p99_ms"]
+
+
+def test_serves_pipelined_questions_in_order(
+    question_processor: QuestionProcessor,
+) -> None:
+    server = QuestionServer(question_processor, max_batch_size=2, max_pipelined=2)
+    questions = [
+        "is Lassie an animal?",
+        "is Lassie a plant?",
+        "is Lassie a pet?",
+        "is hemlock considered to be poisonous?",
+        "hello",
+    ]
+
+    async def client(port: int) -> List[str]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write("".join(f"{question}\n" for question in questions).encode())
+        await writer.drain()
+        answers = [(await reader.readline()).decode().strip() for _ in questions]
+        writer.close()
+        return answers
+
+    async def run() -> List[List[str]]:
+        tcp_server = await asyncio.start_server(
+            server.handle_connection, "127.0.0.1", 0
+        )
+        port = tcp_server.sockets[0].getsockname()[1]
+        try:
+            return await asyncio.gather(client(port), client(port))
+        finally:
+            tcp_server.close()
+            await server.close()
+
+    expected = ["YES", "NO", "DONT_KNOW", "YES", "INVALID"]
+    assert asyncio.run(run()) == [expected, expected]
+
+
+def test_overlong_and_undecodable_lines_are_invalid(
+    question_processor: QuestionProcessor,
+) -> None:
+    server = QuestionServer(question_processor)
+    lines = [
+        b"is Lassie an animal?\n",
+        b"is " + b"a" * (QuestionServer.MAX_LINE_BYTES + 10) + b" an animal?\n",
+        b"is Lassie a \xff?\n",
+        b"is " + b"a" * (5 * QuestionServer.MAX_LINE_BYTES) + b" an animal?\n",
+        b"is Lassie a plant?\n",
+    ]
+
+    async def client(port: int) -> List[str]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"".join(lines))
+        await writer.drain()
+        answers = [(await reader.readline()).decode().strip() for _ in lines]
+        writer.close()
+        return answers
+
+    async def run() -> List[str]:
+        tcp_server = await asyncio.start_server(
+            server.handle_connection,
+            "127.0.0.1",
+            0,
+            limit=QuestionServer.MAX_LINE_BYTES,
+        )
+        port = tcp_server.sockets[0].getsockname()[1]
+        try:
+            return await client(port)
+        finally:
+            tcp_server.close()
+            await server.close()
+
+    assert asyncio.run(run()) == ["YES", "INVALID", "INVALID", "INVALID", "NO"]
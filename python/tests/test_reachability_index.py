@@ -0,0 +1,38 @@
+from itertools import product
+from pathlib import Path
+
+import pytest
+
+from ontology.domain.ontology import Ontology
+from ontology.exceptions.ontology_exceptions import UnknownReachabilityIndexException
+from ontology.loader import CsvLoader
+
+
+@pytest.fixture
+def data_file() -> Path:
+    return Path("data/ontology.csv")
+
+
+@pytest.mark.parametrize("reachability_index", ["interval", "bitset"])
+def test_indexed_answers_match_traversal(
+    data_file: Path, reachability_index: str
+) -> None:
+    traversed = Ontology(data_file)
+    indexed = Ontology(data_file, reachability_index=reachability_index)
+    names = CsvLoader().load(data_file).names
+
+    for query, target in product(names, repeat=2):
+        assert indexed.is_subclass_of(query, target) == traversed.is_subclass_of(
+            query, target
+        )
+        assert indexed.is_instance_of(query, target) == traversed.is_instance_of(
+            query, target
+        )
+        assert indexed.has_attribute(query, target) == traversed.has_attribute(
+            query, target
+        )
+
+
+def test_unknown_reachability_index(data_file: Path) -> None:
+    with pytest.raises(UnknownReachabilityIndexException):
+        Ontology(data_file, reachability_index="quadtree")
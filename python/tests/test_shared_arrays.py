@@ -0,0 +1,26 @@
+import numpy as np
+
+from ontology.shared_arrays import (
+    decode_names,
+    encode_name_index,
+    encode_names,
+    lookup_ids,
+)
+
+
+def test_names_round_trip() -> None:
+    for names in ([], ["dog"], ["dog", "", "Lassie", "café"]):
+        assert decode_names(encode_names(names)) == names
+
+
+def test_name_index_lookup() -> None:
+    names = ["dog", "Lassie", "animal", "café", "do"]
+    sorted_names, sorted_ids = encode_name_index(names)
+
+    ids = lookup_ids(
+        sorted_names, sorted_ids, ["Lassie", "café", "dogs", "d", "zebra", "do", ""]
+    )
+
+    assert ids.tolist() == [1, 3, -1, -1, -1, 4, -1]
+    assert lookup_ids(*encode_name_index([]), ["dog"]).tolist() == [-1]
+    assert lookup_ids(sorted_names, sorted_ids, []).dtype == np.int64
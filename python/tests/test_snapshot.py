@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+from ontology.domain.edge_type import EdgeType
+from ontology.domain.ontology import Ontology
+from ontology.exceptions.ontology_exceptions import InvalidSnapshotException
+from ontology.facade import OntologyFacade
+from ontology.loader import CsvLoader
+from question_result import QuestionResult
+
+
+@pytest.mark.parametrize("materialize_closure", [False, True])
+def test_snapshot_answers_like_the_csv(
+    tmp_path: Path, materialize_closure: bool
+) -> None:
+    data_file = Path("data/ontology.csv")
+    snapshot_file = tmp_path / "ontology.snapshot"
+    ontology = Ontology(data_file, materialize_closure=materialize_closure)
+    ontology.save_snapshot(snapshot_file)
+
+    loaded = Ontology.from_snapshot(snapshot_file)
+
+    assert loaded.materialize_closure == materialize_closure
+    assert loaded.cycles == ontology.cycles
+    assert loaded.inconsistent_entities == ontology.inconsistent_entities
+    names = CsvLoader().load(data_file).names
+    for query in names:
+        for target in names:
+            assert loaded.is_instance_of(query, target) == ontology.is_instance_of(
+                query, target
+            )
+            assert loaded.is_subclass_of(query, target) == ontology.is_subclass_of(
+                query, target
+            )
+            assert loaded.has_attribute(query, target) == ontology.has_attribute(
+                query, target
+            )
+
+
+def test_snapshot_entities_are_views_of_the_loaded_store(tmp_path: Path) -> None:
+    snapshot_file = tmp_path / "ontology.snapshot"
+    ontology = Ontology(Path("data/ontology.csv"))
+    ontology.add_edge("InstanceOf", "Rex", "dog")
+    ontology.save_snapshot(snapshot_file)
+
+    loaded = Ontology.from_snapshot(snapshot_file)
+
+    rex = loaded.get_entity("Rex")
+    assert rex is not None and rex.ontology is loaded
+    assert rex in loaded.get_entity("dog").get_related_entities(EdgeType.HAS_INSTANCE)
+    assert [str(relationship) for relationship in rex.get_relationships()] == [
+        "Rex -- InstanceOf --> dog"
+    ]
+    assert len(loaded.get_entities()) == len(ontology.get_entities())
+
+
+def test_snapshot_keeps_edge_changes(tmp_path: Path) -> None:
+    snapshot_file = tmp_path / "ontology.snapshot"
+    ontology = Ontology(Path("data/ontology.csv"))
+    ontology.add_edge("SubclassOf", "animal", "living thing")
+    ontology.save_snapshot(snapshot_file)
+
+    loaded = OntologyFacade(snapshot_file).ontology
+
+    assert loaded.is_instance_of("Lassie", "living thing") == QuestionResult.YES
+    assert loaded.remove_edge("SubclassOf", "animal", "living thing")
+    assert loaded.is_instance_of("Lassie", "living thing") == QuestionResult.DONT_KNOW
+    assert loaded.is_instance_of("Lassie", "plant") == QuestionResult.NO
+
+
+def test_not_a_snapshot() -> None:
+    with pytest.raises(InvalidSnapshotException):
+        Ontology.from_snapshot(Path("data/ontology.csv"))